@@ -0,0 +1,87 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""
+Compares the legacy struct_to_map + map_to_sorted_query encoding with canonical_query.
+
+Usage:
+    python -m benchmarks.bench_encrypt
+"""
+
+import time
+
+from neurons.utils.encrypt import struct_to_map, map_to_sorted_query, canonical_query
+
+CONTAINER_COUNTS = (10, 100, 1_000, 10_000)
+
+
+def make_attestation(n_containers: int, n_gpus: int = 8) -> dict:
+    """Builds a miner attestation shaped like the payload returned by the attestation service."""
+    return {
+        "uid": 1,
+        "ip": "10.0.0.1",
+        "port": 8091,
+        "hotkey": "5F3sa2TJAWMqDhXG6jhV4N8ko9SxwGy8TpaNS1repo5EYjQX",
+        "coldkey": "5DAAnrj7VHTznn2AWBemMuyBwZWs6FNFjdyVXUeYum3PTXFy",
+        "nonce": "0n9T1ZWl3vLeCz4d7D2RKw==",
+        "timestamp": 1760000000000,
+        "gpu": [
+            {"id": i, "model": "NVIDIA H100 80GB HBM3", "memory": 80.0}
+            for i in range(n_gpus)
+        ],
+        "containers": [
+            {"id": f"container-{i}", "status": 1, "uptime": 604800 + i, "gpu": {"index": i % n_gpus}}
+            for i in range(n_containers)
+        ],
+        "signature": "",
+    }
+
+
+def best_of(fn, repeat: int) -> float:
+    """Returns the best wall time of fn over `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(counts=CONTAINER_COUNTS, repeat: int = 5) -> list:
+    results = []
+    for n in counts:
+        data = make_attestation(n)
+        legacy = best_of(lambda: map_to_sorted_query(struct_to_map(data)), repeat)
+        single_pass = best_of(lambda: canonical_query(data), repeat)
+        results.append({
+            "containers": n,
+            "legacy_ms": legacy * 1000,
+            "canonical_ms": single_pass * 1000,
+            "speedup": legacy / single_pass if single_pass > 0 else float("inf"),
+        })
+    return results
+
+
+def main():
+    print(f"{'containers':>10} {'legacy ms':>12} {'canonical ms':>14} {'speedup':>8}")
+    for r in run():
+        print(f"{r['containers']:>10} {r['legacy_ms']:>12.3f} {r['canonical_ms']:>14.3f} {r['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
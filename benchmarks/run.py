@@ -0,0 +1,348 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+"""
+Micro-benchmarks of the validator hot paths, with JSON results and a baseline comparison.
+
+Usage:
+    python -m benchmarks.run                                  # all benchmarks, writes benchmarks/results.json
+    python -m benchmarks.run --only get_rewards --sizes 256 4096
+    python -m benchmarks.run --save-baseline                  # store the results as benchmarks/baseline.json
+    python -m benchmarks.run --fail-on-regression             # exit 1 when a case is slower than the baseline
+
+Each case is timed as the best of `--repeat` batches, a batch running the function enough times to
+take at least 10ms. Cases are keyed by benchmark name, n and payload size. A setup returns the
+function to time, or the function and a cleanup to run once the case is measured.
+
+The committed baseline was recorded on one machine, see its `meta`; regenerate it with
+`--save-baseline` before comparing numbers from other hardware.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+import argparse
+import platform
+import numpy as np
+
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.bench_encrypt import make_attestation
+
+SIZES = (256, 1_024, 4_096, 65_536)
+# Cases whose payload (n x payload size) exceeds this are skipped to bound memory use.
+MAX_ELEMENTS = 4_000_000
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results.json")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class StubSubtensor:
+    """Returns the subnet hyperparameters process_weights_for_netuid reads, without a chain."""
+
+    def __init__(self, min_allowed_weights: int = 8, max_weight_limit: float = 0.1):
+        self._min_allowed_weights = min_allowed_weights
+        self._max_weight_limit = max_weight_limit
+
+    def min_allowed_weights(self, netuid: int) -> int:
+        return self._min_allowed_weights
+
+    def max_weight_limit(self, netuid: int) -> float:
+        return self._max_weight_limit
+
+
+def stub_metagraph(n: int, rng: random.Random) -> SimpleNamespace:
+    axons = [
+        SimpleNamespace(
+            ip=f"10.{uid >> 16 & 255}.{uid >> 8 & 255}.{uid & 255}",
+            port=8091,
+            hotkey=f"hotkey-{uid}",
+            coldkey=f"coldkey-{uid}",
+            is_serving=rng.random() < 0.9,
+        )
+        for uid in range(n)
+    ]
+    return SimpleNamespace(
+        n=np.int64(n),
+        uids=np.arange(n),
+        axons=axons,
+        hotkeys=[axon.hotkey for axon in axons],
+        active=np.ones(n, dtype=np.int64),
+        validator_permit=np.array([rng.random() < 0.05 for _ in range(n)]),
+        S=np.array([rng.uniform(0, 10_000) for _ in range(n)], dtype=np.float32),
+    )
+
+
+def random_responses(n: int, containers: int, rng: random.Random) -> list:
+    from neurons.validator.src.config.const import GPU_MODEL_RATES
+
+    models = list(GPU_MODEL_RATES) + ["Unknown GPU"]
+    return [
+        None if rng.random() < 0.1 else {
+            "gpu": [{"id": i, "model": rng.choice(models)} for i in range(rng.randint(1, 8))],
+            "containers": [
+                {"id": f"c{i}", "status": 1 if rng.random() < 0.8 else 0, "uptime": rng.randint(0, 2_000_000)}
+                for i in range(containers)
+            ],
+            "ip": "10.0.0.1",
+        }
+        for _ in range(n)
+    ]
+
+
+def random_weights(n: int, rng: random.Random) -> np.ndarray:
+    weights = np.array([rng.random() ** 4 for _ in range(n)], dtype=np.float32)
+    weights[: n // 10] = 0
+    return weights
+
+
+# Each benchmark builds its inputs for (n, payload) and returns the function to time.
+
+def setup_get_rewards(n: int, payload: int, rng: random.Random) -> Callable:
+    from neurons.validator.src.core.evaluate_miners import EvaluateMiners
+
+    evaluator = EvaluateMiners.__new__(EvaluateMiners)
+    responses = random_responses(n, payload, rng)
+    return lambda: evaluator.get_rewards(responses)
+
+
+def setup_normalize_max_weight(n: int, payload: int, rng: random.Random) -> Callable:
+    from neurons.utils.weight_utils import normalize_max_weight
+
+    weights = random_weights(n, rng)
+    return lambda: normalize_max_weight(weights, limit=0.1)
+
+
+def setup_normalize_max_weight_clipped(n: int, payload: int, rng: random.Random) -> Callable:
+    from neurons.utils.weight_utils import normalize_max_weight
+
+    # A few dominant miners, so the weights go through the cutoff search and the clipping.
+    weights = random_weights(n, rng)
+    weights[:3] = weights.sum()
+    return lambda: normalize_max_weight(weights, limit=0.1)
+
+
+def setup_process_weights_for_netuid(n: int, payload: int, rng: random.Random) -> Callable:
+    from neurons.utils.weight_utils import process_weights_for_netuid
+
+    metagraph = stub_metagraph(n, rng)
+    subtensor = StubSubtensor()
+    weights = random_weights(n, rng)
+    return lambda: process_weights_for_netuid(
+        uids=metagraph.uids, weights=weights, netuid=1, subtensor=subtensor, metagraph=metagraph
+    )
+
+
+def setup_convert_weights_and_uids_for_emit(n: int, payload: int, rng: random.Random) -> Callable:
+    from neurons.utils.weight_utils import convert_weights_and_uids_for_emit
+
+    uids = np.arange(n)
+    weights = random_weights(n, rng)
+    return lambda: convert_weights_and_uids_for_emit(uids, weights)
+
+
+def setup_canonical_query(n: int, payload: int, rng: random.Random) -> Callable:
+    # The signing string verify builds, which replaced map_to_sorted_query(struct_to_map(data)).
+    from neurons.utils.encrypt import canonical_query
+
+    data = make_attestation(payload)
+    return lambda: canonical_query(data)
+
+
+def setup_verify(n: int, payload: int, rng: random.Random) -> Callable:
+    from neurons.utils.encrypt import encrypt, generate_key, verify
+
+    public_key, private_key = generate_key()
+    data = make_attestation(payload)
+    signature = encrypt(data, private_key)
+    return lambda: verify(data, signature, public_key)
+
+
+def setup_get_random_uids(n: int, payload: int, rng: random.Random) -> Callable:
+    from neurons.utils.network_view import NetworkView
+    from neurons.utils.uids import get_random_uids
+
+    metagraph = stub_metagraph(n, rng)
+    neuron = SimpleNamespace(
+        metagraph=metagraph,
+        network_view=NetworkView(metagraph),
+        config=SimpleNamespace(neuron=SimpleNamespace(vpermit_tao_limit=4096)),
+    )
+    return lambda: get_random_uids(neuron, k=min(256, n))
+
+
+def setup_update_scores(n: int, payload: int, rng: random.Random) -> Tuple[Callable, Callable]:
+    from neurons.validator.src.core.validator import BaseValidatorNeuron
+    from neurons.validator.src.core.history import RewardHistory
+    from neurons.validator.src.core.journal import ScoreJournal
+
+    directory = tempfile.TemporaryDirectory(prefix="bench-journal-")
+    neuron = SimpleNamespace(
+        scores=np.zeros(n, dtype=np.float32),
+        last_block=np.zeros(n, dtype=np.int64),
+        last_reward=np.zeros(n, dtype=np.float32),
+        reward_history=RewardHistory(n),
+        scores_lock=threading.Lock(),
+        # Journal appends without fsync, the benchmark measures the update and not the disk.
+        journal=ScoreJournal(directory.name, fsync=False),
+        step=0,
+        block=1000,
+        config=SimpleNamespace(neuron=SimpleNamespace(moving_average_alpha=0.1)),
+    )
+    k = min(256, n)
+    uids = np.array(rng.sample(range(n), k))
+    rewards = np.array([rng.random() for _ in range(k)])
+
+    def cleanup():
+        neuron.journal.close()
+        directory.cleanup()
+
+    return lambda: BaseValidatorNeuron.update_scores(neuron, rewards, uids), cleanup
+
+
+# name -> (setup, payload sizes, whether the case depends on n)
+BENCHMARKS: Dict[str, Tuple[Callable, Tuple[int, ...], bool]] = {
+    "get_rewards": (setup_get_rewards, (8, 64), True),
+    "normalize_max_weight": (setup_normalize_max_weight, (0,), True),
+    "normalize_max_weight_clipped": (setup_normalize_max_weight_clipped, (0,), True),
+    "process_weights_for_netuid": (setup_process_weights_for_netuid, (0,), True),
+    "convert_weights_and_uids_for_emit": (setup_convert_weights_and_uids_for_emit, (0,), True),
+    "canonical_query": (setup_canonical_query, (10, 100, 1_000, 10_000), False),
+    "verify": (setup_verify, (10, 100, 1_000, 10_000), False),
+    "get_random_uids": (setup_get_random_uids, (0,), True),
+    "update_scores": (setup_update_scores, (0,), True),
+}
+
+
+def measure(fn: Callable, repeat: int, min_batch: float = 0.01) -> Dict[str, float]:
+    """Returns the best and mean time per call in ms over `repeat` batches."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_batch or number >= 1 << 20:
+            break
+        number *= 2
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {"best_ms": min(times) * 1000, "mean_ms": sum(times) / len(times) * 1000, "number": number}
+
+
+def run(names: List[str], sizes: Tuple[int, ...] = SIZES, repeat: int = 5, seed: int = 0) -> List[Dict]:
+    results = []
+    for name in names:
+        setup, payloads, depends_on_n = BENCHMARKS[name]
+        for n in sizes if depends_on_n else (1,):
+            for payload in payloads:
+                if n * max(payload, 1) > MAX_ELEMENTS:
+                    continue
+                fn, cleanup = setup(n, payload, random.Random(seed)), None
+                if isinstance(fn, tuple):
+                    fn, cleanup = fn
+                try:
+                    result = {"name": name, "n": n, "payload": payload, **measure(fn, repeat)}
+                finally:
+                    if cleanup is not None:
+                        cleanup()
+                print(f"{name:<36} n={n:<7} payload={payload:<6} {result['best_ms']:>12.4f} ms", flush=True)
+                results.append(result)
+    return results
+
+
+def case_key(result: Dict) -> str:
+    return f"{result['name']}[n={result['n']},payload={result['payload']}]"
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[Dict]:
+    """Returns the cases slower than `threshold` times their baseline, and prints every ratio."""
+    previous = {case_key(r): r for r in baseline}
+    regressions = []
+    print(f"\n{'case':<64} {'baseline ms':>12} {'now ms':>12} {'ratio':>7}")
+    for r in results:
+        base = previous.get(case_key(r))
+        if base is None:
+            continue
+        ratio = r["best_ms"] / base["best_ms"] if base["best_ms"] > 0 else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{case_key(r):<64} {base['best_ms']:>12.4f} {r['best_ms']:>12.4f} {ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append({**r, "baseline_ms": base["best_ms"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the validator hot paths.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Results to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file too.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run(args.only, tuple(args.sizes), args.repeat)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    regressions = []
+    if not args.save_baseline:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}, create one with --save-baseline.", file=sys.stderr)
+            if args.fail_on_regression:
+                sys.exit(2)
+        else:
+            with open(args.baseline) as f:
+                regressions = compare(results, json.load(f)["results"], args.threshold)
+            print(f"{len(regressions)} regressions above {args.threshold:.2f}x")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import time
+import random
+import asyncio
+import numpy as np
+import bittensor as bt
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from neurons.utils.encrypt import encrypt, generate_key
+
+DEFAULT_GPU_MODELS = (
+    "NVIDIA H100 80GB HBM3",
+    "NVIDIA H200",
+    "NVIDIA B200",
+    "NVIDIA GeForce RTX 4090",
+    "NVIDIA GeForce RTX 5090",
+)
+
+
+@dataclass
+class FleetConfig:
+    """
+    Shape and behaviour of a simulated miner fleet.
+
+    Latencies are log-normal with the given median and sigma. Per request, a miner fails with
+    `error_rate` (status False), and a `bad_identity_rate` fraction of miners reports a wrong port
+    and hotkey. A `bad_signature_rate` fraction signs with a key the validator does not know.
+    """
+    miners: int = 256
+    gpus: Tuple[int, int] = (1, 8)
+    containers: Tuple[int, int] = (1, 32)
+    running_fraction: float = 0.8
+    gpu_models: Tuple[str, ...] = DEFAULT_GPU_MODELS
+    latency_median: float = 0.2
+    latency_sigma: float = 0.5
+    error_rate: float = 0.01
+    bad_identity_rate: float = 0.0
+    bad_signature_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class SimulatedMiner:
+    """One miner of the fleet: its axon identity, inventory and faults."""
+    uid: int
+    ip: str
+    port: int
+    hotkey: str
+    coldkey: str
+    gpu: List[Dict[str, Any]]
+    containers: List[Dict[str, Any]]
+    bad_identity: bool = False
+    bad_signature: bool = False
+    started_at: float = field(default_factory=time.time)
+
+    def attestation(self, nonce: str) -> Dict[str, Any]:
+        """The payload of the attestation service for this miner, before signing."""
+        elapsed = int(time.time() - self.started_at)
+        return {
+            "ip": self.ip,
+            "port": self.port + 1 if self.bad_identity else self.port,
+            "hotkey": f"{self.hotkey}-spoofed" if self.bad_identity else self.hotkey,
+            "coldkey": self.coldkey,
+            "nonce": nonce,
+            "timestamp": int(time.time() * 1000),
+            "gpu": self.gpu,
+            "containers": [
+                {**c, "uptime": c["uptime"] + elapsed} if c["status"] == 1 else c
+                for c in self.containers
+            ],
+        }
+
+
+class SimulatedFleet:
+    """
+    A fleet of simulated miners answering the `config` method of AIAgentProtocol in process.
+
+    The fleet signs attestations like the attestation service, with `private_key`; register
+    `public_key` with the validator's key registry. `metagraph()` describes the fleet the way the
+    validator reads a metagraph, and `dendrite()` is an in-memory transport to the miners.
+    """
+
+    def __init__(self, config: FleetConfig = FleetConfig(), private_key=None):
+        self.config = config
+        if private_key is None:
+            self.public_key, self.private_key = generate_key()
+        else:
+            self.public_key, self.private_key = private_key.public_key(), private_key
+        _, self._foreign_key = generate_key()
+        self._rng = random.Random(config.seed)
+        self.miners = [self._make_miner(uid) for uid in range(config.miners)]
+        self._by_hotkey = {miner.hotkey: miner for miner in self.miners}
+
+    def _make_miner(self, uid: int) -> SimulatedMiner:
+        rng, c = self._rng, self.config
+        return SimulatedMiner(
+            uid=uid,
+            ip=f"10.{uid >> 16 & 255}.{uid >> 8 & 255}.{uid & 255}",
+            port=8091,
+            hotkey=f"fleet-hotkey-{uid}",
+            coldkey=f"fleet-coldkey-{uid}",
+            gpu=[
+                {"id": i, "model": rng.choice(c.gpu_models), "memory": 80.0}
+                for i in range(rng.randint(*c.gpus))
+            ],
+            containers=[
+                {
+                    "id": f"container-{uid}-{i}",
+                    "status": 1 if rng.random() < c.running_fraction else 0,
+                    "uptime": rng.randint(0, 2_000_000),
+                }
+                for i in range(rng.randint(*c.containers))
+            ],
+            bad_identity=rng.random() < c.bad_identity_rate,
+            bad_signature=rng.random() < c.bad_signature_rate,
+        )
+
+    def get(self, hotkey: str) -> SimulatedMiner | None:
+        return self._by_hotkey.get(hotkey)
+
+    def add_miner(self, ip: str, port: int, hotkey: str, coldkey: str) -> SimulatedMiner:
+        """Adds a miner with a generated inventory behind an existing axon identity."""
+        miner = self._make_miner(len(self.miners))
+        miner.ip, miner.port, miner.hotkey, miner.coldkey = ip, port, hotkey, coldkey
+        self.miners.append(miner)
+        self._by_hotkey[hotkey] = miner
+        return miner
+
+    def sample_latency(self) -> float:
+        return self.config.latency_median * float(np.exp(self._rng.gauss(0.0, self.config.latency_sigma)))
+
+    def respond(self, miner: SimulatedMiner, synapse_input: Dict[str, Any] | None) -> Dict[str, Any]:
+        """Answers a `config` request of the validator for `miner`."""
+        body = (synapse_input or {}).get("body", {})
+        if (synapse_input or {}).get("method") != "config" or "nonce" not in body:
+            return {"status": False, "message": "unsupported request"}
+        if self._rng.random() < self.config.error_rate:
+            return {"status": False, "message": "attestation service unavailable"}
+
+        data = miner.attestation(body["nonce"])
+        data["signature"] = encrypt(data, self._foreign_key if miner.bad_signature else self.private_key)
+        return {"status": True, "data": data}
+
+    def metagraph(self) -> SimpleNamespace:
+        """The fields of bt.metagraph the validator reads, for the fleet."""
+        n = len(self.miners)
+        axons = [
+            SimpleNamespace(ip=m.ip, port=m.port, hotkey=m.hotkey, coldkey=m.coldkey, is_serving=True)
+            for m in self.miners
+        ]
+        return SimpleNamespace(
+            n=np.int64(n),
+            uids=np.arange(n),
+            axons=axons,
+            hotkeys=[axon.hotkey for axon in axons],
+            coldkeys=[axon.coldkey for axon in axons],
+            active=np.ones(n, dtype=np.int64),
+            validator_permit=np.zeros(n, dtype=bool),
+            S=np.zeros(n, dtype=np.float32),
+        )
+
+    def dendrite(self) -> "FleetDendrite":
+        return FleetDendrite(self)
+
+
+class FleetDendrite:
+    """
+    In-memory stand-in for bt.dendrite that routes each axon to its simulated miner by hotkey.
+    Latencies are really awaited and a miner slower than the timeout answers with a 408.
+    """
+
+    def __init__(self, fleet: SimulatedFleet):
+        self.fleet = fleet
+
+    async def __call__(self, axons, synapse: bt.Synapse = None, deserialize: bool = True, timeout: float = 12.0, **kwargs):
+        return await self.forward(axons, synapse, timeout=timeout, deserialize=deserialize)
+
+    async def forward(self, axons, synapse: bt.Synapse = None, timeout: float = 12.0, deserialize: bool = True):
+        async def query(axon):
+            s = synapse.copy()
+            miner = self.fleet.get(axon.hotkey)
+            latency = self.fleet.sample_latency()
+            if miner is None:
+                s.output, s.dendrite.status_code, s.dendrite.status_message = None, 404, "Not Found"
+                s.dendrite.process_time = str(0.0)
+            elif latency > timeout:
+                await asyncio.sleep(timeout)
+                s.output, s.dendrite.status_code, s.dendrite.status_message = None, 408, "Timeout"
+                s.dendrite.process_time = str(timeout)
+            else:
+                await asyncio.sleep(latency)
+                s.output = self.fleet.respond(miner, s.input)
+                s.dendrite.status_code, s.dendrite.status_message = 200, "OK"
+                s.dendrite.process_time = str(latency)
+            return s.deserialize() if deserialize else s
+
+        return await asyncio.gather(*(query(axon) for axon in axons))
@@ -1,10 +1,12 @@
-import time
-
+import copy
+import math
 import asyncio
 import random
 import bittensor as bt
 
-from typing import List
+from typing import Any, Callable, Dict, List
+
+from neurons.base.fleet import FleetConfig, SimulatedFleet
 
 
 class MockSubtensor(bt.MockSubtensor):
@@ -43,21 +45,99 @@ class MockMetagraph(bt.metagraph):
             self.subtensor = subtensor
         self.sync(subtensor=subtensor)
 
-        for axon in self.axons:
-            axon.ip = "127.0.0.0"
+        # Distinct ips, the validator rejects miners that share an ip.
+        for uid, axon in enumerate(self.axons):
+            axon.ip = f"127.0.{uid >> 8 & 255}.{uid & 255}"
             axon.port = 8091
 
         bt.logging.info(f"Metagraph: {self}")
         bt.logging.info(f"Axons: {self.axons}")
 
 
+class MockAttestationResponder:
+    """
+    Default output of MockDendrite: answers the `config` method of AIAgentProtocol for any axon with
+    an attestation of a generated inventory, signed with `private_key`. Register `public_key` with
+    the validator's key registry so the attestations verify.
+    """
+
+    def __init__(self, fleet_config: FleetConfig = None):
+        self.fleet = SimulatedFleet(fleet_config or FleetConfig(miners=0, error_rate=0.0))
+        self.public_key = self.fleet.public_key
+
+    def __call__(self, axon: bt.AxonInfo, synapse_input: Dict[str, Any] | None) -> Dict[str, Any]:
+        miner = self.fleet.get(axon.hotkey)
+        if miner is None:
+            miner = self.fleet.add_miner(axon.ip, axon.port, axon.hotkey, axon.coldkey)
+        return self.fleet.respond(miner, synapse_input)
+
+
+MALFORMED_OUTPUTS = (
+    "not a payload",
+    {"status": True},
+    {"status": True, "data": ["not", "a", "dict"]},
+    {"status": True, "data": {"nonce": None, "gpu": "none", "containers": None}},
+)
+
+
 class MockDendrite(bt.dendrite):
     """
-    Replaces a real bittensor network request with a mock request that just returns some static response for all axons that are passed and adds some random delay.
+    Replaces a real bittensor network request with a mock request that answers AIAgentProtocol
+    synapses through a pluggable responder, `responder(axon, synapse.input) -> output`.
+
+    Latencies are log-normal with the given median and sigma, and are really awaited. A request
+    slower than its timeout is answered with a 408 after the timeout. Timeouts, malformed outputs
+    and bad signatures are injected at the configured rates.
     """
 
-    def __init__(self, wallet):
+    def __init__(
+        self,
+        wallet,
+        responder: Callable[[bt.AxonInfo, Dict[str, Any] | None], Any] = None,
+        latency_median: float = 0.05,
+        latency_sigma: float = 0.5,
+        timeout_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        bad_signature_rate: float = 0.0,
+        seed: int | None = None,
+    ):
         super().__init__(wallet)
+        self.responder = responder or MockAttestationResponder()
+        self.public_key = getattr(self.responder, "public_key", None)
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.timeout_rate = timeout_rate
+        self.malformed_rate = malformed_rate
+        self.bad_signature_rate = bad_signature_rate
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, wallet, config: "bt.Config") -> "MockDendrite":
+        return cls(
+            wallet,
+            latency_median=config.mock_dendrite.latency_median,
+            latency_sigma=config.mock_dendrite.latency_sigma,
+            timeout_rate=config.mock_dendrite.timeout_rate,
+            malformed_rate=config.mock_dendrite.malformed_rate,
+            bad_signature_rate=config.mock_dendrite.bad_signature_rate,
+        )
+
+    def sample_latency(self) -> float:
+        if self._rng.random() < self.timeout_rate:
+            return float("inf")
+        return self.latency_median * math.exp(self._rng.gauss(0.0, self.latency_sigma))
+
+    def inject_faults(self, output: Any) -> Any:
+        """Replaces the output by a malformed one, or corrupts its signature, at the configured rates."""
+        if self._rng.random() < self.malformed_rate:
+            return copy.deepcopy(self._rng.choice(MALFORMED_OUTPUTS))
+        if self._rng.random() < self.bad_signature_rate and isinstance(output, dict):
+            data = output.get("data")
+            if isinstance(data, dict) and data.get("signature"):
+                signature = data["signature"]
+                flipped = "A" if signature[0] != "A" else "B"
+                output = {**output, "data": {**data, "signature": flipped + signature[1:]}}
+        return output
 
     async def forward(
         self,
@@ -71,46 +151,33 @@ class MockDendrite(bt.dendrite):
         if streaming:
             raise NotImplementedError("Streaming not implemented yet.")
 
-        async def query_all_axons(streaming: bool):
-            """Queries all axons for responses."""
-
-            async def single_axon_response(i, axon):
-                """Queries a single axon for a response."""
-
-                start_time = time.time()
-                s = synapse.copy()
-                # Attach some more required data so it looks real
-                s = self.preprocess_synapse_for_request(axon, s, timeout)
-                # We just want to mock the response, so we'll just fill in some data
-                process_time = random.random()
-                if process_time < timeout:
-                    s.dendrite.process_time = str(time.time() - start_time)
-                    # Update the status code and status message of the dendrite to match the axon
-                    # TODO (developer): replace with your own expected synapse data
-                    s.dummy_output = s.dummy_input * 2
-                    s.dendrite.status_code = 200
-                    s.dendrite.status_message = "OK"
-                    synapse.dendrite.process_time = str(process_time)
-                else:
-                    s.dummy_output = 0
-                    s.dendrite.status_code = 408
-                    s.dendrite.status_message = "Timeout"
-                    synapse.dendrite.process_time = str(timeout)
-
-                # Return the updated synapse object after deserializing if requested
-                if deserialize:
-                    return s.deserialize()
-                else:
-                    return s
-
-            return await asyncio.gather(
-                *(
-                    single_axon_response(i, target_axon)
-                    for i, target_axon in enumerate(axons)
-                )
-            )
-
-        return await query_all_axons(streaming)
+        async def single_axon_response(axon):
+            """Queries a single axon for a response."""
+            s = synapse.copy()
+            # Attach some more required data so it looks real
+            s = self.preprocess_synapse_for_request(axon, s, timeout)
+
+            latency = self.sample_latency()
+            if latency < timeout:
+                await asyncio.sleep(latency)
+                s.output = self.inject_faults(self.responder(axon, s.input))
+                s.dendrite.status_code = 200
+                s.dendrite.status_message = "OK"
+                s.dendrite.process_time = str(latency)
+            else:
+                await asyncio.sleep(timeout)
+                s.output = None
+                s.dendrite.status_code = 408
+                s.dendrite.status_message = "Timeout"
+                s.dendrite.process_time = str(timeout)
+
+            # Return the updated synapse object after deserializing if requested
+            if deserialize:
+                return s.deserialize()
+            else:
+                return s
+
+        return await asyncio.gather(*(single_axon_response(axon) for axon in axons))
 
     def __str__(self) -> str:
         """
@@ -24,6 +24,8 @@ from abc import ABC, abstractmethod
 # Sync calls set weights and also resyncs the metagraph.
 from neurons.utils.config import check_config, add_args, config
 from neurons.utils.misc import ttl_get_block
+from neurons.utils.metrics import StageMetrics
+from neurons.utils.hyperparameters import HyperparameterCache
 from neurons import __spec_version__ as spec_version
 from neurons.base.mock import MockSubtensor, MockMetagraph
 
@@ -66,6 +68,9 @@ class BaseNeuron(ABC):
         # Set up logging with the provided configuration.
         bt.logging.set_config(config=self.config.logging)
 
+        # Per-stage latency instrumentation, a no-op unless --neuron.metrics is set.
+        self.metrics = StageMetrics(enabled=self.config.neuron.metrics)
+
         # If a gpu is required, set the device to cuda:N (e.g. cuda:0)
         self.device = self.config.neuron.device
 
@@ -94,6 +99,13 @@ class BaseNeuron(ABC):
         bt.logging.info(f"Subtensor: {self.subtensor}")
         bt.logging.info(f"Metagraph: {self.metagraph}")
 
+        # Subnet hyperparameters and the registration check, read from the chain once per tempo.
+        self.hyperparameters = HyperparameterCache(
+            self.subtensor,
+            get_block=lambda: self.block,
+            refresh_blocks=self.config.neuron.hyperparameter_refresh_blocks,
+        )
+
         # Check if the miner is registered on the Bittensor network before proceeding further.
         self.check_registered()
 
@@ -119,20 +131,24 @@ class BaseNeuron(ABC):
         Wrapper for synchronizing the state of the network for the given miner or validator.
         """
         # Ensure miner or validator hotkey is still registered on the network.
-        self.check_registered()
+        with self.metrics.stage("check_registered"):
+            self.check_registered()
 
         if self.should_sync_metagraph():
-            self.resync_metagraph()
+            with self.metrics.stage("resync_metagraph"):
+                self.resync_metagraph()
 
         if self.should_set_weights():
-            self.set_weights()
+            with self.metrics.stage("set_weights"):
+                self.set_weights()
 
         # Always save state.
-        self.save_state()
+        with self.metrics.stage("save_state"):
+            self.save_state()
 
     def check_registered(self):
         # --- Check for registration.
-        if not self.subtensor.is_hotkey_registered(
+        if not self.hyperparameters.is_hotkey_registered(
             netuid=self.config.netuid,
             hotkey_ss58=self.wallet.hotkey.ss58_address,
         ):
@@ -194,3 +194,7 @@ class BaseMinerNeuron(BaseNeuron):
 
         # Sync the metagraph.
         self.metagraph.sync(subtensor=self.subtensor)
+
+        # A hotkey that left the metagraph was deregistered, the next registration check asks the chain.
+        if self.wallet.hotkey.ss58_address not in self.metagraph.hotkeys:
+            self.hyperparameters.invalidate()
@@ -88,6 +88,13 @@ def add_args(cls, parser):
         default=100,
     )
 
+    parser.add_argument(
+        "--neuron.hyperparameter_refresh_blocks",
+        type=int,
+        help="Number of blocks subnet hyperparameters and the registration check are cached for, which also delays noticing a deregistration. 0 uses the subnet tempo.",
+        default=0,
+    )
+
     parser.add_argument(
         "--mock",
         action="store_true",
@@ -95,6 +102,41 @@ def add_args(cls, parser):
         default=False,
     )
 
+    parser.add_argument(
+        "--mock_dendrite.latency_median",
+        type=float,
+        help="Median latency in seconds of the mock dendrite, with --mock.",
+        default=0.05,
+    )
+
+    parser.add_argument(
+        "--mock_dendrite.latency_sigma",
+        type=float,
+        help="Sigma of the log-normal latency of the mock dendrite, with --mock.",
+        default=0.5,
+    )
+
+    parser.add_argument(
+        "--mock_dendrite.timeout_rate",
+        type=float,
+        help="Fraction of mock dendrite requests that time out, with --mock.",
+        default=0.0,
+    )
+
+    parser.add_argument(
+        "--mock_dendrite.malformed_rate",
+        type=float,
+        help="Fraction of mock dendrite responses with a malformed payload, with --mock.",
+        default=0.0,
+    )
+
+    parser.add_argument(
+        "--mock_dendrite.bad_signature_rate",
+        type=float,
+        help="Fraction of mock dendrite responses with a corrupted signature, with --mock.",
+        default=0.0,
+    )
+
     parser.add_argument(
         "--neuron.events_retention_size",
         type=str,
@@ -109,6 +151,13 @@ def add_args(cls, parser):
         default=False,
     )
 
+    parser.add_argument(
+        "--neuron.metrics",
+        action="store_true",
+        help="If set, record per-stage latency histograms and log a summary after each step.",
+        default=False,
+    )
+
     parser.add_argument(
         "--wandb.off",
         action="store_true",
@@ -183,10 +232,38 @@ def add_validator_args(cls, parser):
     parser.add_argument(
         "--neuron.timeout",
         type=float,
-        help="The timeout for each forward call in seconds.",
+        help="The timeout for each forward call in seconds, also the ceiling of the per-miner timeouts.",
         default=10,
     )
 
+    parser.add_argument(
+        "--neuron.timeout_floor",
+        type=float,
+        help="The lowest per-miner timeout in seconds.",
+        default=2.0,
+    )
+
+    parser.add_argument(
+        "--neuron.timeout_percentile",
+        type=float,
+        help="Percentile of the recent process times of a miner its timeout is derived from.",
+        default=95.0,
+    )
+
+    parser.add_argument(
+        "--neuron.timeout_window",
+        type=int,
+        help="Number of recent process times per miner its timeout is derived from.",
+        default=20,
+    )
+
+    parser.add_argument(
+        "--neuron.timeout_margin",
+        type=float,
+        help="Factor applied to the percentile of the process times of a miner to get its timeout.",
+        default=1.5,
+    )
+
     parser.add_argument(
         "--neuron.num_concurrent_forwards",
         type=int,
@@ -201,6 +278,90 @@ def add_validator_args(cls, parser):
         default=50,
     )
 
+    parser.add_argument(
+        "--neuron.eval_cadence_blocks",
+        type=int,
+        help="Number of blocks between the start of two evaluation steps.",
+        default=10,
+    )
+
+    parser.add_argument(
+        "--neuron.eval_jitter",
+        type=float,
+        help="Maximum random delay in seconds added to each evaluation slot.",
+        default=0.0,
+    )
+
+    parser.add_argument(
+        "--neuron.step_deadline",
+        type=float,
+        help="Seconds after which an evaluation step is cancelled, at most 90%% of the cadence length. 0 uses the maximum.",
+        default=0.0,
+    )
+
+    parser.add_argument(
+        "--neuron.batch_responses",
+        action="store_true",
+        help="If set, wait for every miner before validating responses instead of streaming them.",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--neuron.verify_workers",
+        type=int,
+        help="Number of workers verifying attestation signatures. 0 verifies on the event loop thread.",
+        default=4,
+    )
+
+    parser.add_argument(
+        "--neuron.verify_processes",
+        action="store_true",
+        help="If set, verify attestation signatures on a process pool instead of a thread pool.",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--neuron.verify_batch_size",
+        type=int,
+        help="Number of attestations handed to the verification pool at once.",
+        default=64,
+    )
+
+    parser.add_argument(
+        "--neuron.record_steps",
+        action="store_true",
+        help="If set, record every evaluation step to steps.jsonl.gz in the neuron directory for offline replay.",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--neuron.reward_history_window",
+        type=int,
+        help="Number of recent rewards kept per miner for windowed statistics.",
+        default=64,
+    )
+
+    parser.add_argument(
+        "--neuron.journal_compact_steps",
+        type=int,
+        help="Number of steps between two snapshots of the validator state, score updates are journaled in between.",
+        default=100,
+    )
+
+    parser.add_argument(
+        "--neuron.journal_compact_bytes",
+        type=int,
+        help="Size in bytes of the score journal above which the validator state is snapshotted early.",
+        default=4 * 1024 * 1024,  # 4 MB
+    )
+
+    parser.add_argument(
+        "--neuron.journal_fsync",
+        action="store_true",
+        help="If set, fsync the score journal after every update instead of when it is snapshotted.",
+        default=False,
+    )
+
     parser.add_argument(
         "--neuron.disable_set_weights",
         action="store_true",
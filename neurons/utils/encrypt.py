@@ -1,9 +1,12 @@
 import base64
 import os
+import time
 from datetime import datetime
-from typing import Any, Dict
+from operator import itemgetter
+from typing import Any, Dict, List, Tuple
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import serialization
+import bittensor as bt
 
 
 # -------------------------------
@@ -63,6 +66,83 @@ def map_to_sorted_query(data: Dict[str, str]) -> str:
     return "&".join(f"{k}={data[k]}" for k in keys)
 
 
+# -------------------------------
+# canonical_query
+# -------------------------------
+def _collect_pairs(data: Any, prefix: str, pairs: List[Tuple[Any, str]]):
+    """
+    Append the flattened (key, value) pairs of data to pairs.
+    Mirrors struct_to_map exactly, but writes into a single list instead of merging nested dicts.
+    """
+    if isinstance(data, dict):
+        items = data
+    elif hasattr(data, "__dict__"):
+        items = data.__dict__
+    else:
+        if prefix:
+            pairs.append((prefix, str(data)))
+        return
+
+    append = pairs.append
+    for k, v in items.items():
+        if k == "signature":
+            continue
+
+        key = f"{prefix}.{k}" if prefix else k
+
+        # Fast paths for the exact builtin types that make up almost every payload.
+        t = type(v)
+        if t is str:
+            append((key, v))
+
+        elif t is int or t is float:
+            append((key, str(v)))
+
+        elif isinstance(v, (str, int, float, bool)):
+            append((key, str(v).lower() if isinstance(v, bool) else str(v)))
+
+        elif isinstance(v, datetime):
+            append((key, v.isoformat()))
+
+        elif isinstance(v, (list, tuple, set)):
+            for i, item in enumerate(v):
+                _collect_pairs(item, f"{key}.{i}", pairs)
+
+        elif isinstance(v, dict) or hasattr(v, "__dict__"):
+            _collect_pairs(v, key, pairs)
+
+        elif v is not None:
+            append((key, str(v)))
+
+
+def canonical_query(data: Any) -> str:
+    """
+    Build the signing string of data in a single pass.
+    Equivalent to map_to_sorted_query(struct_to_map(data)), without the intermediate dicts.
+    """
+    pairs = []
+    _collect_pairs(data, "", pairs)
+    # Stable sort keeps duplicate keys in insertion order, the last one wins like a dict update.
+    pairs.sort(key=itemgetter(0))
+
+    parts = []
+    last_key = None
+    for key, value in pairs:
+        if parts and key == last_key:
+            parts[-1] = f"{last_key}={value}"
+            continue
+        parts.append(f"{key}={value}")
+        last_key = key
+    return "&".join(parts)
+
+
+def canonical_bytes(data: Any) -> bytes:
+    """
+    Return the UTF-8 encoded signing string of data.
+    """
+    return canonical_query(data).encode("utf-8")
+
+
 # -------------------------------
 # Encrypt (sign data)
 # -------------------------------
@@ -70,9 +150,7 @@ def encrypt(data: Any, private_key: ed25519.Ed25519PrivateKey) -> str:
     """
     Sign the data using an Ed25519 private key and return a base64 signature.
     """
-    data_map = struct_to_map(data)
-    query = map_to_sorted_query(data_map)
-    signature = private_key.sign(query.encode("utf-8"))
+    signature = private_key.sign(canonical_bytes(data))
     return base64.b64encode(signature).decode("utf-8")
 
 
@@ -84,11 +162,10 @@ def verify(data: Any, signature: str, public_key: ed25519.Ed25519PublicKey) -> b
     Verify an Ed25519 signature.
     Returns True if valid, otherwise False.
     """
-    data_map = struct_to_map(data)
-    query = map_to_sorted_query(data_map)
+    message = canonical_bytes(data)
     try:
         sig_bytes = base64.b64decode(signature)
-        public_key.verify(sig_bytes, query.encode("utf-8"))
+        public_key.verify(sig_bytes, message)
         return True
     except Exception:
         return False
@@ -198,6 +275,151 @@ def read_public_key(path: str) -> ed25519.Ed25519PublicKey:
     return ed25519.Ed25519PublicKey.from_public_bytes(key_bytes)
 
 
+# -------------------------------
+# Verify against several keys
+# -------------------------------
+def verify_any(data: Any, signature: str, public_keys: Dict[str, ed25519.Ed25519PublicKey]) -> bool:
+    """
+    Verify an Ed25519 signature against a set of active keys.
+    If the data names a known 'key_id' only that key is tried, otherwise every key is tried.
+    """
+    if not public_keys:
+        return False
+
+    key_id = data.get("key_id") if isinstance(data, dict) else getattr(data, "key_id", None)
+    if key_id in public_keys:
+        candidates = [public_keys[key_id]]
+    else:
+        candidates = list(public_keys.values())
+
+    message = canonical_bytes(data)
+    try:
+        sig_bytes = base64.b64decode(signature)
+    except Exception:
+        return False
+
+    for public_key in candidates:
+        try:
+            public_key.verify(sig_bytes, message)
+            return True
+        except Exception:
+            continue
+    return False
+
+
+# -------------------------------
+# Public key registry
+# -------------------------------
+class PublicKeyRegistry:
+    """
+    Cache of the active attestation public keys.
+
+    Keys are read from `*.key` files in a directory (or from a single key file), the key id of
+    each key is its file name without the extension. Files are parsed once and only re-read
+    when their mtime changes, and the directory is checked at most every `check_interval`
+    seconds, so adding a key for rotation or removing a retired one needs no restart.
+    """
+
+    def __init__(self, path: str, check_interval: float = 60.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._keys: Dict[str, ed25519.Ed25519PublicKey] = {}
+        self._raw_keys: Dict[str, bytes] = {}
+        self._static_keys: Dict[str, ed25519.Ed25519PublicKey] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._last_check = float("-inf")
+
+    def _key_files(self) -> Dict[str, str]:
+        if os.path.isdir(self.path):
+            return {
+                os.path.splitext(name)[0]: os.path.join(self.path, name)
+                for name in sorted(os.listdir(self.path))
+                if name.endswith(".key")
+            }
+        if os.path.isfile(self.path):
+            return {os.path.splitext(os.path.basename(self.path))[0]: self.path}
+        return {}
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the keys whose files changed since the last check.
+        Returns True if the set of active keys changed.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        files = self._key_files()
+        mtimes = {}
+        for key_id, path in files.items():
+            try:
+                mtimes[key_id] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+
+        if mtimes == self._mtimes:
+            return False
+
+        keys = {}
+        for key_id, mtime in mtimes.items():
+            if self._mtimes.get(key_id) == mtime and key_id in self._keys:
+                keys[key_id] = self._keys[key_id]
+                continue
+            try:
+                keys[key_id] = read_public_key(files[key_id])
+            except Exception as e:
+                bt.logging.warning(f"Failed to load public key {files[key_id]}: {e}")
+                if key_id in self._keys:
+                    # Keep serving the previous version and retry on the next check.
+                    keys[key_id] = self._keys[key_id]
+                    mtimes[key_id] = self._mtimes[key_id]
+
+        keys.update(self._static_keys)
+        self._mtimes = mtimes
+        self._set_keys(keys)
+        return True
+
+    def _set_keys(self, keys: Dict[str, ed25519.Ed25519PublicKey]):
+        # Swap whole dicts so readers on worker threads always see a consistent set.
+        self._raw_keys = {
+            key_id: key.public_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PublicFormat.Raw,
+            )
+            for key_id, key in keys.items()
+        }
+        self._keys = keys
+
+    def add(self, key_id: str, public_key: ed25519.Ed25519PublicKey):
+        """
+        Register a key that does not live on disk, e.g. the key of a simulated attestation service.
+        """
+        self._static_keys[key_id] = public_key
+        self._set_keys({**self._keys, key_id: public_key})
+
+    def keys(self) -> Dict[str, ed25519.Ed25519PublicKey]:
+        """
+        Return the active keys by key id.
+        """
+        return self._keys
+
+    def raw_keys(self) -> Dict[str, bytes]:
+        """
+        Return the raw 32-byte encoding of the active keys by key id.
+        """
+        return self._raw_keys
+
+    def get(self, key_id: str) -> ed25519.Ed25519PublicKey | None:
+        return self._keys.get(key_id)
+
+    def verify(self, data: Any, signature: str) -> bool:
+        """
+        Verify an Ed25519 signature against the active keys.
+        """
+        return verify_any(data, signature, self._keys)
+
+
 # -------------------------------
 # Example usage
 # -------------------------------
@@ -0,0 +1,88 @@
+import bittensor as bt
+
+from typing import Any, Callable, Dict, Tuple
+
+# Refresh period used when the subnet tempo cannot be read.
+DEFAULT_TEMPO = 360
+
+
+class HyperparameterCache:
+    """
+    Block-scoped cache of the subnet lookups a neuron makes on every step, keyed by netuid.
+
+    `min_allowed_weights`, `max_weight_limit` and `is_hotkey_registered` take the same arguments as
+    the subtensor methods they wrap, so the cache can be passed as the subtensor of
+    process_weights_for_netuid. A value is fetched from the chain at most once every `refresh_blocks`
+    blocks, or once per subnet tempo when `refresh_blocks` is 0. Entries are kept across metagraph
+    resyncs, which happen on the same blocks as set_weights; `invalidate` drops every entry and is
+    called when the hotkey of the neuron leaves the metagraph.
+
+    A cached `is_hotkey_registered` delays the detection of a deregistration by up to one refresh
+    period, unless a resync notices it first.
+    """
+
+    def __init__(self, subtensor: "bt.subtensor", get_block: Callable[[], int], refresh_blocks: int = 0):
+        self.subtensor = subtensor
+        self.get_block = get_block
+        self.refresh_blocks = max(0, refresh_blocks)
+        self.hits = 0
+        self.misses = 0
+        self._tempo: Dict[int, int] = {}
+        self._entries: Dict[Tuple, Tuple[int, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def refresh_period(self, netuid: int) -> int:
+        """Number of blocks a value of `netuid` is served from the cache."""
+        if self.refresh_blocks > 0:
+            return self.refresh_blocks
+        if netuid not in self._tempo:
+            try:
+                tempo = self.subtensor.tempo(netuid=netuid)
+            except Exception as e:
+                bt.logging.warning(f"[hyperparameters] could not read the tempo of netuid {netuid}: {e}")
+                tempo = None
+            self._tempo[netuid] = int(tempo) if tempo else DEFAULT_TEMPO
+        return self._tempo[netuid]
+
+    def get(self, name: str, netuid: int, **kwargs) -> Any:
+        """Returns subtensor.<name>(netuid=netuid, **kwargs), from the cache unless it is older than the refresh period."""
+        key = (name, netuid, *sorted(kwargs.items()))
+        block = self.get_block()
+        cached = self._entries.get(key)
+        if cached is not None and 0 <= block - cached[0] < self.refresh_period(netuid):
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        value = getattr(self.subtensor, name)(netuid=netuid, **kwargs)
+        self._entries[key] = (block, value)
+        return value
+
+    def min_allowed_weights(self, netuid: int) -> int:
+        return self.get("min_allowed_weights", netuid)
+
+    def max_weight_limit(self, netuid: int) -> float:
+        return self.get("max_weight_limit", netuid)
+
+    def is_hotkey_registered(self, netuid: int, hotkey_ss58: str) -> bool:
+        return self.get("is_hotkey_registered", netuid, hotkey_ss58=hotkey_ss58)
+
+    def invalidate(self):
+        """Drops every cached value and tempo, the next lookups go to the chain."""
+        self._entries.clear()
+        self._tempo.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
@@ -1,11 +1,24 @@
 import os
 import logging
+import bittensor as bt
 from logging.handlers import RotatingFileHandler
 
 EVENTS_LEVEL_NUM = 38
+TRACE_LEVEL_NUM = 5
 DEFAULT_LOG_BACKUP_COUNT = 10
 
 
+def is_enabled_for(level: int) -> bool:
+    """
+    Returns True if bittensor logging emits records at the given level.
+    Used to skip formatting large messages that would be dropped anyway.
+    """
+    get_level = getattr(bt.logging, "get_level", None)
+    if get_level is None:
+        return True
+    return get_level() <= level
+
+
 def setup_events_logger(full_path, events_retention_size):
     logging.addLevelName(EVENTS_LEVEL_NUM, "EVENT")
 
@@ -0,0 +1,121 @@
+import time
+import bisect
+import threading
+import numpy as np
+import bittensor as bt
+
+from contextlib import nullcontext
+from typing import Dict, List
+
+# Upper bounds of the histogram buckets in seconds: 100µs to 10 minutes, ~20% apart.
+BUCKET_BOUNDS: List[float] = np.geomspace(1e-4, 600.0, 86).tolist()
+
+_DISABLED_STAGE = nullcontext()
+
+
+class StageHistogram:
+    """Fixed-bucket histogram of the wall times of one stage."""
+
+    def __init__(self):
+        # The trailing bucket counts the observations above the last bound.
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns the upper bound of the bucket holding the q-th quantile, which overestimates the
+        true value by at most one bucket width. Observations above the last bound report the maximum.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(np.ceil(q * self.count)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+
+class _Stage:
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics: "StageMetrics", name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._metrics.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class StageMetrics:
+    """
+    Per-stage latency instrumentation of the validator pipeline.
+
+    Wrap a stage in `with metrics.stage("name"):` to record its wall time. Every stage has its own
+    histogram over the lifetime of the neuron, and `log_step` logs the time spent in each stage since
+    the previous step. When disabled, `stage` returns a shared no-op context manager and `record`
+    returns immediately. Stages may be recorded from other threads, e.g. the state writer.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: Dict[str, StageHistogram] = {}
+        self._step_totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = StageHistogram()
+            histogram.record(seconds)
+            self._step_totals[name] = self._step_totals.get(name, 0.0) + seconds
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """Returns the p50/p95/p99 and count of every stage, in seconds."""
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "p50": h.quantile(0.50),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                }
+                for name, h in self.histograms.items()
+            }
+
+    def log_step(self, step: int):
+        """Logs the time spent in each stage since the previous call, then starts a new step."""
+        if not self.enabled:
+            return
+        with self._lock:
+            step_totals, self._step_totals = self._step_totals, {}
+        totals = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in step_totals.items())
+        bt.logging.info(f"[metrics] step({step}) {totals}")
+        bt.logging.debug(
+            "[metrics] " + " ".join(
+                f"{name}(n={p['count']} p50={p['p50'] * 1000:.1f}ms p95={p['p95'] * 1000:.1f}ms p99={p['p99'] * 1000:.1f}ms)"
+                for name, p in self.percentiles().items()
+            )
+        )
@@ -0,0 +1,78 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import itertools
+import numpy as np
+import bittensor as bt
+
+from collections import Counter
+
+_versions = itertools.count(1)
+
+
+class NetworkView:
+    """
+    Array-backed snapshot of the metagraph with precomputed indexes.
+
+    Built once per metagraph sync so the per-step hot paths index arrays instead of walking
+    `metagraph.axons` in Python. Every view gets a new `version`, which lets consumers redo
+    per-UID bookkeeping only when the network actually changed.
+
+    Attributes:
+        n (int): Number of UIDs.
+        axons (list): The metagraph axons, used as dendrite targets.
+        ips, hotkeys, coldkeys (np.ndarray): Axon identity per UID (object arrays of str).
+        ports (np.ndarray): Axon port per UID (object array of int, compared with untrusted payloads).
+        active, validator_permit, serving (np.ndarray): Boolean flags per UID.
+        stake (np.ndarray): Total stake per UID.
+        uid_by_hotkey (dict): Hotkey to UID.
+        ip_counts (dict): Number of active UIDs per ip.
+        active_ip_count (np.ndarray): Number of active UIDs sharing the ip of each UID.
+    """
+
+    def __init__(self, metagraph: "bt.metagraph"):
+        self.version = next(_versions)
+        self.axons = list(metagraph.axons)
+        self.n = len(self.axons)
+
+        self.ips = np.array([axon.ip for axon in self.axons], dtype=object)
+        # Python ints, so comparing them with a list or a dict from a miner gives False, not an array.
+        self.ports = np.array([int(axon.port) for axon in self.axons], dtype=object)
+        self.hotkeys = np.array([axon.hotkey for axon in self.axons], dtype=object)
+        self.coldkeys = np.array([axon.coldkey for axon in self.axons], dtype=object)
+        self.serving = np.array([axon.is_serving for axon in self.axons], dtype=bool)
+
+        self.active = np.asarray(metagraph.active).astype(np.int64)[:self.n] == 1
+        self.validator_permit = np.asarray(metagraph.validator_permit).astype(bool)[:self.n]
+        self.stake = np.asarray(metagraph.S).astype(np.float64)[:self.n]
+
+        self.uid_by_hotkey = {hotkey: uid for uid, hotkey in enumerate(metagraph.hotkeys)}
+        self.ip_counts = dict(Counter(self.ips[self.active].tolist()))
+        self.active_ip_count = np.array(
+            [self.ip_counts.get(ip, 0) for ip in self.ips], dtype=np.int64
+        )
+
+    def available_mask(self, vpermit_tao_limit: int) -> np.ndarray:
+        """
+        Returns a mask of the UIDs that are serving and are not validators above the stake limit.
+        Same rule as neurons.utils.uids.check_uid_availability.
+        """
+        return self.serving & ~(self.validator_permit & (self.stake > vpermit_tao_limit))
+
+    def available_uids(self, vpermit_tao_limit: int) -> np.ndarray:
+        return np.flatnonzero(self.available_mask(vpermit_tao_limit))
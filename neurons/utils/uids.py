@@ -26,6 +26,34 @@ def check_uid_availability(
     return True
 
 
+def get_available_uids(self, exclude: List[int] = None) -> np.ndarray:
+    """Returns all available uids from the metagraph.
+    Args:
+        exclude (List[int]): List of uids to leave out.
+    Returns:
+        uids (np.ndarray): Available uids in ascending order.
+    Notes:
+        Reads the precomputed `network_view` of the neuron when it has one.
+    """
+    view = getattr(self, "network_view", None)
+    if view is not None:
+        uids = view.available_uids(self.config.neuron.vpermit_tao_limit)
+    else:
+        uids = np.array(
+            [
+                uid
+                for uid in range(self.metagraph.n.item())
+                if check_uid_availability(
+                    self.metagraph, uid, self.config.neuron.vpermit_tao_limit
+                )
+            ],
+            dtype=np.int64,
+        )
+    if exclude is not None and len(exclude) > 0:
+        uids = uids[~np.isin(uids, exclude)]
+    return uids
+
+
 def get_random_uids(self, k: int, exclude: List[int] = None) -> np.ndarray:
     """Returns k available random uids from the metagraph.
     Args:
@@ -36,26 +64,19 @@ def get_random_uids(self, k: int, exclude: List[int] = None) -> np.ndarray:
     Notes:
         If `k` is larger than the number of available `uids`, set `k` to the number of available `uids`.
     """
-    candidate_uids = []
-    avail_uids = []
-
-    for uid in range(self.metagraph.n.item()):
-        uid_is_available = check_uid_availability(
-            self.metagraph, uid, self.config.neuron.vpermit_tao_limit
-        )
-        uid_is_not_excluded = exclude is None or uid not in exclude
-
-        if uid_is_available:
-            avail_uids.append(uid)
-            if uid_is_not_excluded:
-                candidate_uids.append(uid)
+    avail_uids = get_available_uids(self)
+    candidate_uids = avail_uids
+    if exclude is not None and len(exclude) > 0:
+        candidate_uids = avail_uids[~np.isin(avail_uids, exclude)]
+    avail_uids, candidate_uids = avail_uids.tolist(), candidate_uids.tolist()
     # If k is larger than the number of available uids, set k to the number of available uids.
     k = min(k, len(avail_uids))
     # Check if candidate_uids contain enough for querying, if not grab all avaliable uids
     available_uids = candidate_uids
     if len(candidate_uids) < k:
+        candidate_set = set(candidate_uids)
         available_uids += random.sample(
-            [uid for uid in avail_uids if uid not in candidate_uids],
+            [uid for uid in avail_uids if uid not in candidate_set],
             k - len(candidate_uids),
         )
     uids = np.array(random.sample(available_uids, k))
@@ -1,8 +1,11 @@
+import logging
 import numpy as np
 from typing import Tuple, List, Union, Any
 import bittensor
 from numpy import ndarray, dtype, floating, complexfloating
 
+from neurons.utils.logging import is_enabled_for
+
 U32_MAX = 4294967295
 U16_MAX = 65535
 
@@ -20,70 +23,68 @@ def normalize_max_weight(x: np.ndarray, limit: float = 0.1) -> np.ndarray:
     """
     epsilon = 1e-7  # For numerical stability after normalization
 
-    weights = x.copy()
-    values = np.sort(weights)
-
     if x.sum() == 0 or len(x) * limit <= 1:
         return np.ones_like(x) / x.size
-    else:
-        estimation = values / values.sum()
-
-        if estimation.max() <= limit:
-            return weights / weights.sum()
-
-        # Find the cumulative sum and sorted array
-        cumsum = np.cumsum(estimation, 0)
-
-        # Determine the index of cutoff
-        estimation_sum = np.array(
-            [(len(values) - i - 1) * estimation[i] for i in range(len(values))]
-        )
-        n_values = (
-            estimation / (estimation_sum + cumsum + epsilon) < limit
-        ).sum()
-
-        # Determine the cutoff based on the index
-        cutoff_scale = (limit * cumsum[n_values - 1] - epsilon) / (
-            1 - (limit * (len(estimation) - n_values))
-        )
-        cutoff = cutoff_scale * values.sum()
 
-        # Applying the cutoff
-        weights[weights > cutoff] = cutoff
+    values = np.sort(x)
+    values_sum = values.sum()
+    estimation = values / values_sum
+
+    # The largest share is the last one of the sorted estimation.
+    if estimation[-1] <= limit:
+        return x / x.sum()
+
+    # Find the cumulative sum and sorted array
+    cumsum = np.cumsum(estimation, 0)
+
+    # Determine the index of cutoff: the mass of the values above each one if they were
+    # clipped to it, plus the mass up to it.
+    estimation_sum = np.arange(len(values) - 1, -1, -1, dtype=estimation.dtype) * estimation
+    # A numpy integer, so the denominator of the cutoff is computed in float64 like the original.
+    # np.count_nonzero returns a Python int on some numpy versions, which keeps float32 there.
+    n_values = (
+        estimation / (estimation_sum + cumsum + epsilon) < limit
+    ).sum()
+
+    # Determine the cutoff based on the index
+    cutoff_scale = (limit * cumsum[n_values - 1] - epsilon) / (
+        1 - (limit * (len(estimation) - n_values))
+    )
+    cutoff = cutoff_scale * values_sum
 
-        y = weights / weights.sum()
+    # Applying the cutoff, in the dtype of x like an assignment would.
+    weights = np.minimum(x, x.dtype.type(cutoff))
 
-        return y
+    return weights / weights.sum()
 
 
 def convert_weights_and_uids_for_emit(
     uids: np.ndarray, weights: np.ndarray
-) -> Tuple[List[int], List[int]]:
-    r"""Converts weights into integer u32 representation that sum to MAX_INT_WEIGHT.
+) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Converts weights into integer u16 representation, max-upscaled so the largest weight is U16_MAX.
     Args:
         uids (:obj:`np.ndarray,`):
             Array of uids as destinations for passed weights.
         weights (:obj:`np.ndarray,`):
             Array of weights.
     Returns:
-        weight_uids (List[int]):
-            Uids as a list.
-        weight_vals (List[int]):
-            Weights as a list.
+        weight_uids (np.ndarray):
+            Uids with a non-zero integer weight.
+        weight_vals (np.ndarray):
+            Integer weights of those uids, int64. Call `.tolist()` where a list is needed.
     """
     # Checks.
     uids = np.asarray(uids)
     weights = np.asarray(weights)
 
-    # Get non-zero weights and corresponding uids
-    non_zero_weights = weights[weights > 0]
-    non_zero_weight_uids = uids[weights > 0]
-
     # Debugging information
-    bittensor.logging.debug(f"weights: {weights}")
-    bittensor.logging.debug(f"non_zero_weights: {non_zero_weights}")
-    bittensor.logging.debug(f"uids: {uids}")
-    bittensor.logging.debug(f"non_zero_weight_uids: {non_zero_weight_uids}")
+    debug = is_enabled_for(logging.DEBUG)
+    if debug:
+        non_zero = weights > 0
+        bittensor.logging.debug(f"weights: {weights}")
+        bittensor.logging.debug(f"non_zero_weights: {weights[non_zero]}")
+        bittensor.logging.debug(f"uids: {uids}")
+        bittensor.logging.debug(f"non_zero_weight_uids: {uids[non_zero]}")
 
     if np.min(weights) < 0:
         raise ValueError(
@@ -103,28 +104,23 @@ def convert_weights_and_uids_for_emit(
         )
     if np.sum(weights) == 0:
         bittensor.logging.debug("nothing to set on chain")
-        return [], []  # Nothing to set on chain.
-    else:
-        max_weight = float(np.max(weights))
-        weights = [
-            float(value) / max_weight for value in weights
-        ]  # max-upscale values (max_weight = 1).
+        return uids[:0], np.zeros(0, dtype=np.int64)  # Nothing to set on chain.
+
+    # max-upscale values (max_weight = 1) in float64, then round half to even like the builtin round.
+    max_weight = float(np.max(weights))
+    scaled = weights.astype(np.float64) / max_weight
+    if debug:
         bittensor.logging.debug(
-            f"setting on chain max: {max_weight} and weights: {weights}"
+            f"setting on chain max: {max_weight} and weights: {scaled}"
         )
-
-    weight_vals = []
-    weight_uids = []
-    for i, (weight_i, uid_i) in enumerate(list(zip(weights, uids))):
-        uint16_val = round(
-            float(weight_i) * int(U16_MAX)
-        )  # convert to int representation.
-
-        # Filter zeros
-        if uint16_val != 0:  # Filter zeros
-            weight_vals.append(uint16_val)
-            weight_uids.append(uid_i)
-    bittensor.logging.debug(f"final params: {weight_uids} : {weight_vals}")
+    uint16_vals = np.rint(scaled * int(U16_MAX)).astype(np.int64)  # convert to int representation.
+
+    # Filter zeros
+    kept = uint16_vals != 0
+    weight_uids = uids[kept]
+    weight_vals = uint16_vals[kept]
+    if debug:
+        bittensor.logging.debug(f"final params: {weight_uids} : {weight_vals}")
     return weight_uids, weight_vals
 
 
@@ -149,78 +145,85 @@ def process_weights_for_netuid(
     tuple[ndarray[Any, dtype[Any]], ndarray],
     tuple[Any, ndarray],
 ]:
-    bittensor.logging.debug("process_weights_for_netuid()")
-    bittensor.logging.debug("weights", weights)
-    bittensor.logging.debug("netuid", netuid)
-    bittensor.logging.debug("subtensor", subtensor)
-    bittensor.logging.debug("metagraph", metagraph)
+    debug = is_enabled_for(logging.DEBUG)
+    if debug:
+        bittensor.logging.debug("process_weights_for_netuid()")
+        bittensor.logging.debug("weights", weights)
+        bittensor.logging.debug("netuid", netuid)
+        bittensor.logging.debug("subtensor", subtensor)
+        bittensor.logging.debug("metagraph", metagraph)
 
     # Get latest metagraph from chain if metagraph is None.
     if metagraph is None:
         metagraph = subtensor.metagraph(netuid)
 
     # Cast weights to floats.
-    if not isinstance(weights, np.ndarray) or weights.dtype != np.float32:
-        weights = weights.astype(np.float32)
+    weights = np.asarray(weights, dtype=np.float32)
+    uids = np.asarray(uids)
 
     # Network configuration parameters from an subtensor.
     # These parameters determine the range of acceptable weights for each neuron.
     quantile = exclude_quantile / U16_MAX
     min_allowed_weights = subtensor.min_allowed_weights(netuid=netuid)
     max_weight_limit = subtensor.max_weight_limit(netuid=netuid)
-    bittensor.logging.debug("quantile", quantile)
-    bittensor.logging.debug("min_allowed_weights", min_allowed_weights)
-    bittensor.logging.debug("max_weight_limit", max_weight_limit)
+    if debug:
+        bittensor.logging.debug("quantile", quantile)
+        bittensor.logging.debug("min_allowed_weights", min_allowed_weights)
+        bittensor.logging.debug("max_weight_limit", max_weight_limit)
 
     # Find all non zero weights.
-    non_zero_weight_idx = np.argwhere(weights > 0).squeeze()
-    non_zero_weight_idx = np.atleast_1d(non_zero_weight_idx)
-    non_zero_weight_uids = uids[non_zero_weight_idx]
+    non_zero_weight_idx = np.flatnonzero(weights > 0)
     non_zero_weights = weights[non_zero_weight_idx]
     if non_zero_weights.size == 0 or metagraph.n < min_allowed_weights:
         bittensor.logging.warning("No non-zero weights returning all ones.")
         final_weights = np.ones(metagraph.n) / metagraph.n
-        bittensor.logging.debug("final_weights", final_weights)
+        if debug:
+            bittensor.logging.debug("final_weights", final_weights)
         return np.arange(len(final_weights)), final_weights
 
     elif non_zero_weights.size < min_allowed_weights:
         bittensor.logging.warning(
             "No non-zero weights less then min allowed weight, returning all ones."
         )
-        weights = (
-            np.ones(metagraph.n) * 1e-5
-        )  # creating minimum even non-zero weights
+        weights = np.full(metagraph.n, 1e-5)  # creating minimum even non-zero weights
         weights[non_zero_weight_idx] += non_zero_weights
-        bittensor.logging.debug("final_weights", weights)
+        if debug:
+            bittensor.logging.debug("final_weights", weights)
         normalized_weights = normalize_max_weight(
             x=weights, limit=max_weight_limit
         )
         return np.arange(len(normalized_weights)), normalized_weights
 
-    bittensor.logging.debug("non_zero_weights", non_zero_weights)
+    non_zero_weight_uids = uids[non_zero_weight_idx]
+    if debug:
+        bittensor.logging.debug("non_zero_weights", non_zero_weights)
 
     # Compute the exclude quantile and find the weights in the lowest quantile
     max_exclude = max(0, len(non_zero_weights) - min_allowed_weights) / len(
         non_zero_weights
     )
     exclude_quantile = min([quantile, max_exclude])
-    lowest_quantile = np.quantile(non_zero_weights, exclude_quantile)
-    bittensor.logging.debug("max_exclude", max_exclude)
-    bittensor.logging.debug("exclude_quantile", exclude_quantile)
-    bittensor.logging.debug("lowest_quantile", lowest_quantile)
-
-    # Exclude all weights below the allowed quantile.
-    non_zero_weight_uids = non_zero_weight_uids[
-        lowest_quantile <= non_zero_weights
-    ]
-    non_zero_weights = non_zero_weights[lowest_quantile <= non_zero_weights]
-    bittensor.logging.debug("non_zero_weight_uids", non_zero_weight_uids)
-    bittensor.logging.debug("non_zero_weights", non_zero_weights)
+    # The 0 quantile is the minimum, which excludes nothing.
+    if exclude_quantile > 0:
+        lowest_quantile = np.quantile(non_zero_weights, exclude_quantile)
+        if debug:
+            bittensor.logging.debug("max_exclude", max_exclude)
+            bittensor.logging.debug("exclude_quantile", exclude_quantile)
+            bittensor.logging.debug("lowest_quantile", lowest_quantile)
+
+        # Exclude all weights below the allowed quantile.
+        kept = lowest_quantile <= non_zero_weights
+        non_zero_weight_uids = non_zero_weight_uids[kept]
+        non_zero_weights = non_zero_weights[kept]
+        if debug:
+            bittensor.logging.debug("non_zero_weight_uids", non_zero_weight_uids)
+            bittensor.logging.debug("non_zero_weights", non_zero_weights)
 
     # Normalize weights and return.
     normalized_weights = normalize_max_weight(
         x=non_zero_weights, limit=max_weight_limit
     )
-    bittensor.logging.debug("final_weights", normalized_weights)
+    if debug:
+        bittensor.logging.debug("final_weights", normalized_weights)
 
     return non_zero_weight_uids, normalized_weights
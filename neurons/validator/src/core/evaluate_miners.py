@@ -16,7 +16,9 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import os
 import time
+import asyncio
 import bittensor as bt
 import numpy as np
 import neurons.validator.src.config.const as conf
@@ -25,9 +27,21 @@ from pathlib import Path
 from typing import List, Dict, Any
 from neurons.base.neuron import BaseNeuron
 from neurons.base.protocol import AIAgentProtocol
-from neurons.utils.uids import get_random_uids
-from neurons.utils.encrypt import generate_nonce, verify, read_public_key
-from collections import defaultdict
+from neurons.utils.uids import get_available_uids
+from neurons.utils.encrypt import generate_nonce, PublicKeyRegistry
+from neurons.validator.src.core.scheduler import StepScheduler
+from neurons.validator.src.core.uid_scheduler import UidScheduler
+from neurons.validator.src.core.verification import AttestationVerifier
+from neurons.validator.src.core.timeouts import MinerTimeouts, process_time_of
+from neurons.validator.src.core.rules import RuleEngine, AttestationContext
+from neurons.validator.src.core.recorder import StepRecorder
+from neurons.validator.src.core.plan import EvaluationPlan
+from neurons.utils.logging import is_enabled_for, TRACE_LEVEL_NUM
+
+# GPU models mapped to rows of the rate table, unknown models map to the trailing zero rate.
+GPU_MODEL_IDS = {model: i for i, model in enumerate(conf.GPU_MODEL_RATES)}
+UNKNOWN_GPU_MODEL_ID = len(GPU_MODEL_IDS)
+GPU_MODEL_RATE_TABLE = np.array(list(conf.GPU_MODEL_RATES.values()) + [0.0], dtype=np.float64)
 
 class EvaluateMiners:
     _validator = None
@@ -37,20 +51,128 @@ class EvaluateMiners:
     def __init__(self, validator:BaseNeuron):
         self._validator = validator
         self.miner_scores = {}
+        self._scheduler = StepScheduler.from_config(validator.config)
+        self._verifier = AttestationVerifier.from_config(validator.config)
+        self._key_registry = PublicKeyRegistry(Path(__file__).resolve().parent.parent / "config")
+        self._key_registry.refresh(force=True)
+        self._uid_scheduler = UidScheduler(n=int(validator.metagraph.n))
+        self._view_version = 0
+        self._timeouts = MinerTimeouts.from_config(validator.config, n=int(validator.metagraph.n))
+        self._rules = RuleEngine(n=int(validator.metagraph.n), profile=validator.metrics.enabled)
+        self._recorder = StepRecorder.from_config(validator.config)
+        self._plan: EvaluationPlan | None = None
 
     async def start(self):
-        miner_uids = get_random_uids(self._validator, k=self._validator.config.neuron.sample_size)
+        metrics = self._validator.metrics
+        wake_at = self._scheduler.next_slot_time(self._validator.block)
+        with metrics.stage("evaluate"):
+            await self._scheduler.run_step(self.evaluate())
+        with metrics.stage("idle"):
+            await self._scheduler.sleep_until(wake_at)
+
+    async def evaluate(self):
+        """
+        Evaluates one partition of the current plan. With `neuron.num_concurrent_forwards` forwards
+        running, each gets a disjoint share of the plan; the forward that finishes last merges
+        every response into the scores.
+        """
+        metrics = self._validator.metrics
+        with metrics.stage("uid_sampling"):
+            plan = self.next_plan()
+            partition = plan.take()
+            miner_uids = plan.uids[partition]
+
+        responses = []
+        try:
+            if len(miner_uids):
+                with metrics.stage("get_server_config"):
+                    responses = await self.query_miners(miner_uids, plan.nonce, plan.view, offset=partition.start)
+        except BaseException:
+            # Leave the partition out, the other forwards may still complete the plan.
+            if plan.complete(partition, None):
+                self.merge(plan)
+            raise
+
+        if plan.complete(partition, responses):
+            self.merge(plan)
+
+    def next_plan(self) -> EvaluationPlan:
+        """Returns the plan with partitions left to evaluate, sampling a new one when it is used up."""
+        if self._plan is not None and not self._plan.exhausted:
+            return self._plan
+
+        view = self._validator.network_view
+        if view.version != self._view_version:
+            replaced = self._uid_scheduler.sync_hotkeys(view.hotkeys)
+            self._timeouts.reset(replaced)
+            self._rules.reset(replaced)
+            self._view_version = view.version
+
+        partitions = max(1, self._validator.config.neuron.num_concurrent_forwards)
+        miner_uids = self._uid_scheduler.next_uids(
+            get_available_uids(self._validator), k=self._validator.config.neuron.sample_size * partitions
+        )
+        self._plan = EvaluationPlan(miner_uids, partitions, generate_nonce(), view)
+        self.begin_step(self._plan.uids, self._plan.nonce, view)
+        return self._plan
+
+    def merge(self, plan: EvaluationPlan):
+        """Rewards the completed partitions of a plan and updates the scores once for all of them."""
+        metrics = self._validator.metrics
+        bt.logging.info(f"[evaluate_miners][forward] {self._rules.step_summary()}")
 
-        responses = await self.get_server_config(miner_uids)
+        miner_uids, responses = plan.result()
+        if len(miner_uids) == 0:
+            bt.logging.warning("[evaluate_miners][forward] no partition of the step completed, scores are not updated")
+            return
+        self._uid_scheduler.observe(miner_uids, responses)
 
-        rewards = self.get_rewards(responses=responses)
+        with metrics.stage("rewards"):
+            rewards = self.get_rewards(responses=responses)
 
         bt.logging.info(f"[evaluate_miners][forward] Scored responses: miner_uids:{miner_uids} rewards:{rewards}")
-        self._validator.update_scores(rewards, miner_uids)
-        time.sleep(120)
+        with metrics.stage("update_scores"):
+            self._validator.update_scores(rewards, miner_uids)
+
+        if self._recorder is not None:
+            # Missing responses score 0, so the rewards of the whole plan match a replay.
+            plan_rewards = np.zeros(len(plan.uids), dtype=np.float64)
+            plan_rewards[plan.completed] = rewards
+            self._recorder.end(self._validator.step, self._validator.block, plan_rewards)
+
+    def state_files(self, path: str) -> Dict[str, Dict[str, np.ndarray]]:
+        """Copies of the evaluation state, by the file next to the validator state in `path` they are written to."""
+        return {
+            os.path.join(path, "uid_scheduler.npz"): self._uid_scheduler.state(),
+            os.path.join(path, "miner_timeouts.npz"): self._timeouts.state(),
+        }
 
-    async def get_server_config(self, miner_uids:np.ndarray):
-        nonce = generate_nonce()
+    def load_state(self, path: str):
+        """Loads the evaluation state written from state_files."""
+        self._uid_scheduler.load(os.path.join(path, "uid_scheduler.npz"))
+        self._timeouts.load(os.path.join(path, "miner_timeouts.npz"))
+
+    async def get_server_config(self, miner_uids:np.ndarray, nonce: str | None = None):
+        nonce = nonce or generate_nonce()
+        view = self._validator.network_view
+        self.begin_step(miner_uids, nonce, view)
+        valid_results = await self.query_miners(miner_uids, nonce, view)
+        bt.logging.info(f"[evaluate_miners][forward] {self._rules.step_summary()}")
+        return valid_results
+
+    def begin_step(self, miner_uids: np.ndarray, nonce: str, view):
+        """Starts the rejection counters and the recording of a step over `miner_uids`."""
+        self._key_registry.refresh()
+        self._rules.begin_step()
+        if self._recorder is not None:
+            self._recorder.begin(nonce, miner_uids, view)
+
+    async def query_miners(self, miner_uids: np.ndarray, nonce: str, view, offset: int = 0):
+        """
+        Queries `miner_uids` with a config request under `nonce` and validates their attestations.
+        `offset` is the position of `miner_uids` within the step, for the recorder.
+        Returns the valid results, None for every miner that failed validation.
+        """
         synapse = {
             'url': 'http://127.0.0.1:8000/v1/agent/miner',
             'method': 'config',
@@ -60,165 +182,238 @@ class EvaluateMiners:
         }
         bt.logging.trace(f"[evaluate_miners][forward] start miner uids:{miner_uids} synapse:{synapse}")
 
-        mg = [self._validator.metagraph.axons[uid] for uid in miner_uids]
-
-        active_ip_count = defaultdict(int)
-        for uid, axon in enumerate(self._validator.metagraph.axons):
-            if self._validator.metagraph.active[uid] == 1:
-                ip = axon.ip
-                active_ip_count[ip] += 1
-        active_ip_count = dict(active_ip_count)
-
-        responses = await self._validator.dendrite(
-            axons=mg,
-            synapse=AIAgentProtocol(input=synapse),
-            deserialize=True,
-        )
-        bt.logging.trace(f"[evaluate_miners][forward] received synapse: {synapse} responses: {responses}")
-
-        valid_results = []
-        now_ts = int(time.time() * 1000)
-        pub_key_path = Path(__file__).resolve().parent.parent / "config" / "public.key"
-        pub_key = read_public_key(pub_key_path)
-
-        for i, res in enumerate(responses):
-            if res == None:
-                bt.logging.trace(f"[evaluate_miners][forward] res is None")
-                valid_results.append(None)
-                continue
-
-            if not res.get("status", False):
-                bt.logging.trace(f"[evaluate_miners][forward] param error: status")
-                valid_results.append(None)
-                continue
-
-            if i >= len(mg) or mg[i] is None:
-                bt.logging.trace(f"[evaluate_miners][forward] {i} not in metagraph:{mg}")
-                valid_results.append(None)
-                continue
-
-            m = mg[i]
-            data = res.get("data", {})
-
-            if active_ip_count.get(m.ip, 0) > 1:
-                bt.logging.trace(f"[evaluate_miners][forward] ip count={active_ip_count.get(m.ip)} > 1")
-                valid_results.append(None)
-                continue
-
-            if data.get("ip") != m.ip:
-                bt.logging.trace(f"[evaluate_miners][forward] ip error")
-                valid_results.append(None)
-                continue
-
-            if data.get("port") != m.port:
-                bt.logging.trace(f"[evaluate_miners][forward] port error")
-                valid_results.append(None)
-                continue
-
-            if data.get("coldkey") != m.coldkey:
-                bt.logging.trace(f"[evaluate_miners][forward] coldkey error")
-                valid_results.append(None)
-                continue
-
-            if data.get("hotkey") != m.hotkey:
-                bt.logging.trace(f"[evaluate_miners][forward] hotkey error")
-                valid_results.append(None)
-                continue
+        mg = [view.axons[uid] for uid in miner_uids]
+        timeouts = self._timeouts.timeouts(miner_uids)
+
+        metrics = self._validator.metrics
+
+        if self._validator.config.neuron.batch_responses:
+            # A single call waits for its slowest axon, so it gets the largest of the timeouts.
+            with metrics.stage("dendrite"):
+                synapses = await self._validator.dendrite(
+                    axons=mg,
+                    synapse=AIAgentProtocol(input=synapse),
+                    deserialize=False,
+                    timeout=float(timeouts.max()) if len(timeouts) else self._timeouts.ceiling,
+                )
+            responses = [s.deserialize() for s in synapses]
+            process_times = np.array([process_time_of(s) for s in synapses], dtype=np.float64)
+            bt.logging.trace(f"[evaluate_miners][forward] received synapse: {synapse} responses: {responses}")
+
+            now_ts = self.now_ms()
+            with metrics.stage("validation"):
+                attestations = [
+                    self.validate_response(i, res, miner_uids, view, nonce, now_ts, offset)
+                    for i, res in enumerate(responses)
+                ]
+            indices = [i for i, data in enumerate(attestations) if data is not None]
+            verifications = [self.verify_attestations(attestations, indices)]
+        else:
+            # Responses are validated as they arrive, so this includes the validation stage.
+            with metrics.stage("dendrite"):
+                attestations, verifications, process_times = await self.stream_responses(
+                    miner_uids, view, mg, synapse, nonce, timeouts, offset
+                )
+
+        self._timeouts.observe(miner_uids, process_times, timeouts)
+
+        valid_results = [None] * len(attestations)
+        for indices, verified in await asyncio.gather(*verifications):
+            for i, ok in zip(indices, verified):
+                if not ok:
+                    self._rules.reject(int(miner_uids[i]), "signature")
+                    continue
+
+                data = attestations[i]
+                valid_results[i] = {
+                    "containers": data.get("containers", []),
+                    "gpu": data.get("gpu", []),
+                    "ip": data.get("ip")
+                }
 
-            if data.get("nonce") != nonce:
-                bt.logging.trace(f"[evaluate_miners][forward] param error: nonce")
-                valid_results.append(None)
-                continue
-
-            signature = data.get("signature")
-            if not signature:
-                bt.logging.trace(f"[evaluate_miners][forward] param error: signature")
-                valid_results.append(None)
-                continue
+        bt.logging.info(f"[evaluate_miners][forward] valid results: {valid_results}")
 
-            if not verify(data, signature, pub_key):
-                bt.logging.trace(f"[evaluate_miners][forward] param error: verify signature")
-                valid_results.append(None)
-                continue
+        return valid_results
 
-            ts = data.get("timestamp", 0)
-            if now_ts - ts > 10_000:
-                bt.logging.trace(f"[evaluate_miners][forward] param error: timestamp")
-                valid_results.append(None)
+    async def stream_responses(self, miner_uids, view, mg, synapse, nonce, timeouts, offset=0):
+        """
+        Queries every axon separately, with its own timeout, and validates each response as soon
+        as it arrives.
+
+        The freshness check uses the receive time of each individual response, so fast miners are
+        not penalised by a straggler in the same batch. Attestations that pass the cheap checks are
+        handed to the verification stage in batches of `neuron.verify_batch_size` while the
+        remaining miners are still answering.
+
+        Returns:
+            The attestations in the order of `mg`, the pending verification tasks and the process
+            time of each axon.
+        """
+        async def query(i, axon):
+            synapses = await self._validator.dendrite(
+                axons=[axon],
+                synapse=AIAgentProtocol(input=synapse),
+                deserialize=False,
+                timeout=float(timeouts[i]),
+            )
+            process_times[i] = process_time_of(synapses[0])
+            return i, synapses[0].deserialize(), self.now_ms()
+
+        batch_size = max(1, self._validator.config.neuron.verify_batch_size)
+        attestations = [None] * len(mg)
+        process_times = np.full(len(mg), np.nan, dtype=np.float64)
+        verifications = []
+        pending = []
+        for next_response in asyncio.as_completed([query(i, axon) for i, axon in enumerate(mg)]):
+            i, res, now_ts = await next_response
+            bt.logging.trace(f"[evaluate_miners][forward] received uid index: {i} response: {res}")
+            with self._validator.metrics.stage("validation"):
+                attestations[i] = self.validate_response(i, res, miner_uids, view, nonce, now_ts, offset)
+            if attestations[i] is None:
                 continue
 
-            valid_results.append({
-                "containers": data.get("containers", []),
-                "gpu": data.get("gpu", []),
-                "ip": data.get("ip")
-            })
-
-        bt.logging.info(f"[evaluate_miners][forward] valid results: {valid_results}")
-
-        return valid_results
+            pending.append(i)
+            if len(pending) >= batch_size:
+                verifications.append(asyncio.ensure_future(
+                    self.verify_attestations(attestations, pending)
+                ))
+                pending = []
+
+        if pending:
+            verifications.append(self.verify_attestations(attestations, pending))
+
+        return attestations, verifications, process_times
+
+    def now_ms(self) -> int:
+        """Receive time of a response in ms, replaced by the recorded time when replaying."""
+        return int(time.time() * 1000)
+
+    async def verify_attestations(self, attestations, indices):
+        """Verifies the signatures of the attestations at `indices`, returns the indices with their results."""
+        start = time.perf_counter()
+        with self._validator.metrics.stage("verification"):
+            verified = await self._verifier.verify_batch([attestations[i] for i in indices], self._key_registry)
+        self._rules.record("signature", len(indices), time.perf_counter() - start)
+        return indices, verified
+
+    def validate_response(self, i, res, miner_uids, view, nonce, now_ts, offset=0) -> Dict[str, Any] | None:
+        """
+        Runs the inline attestation rules on the i-th response, against the axon of `miner_uids[i]`
+        in the network view. `offset` is the position of `miner_uids` within the step.
+        Returns the attestation payload awaiting signature verification, or None if a rule failed.
+        """
+        if self._recorder is not None:
+            self._recorder.observe(offset + i, res, now_ts)
+
+        context = AttestationContext(int(miner_uids[i]), res, view, nonce, now_ts)
+        if not self._rules.evaluate(context):
+            return None
+        return context.data
 
     def get_rewards(
             self,
             responses: List[Dict[str, Any] | None],
     ) -> np.ndarray:
-        # Precompute totals for normalization
-        total_gpus = sum(len(r["gpu"]) for r in responses if r is not None)
-        total_uptime = sum(
-            sum(c["uptime"] for c in r["containers"] if c["status"] == 1)
-            for r in responses if r is not None
+        columns = self.reward_columns(responses)
+        valid = columns["valid"]
+        gpu_counts = columns["gpu_counts"]
+        uptime_sums = columns["uptime_sums"]
+        uptime_counts = columns["uptime_counts"]
+        gpu_weights = columns["gpu_weights"]
+
+        # Precompute totals for normalization. cumsum adds in order like the builtin sum did up to
+        # Python 3.11, so the totals are bit-identical to a Python loop there; from 3.12 the builtin
+        # sum of floats is compensated and may differ in the last bits.
+        total_gpus = int(gpu_counts.sum())
+        total_uptime = np.cumsum(uptime_sums)[-1] if len(uptime_sums) else 0.0
+
+        avg_uptimes = np.divide(
+            uptime_sums, uptime_counts,
+            out=np.zeros_like(uptime_sums), where=uptime_counts > 0,
         )
-
-        valid_avg_list = []
-        for r in responses:
-            if r is None:
-                continue
-            uptimes = [c["uptime"] for c in r["containers"] if c["status"] == 1]
-            if uptimes:
-                avg_container_uptime = sum(uptimes) / len(uptimes)
-                if avg_container_uptime > conf.POD_RUN_TIME_AVG_DAY:
-                    valid_avg_list.append(r)
-        total_long_run = len(valid_avg_list)
-
-        scores = []
-        for i, r in enumerate(responses):
-            if r is None:
-                scores.append(0.0)
-                continue
-
-            # Score A: GPU count normalized
-            score_a = len(r["gpu"]) / total_gpus if total_gpus > 0 else 0
-
-            # Score B: containers uptime
-            score_b = sum(c["uptime"] for c in r["containers"] if c["status"] == 1)
-            score_b = score_b / total_uptime if total_uptime > 0 else 0
-
-            # Score C: average uptime bonus > 7 days (~604800s)
-            score_c = 0.0
-            valid_uptimes = [c["uptime"] for c in r["containers"] if c["status"] == 1]
-            if valid_uptimes:
-                avg_container_uptime = sum(valid_uptimes) / len(valid_uptimes)
-                if avg_container_uptime > conf.POD_RUN_TIME_AVG_DAY and total_long_run > 0:
-                    score_c = 1 / total_long_run
-
-            # GPU rarity weighting
-            gpu_weight = sum(conf.GPU_MODEL_RATES.get(g.get("model"), 0) for g in r["gpu"])
-
-            total_score = (conf.GPU_CORES_SCORE * score_a + conf.POD_RUN_TIME_SCORE * score_b + conf.POD_RUN_TIME_AVG_SCORE * score_c) * (1 + gpu_weight)
-            scores.append(total_score)
-
-            bt.logging.trace(
-                f"[evaluate_miners][get_rewards][{i}] "
-                f"formula: ({conf.GPU_CORES_SCORE}*{score_a:.6f} + "
-                f"{conf.POD_RUN_TIME_SCORE}*{score_b:.6f} + "
-                f"{conf.POD_RUN_TIME_AVG_SCORE}*{score_c:.6f}) * (1 + {gpu_weight:.6f}) "
-                f"= {total_score:.6f}"
-            )
-
-        scores_result = np.array(scores)
+        long_run = valid & (uptime_counts > 0) & (avg_uptimes > conf.POD_RUN_TIME_AVG_DAY)
+        total_long_run = int(long_run.sum())
+
+        # Score A: GPU count normalized
+        score_a = gpu_counts / total_gpus if total_gpus > 0 else np.zeros(len(responses))
+
+        # Score B: containers uptime
+        score_b = uptime_sums / total_uptime if total_uptime > 0 else np.zeros(len(responses))
+
+        # Score C: average uptime bonus > 7 days (~604800s)
+        score_c = np.where(long_run, 1 / total_long_run if total_long_run > 0 else 0.0, 0.0)
+
+        # GPU rarity weighting
+        scores_result = (
+            conf.GPU_CORES_SCORE * score_a
+            + conf.POD_RUN_TIME_SCORE * score_b
+            + conf.POD_RUN_TIME_AVG_SCORE * score_c
+        ) * (1 + gpu_weights)
+        scores_result[~valid] = 0.0
+
+        if is_enabled_for(TRACE_LEVEL_NUM):
+            for i in np.flatnonzero(valid):
+                bt.logging.trace(
+                    f"[evaluate_miners][get_rewards][{i}] "
+                    f"formula: ({conf.GPU_CORES_SCORE}*{score_a[i]:.6f} + "
+                    f"{conf.POD_RUN_TIME_SCORE}*{score_b[i]:.6f} + "
+                    f"{conf.POD_RUN_TIME_AVG_SCORE}*{score_c[i]:.6f}) * (1 + {gpu_weights[i]:.6f}) "
+                    f"= {scores_result[i]:.6f}"
+                )
 
         # Normalize scores so that sum = 1
         total_sum = np.sum(scores_result)
         if total_sum > 0:
             scores_result = scores_result / total_sum
 
-        return scores_result
\ No newline at end of file
+        return scores_result
+
+    def reward_columns(self, responses: List[Dict[str, Any] | None]) -> Dict[str, np.ndarray]:
+        """
+        Converts the valid responses into columnar arrays, one entry per response:
+        - valid: whether the response passed validation
+        - gpu_counts: number of reported GPUs
+        - uptime_sums / uptime_counts: sum and count of the uptimes of running containers
+        - gpu_weights: sum of the GPU_MODEL_RATES of the reported GPU models
+        """
+        n = len(responses)
+        valid = np.zeros(n, dtype=bool)
+        gpu_counts = np.zeros(n, dtype=np.int64)
+        uptime_counts = np.zeros(n, dtype=np.int64)
+        uptimes, gpu_model_ids = [], []
+
+        for i, r in enumerate(responses):
+            if r is None:
+                continue
+            valid[i] = True
+
+            gpus = r["gpu"]
+            gpu_counts[i] = len(gpus)
+            gpu_model_ids.extend([GPU_MODEL_IDS.get(g.get("model"), UNKNOWN_GPU_MODEL_ID) for g in gpus])
+
+            running = [c["uptime"] for c in r["containers"] if c["status"] == 1]
+            uptime_counts[i] = len(running)
+            uptimes.extend(running)
+
+        # Values were appended miner by miner, so the owner of each value is a repeat of its index.
+        # bincount accumulates every bin in input order, matching the builtin sum up to Python 3.11.
+        # It returns integers for empty input, hence the casts.
+        index = np.arange(n)
+        uptime_sums = np.bincount(
+            np.repeat(index, uptime_counts),
+            weights=np.asarray(uptimes, dtype=np.float64),
+            minlength=n,
+        ).astype(np.float64, copy=False)
+        gpu_weights = np.bincount(
+            np.repeat(index, gpu_counts),
+            weights=GPU_MODEL_RATE_TABLE[np.asarray(gpu_model_ids, dtype=np.int64)],
+            minlength=n,
+        ).astype(np.float64, copy=False)
+
+        return {
+            "valid": valid,
+            "gpu_counts": gpu_counts,
+            "uptime_sums": uptime_sums,
+            "uptime_counts": uptime_counts,
+            "gpu_weights": gpu_weights,
+        }
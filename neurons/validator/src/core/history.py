@@ -0,0 +1,150 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import numpy as np
+
+
+class RewardHistory:
+    """
+    Bounded history of the last `window` rewards of every UID, with windowed aggregates.
+
+    Rewards and the blocks they were given at live in preallocated (n, window) ring buffers,
+    written in place for all the UIDs of a step at once. Running sums per UID keep `count`,
+    `mean`, `variance` and `last` O(1); the sums of a row are recomputed from the buffer every time
+    its ring wraps, so float error cannot build up. `trimmed_mean` and `trend` need the whole
+    window and are O(window), vectorized across UIDs. The history is kept in memory only.
+    """
+
+    def __init__(self, n: int = 0, window: int = 64):
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+        self.window = window
+        self.rewards = np.zeros((0, window), dtype=np.float32)
+        self.blocks = np.zeros((0, window), dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.head = np.zeros(0, dtype=np.int64)
+        self._sum = np.zeros(0, dtype=np.float64)
+        self._sum_sq = np.zeros(0, dtype=np.float64)
+        self.resize(n)
+
+    @property
+    def n(self) -> int:
+        return len(self.count)
+
+    def resize(self, n: int):
+        """Grows the buffers to n UIDs, new UIDs start with an empty history."""
+        extra = n - self.n
+        if extra <= 0:
+            return
+        self.rewards = np.concatenate([self.rewards, np.zeros((extra, self.window), dtype=np.float32)])
+        self.blocks = np.concatenate([self.blocks, np.zeros((extra, self.window), dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.head = np.concatenate([self.head, np.zeros(extra, dtype=np.int64)])
+        self._sum = np.concatenate([self._sum, np.zeros(extra, dtype=np.float64)])
+        self._sum_sq = np.concatenate([self._sum_sq, np.zeros(extra, dtype=np.float64)])
+
+    def clear(self, uids: np.ndarray):
+        """Forgets the history of the given UIDs, e.g. after their hotkey was replaced."""
+        self.rewards[uids] = 0
+        self.blocks[uids] = 0
+        self.count[uids] = 0
+        self.head[uids] = 0
+        self._sum[uids] = 0
+        self._sum_sq[uids] = 0
+
+    def record(self, uids: np.ndarray, rewards: np.ndarray, block: int):
+        """Appends the rewards of one step, assumes uids are mutually exclusive."""
+        uids = np.asarray(uids, dtype=np.int64)
+        if len(uids) == 0:
+            return
+        self.resize(int(uids.max()) + 1)
+        rewards = np.asarray(rewards, dtype=np.float32)
+        head = self.head[uids]
+
+        # Drop the evicted rewards of full rows from the running sums.
+        evicted = np.where(self.count[uids] == self.window, self.rewards[uids, head], 0).astype(np.float64)
+        added = rewards.astype(np.float64)
+        self._sum[uids] += added - evicted
+        self._sum_sq[uids] += added ** 2 - evicted ** 2
+
+        self.rewards[uids, head] = rewards
+        self.blocks[uids, head] = block
+        self.count[uids] = np.minimum(self.count[uids] + 1, self.window)
+        self.head[uids] = (head + 1) % self.window
+
+        wrapped = uids[self.head[uids] == 0]
+        if len(wrapped):
+            window = self.rewards[wrapped].astype(np.float64)
+            self._sum[wrapped] = window.sum(axis=1)
+            self._sum_sq[wrapped] = (window ** 2).sum(axis=1)
+
+    def _select(self, uids) -> np.ndarray:
+        return np.arange(self.n) if uids is None else np.asarray(uids, dtype=np.int64)
+
+    def mean(self, uids: np.ndarray = None) -> np.ndarray:
+        """Mean reward over the window, 0 for UIDs without history."""
+        uids = self._select(uids)
+        count = self.count[uids]
+        return np.divide(self._sum[uids], count, out=np.zeros(len(uids)), where=count > 0)
+
+    def variance(self, uids: np.ndarray = None) -> np.ndarray:
+        """Population variance of the rewards over the window, 0 for UIDs without history."""
+        uids = self._select(uids)
+        count = self.count[uids]
+        mean = self.mean(uids)
+        mean_sq = np.divide(self._sum_sq[uids], count, out=np.zeros(len(uids)), where=count > 0)
+        return np.maximum(mean_sq - mean ** 2, 0.0)
+
+    def last(self, uids: np.ndarray = None) -> np.ndarray:
+        """The most recent reward, 0 for UIDs without history."""
+        uids = self._select(uids)
+        return np.where(self.count[uids] > 0, self.rewards[uids, (self.head[uids] - 1) % self.window], 0.0)
+
+    def _valid(self, uids: np.ndarray) -> np.ndarray:
+        """Mask of the filled slots of each row; a row fills from slot 0 until it wraps."""
+        return np.arange(self.window)[None, :] < self.count[uids][:, None]
+
+    def trimmed_mean(self, uids: np.ndarray = None, trim: float = 0.1) -> np.ndarray:
+        """Mean reward over the window without the lowest and highest `trim` fraction of rewards."""
+        uids = self._select(uids)
+        count = self.count[uids]
+        # Empty slots sort last, the kept slots of each row are [cut, count - cut).
+        window = np.where(self._valid(uids), self.rewards[uids], np.inf)
+        window = np.sort(window, axis=1)
+        cut = np.floor(count * trim).astype(np.int64)
+        positions = np.arange(self.window)[None, :]
+        kept = (positions >= cut[:, None]) & (positions < (count - cut)[:, None])
+        total = np.where(kept, window, 0.0).sum(axis=1)
+        kept_count = kept.sum(axis=1)
+        return np.divide(total, kept_count, out=np.zeros(len(uids)), where=kept_count > 0)
+
+    def trend(self, uids: np.ndarray = None) -> np.ndarray:
+        """Least-squares slope of reward per block over the window, 0 with fewer than two blocks."""
+        uids = self._select(uids)
+        valid = self._valid(uids)
+        count = valid.sum(axis=1)
+        rewards = np.where(valid, self.rewards[uids], 0.0)
+        # Center the blocks per row so the products stay small.
+        blocks = self.blocks[uids].astype(np.float64)
+        block_mean = np.divide(np.where(valid, blocks, 0.0).sum(axis=1), count, out=np.zeros(len(uids)), where=count > 0)
+        centered = np.where(valid, blocks - block_mean[:, None], 0.0)
+        reward_mean = np.divide(rewards.sum(axis=1), count, out=np.zeros(len(uids)), where=count > 0)
+        covariance = (centered * np.where(valid, rewards - reward_mean[:, None], 0.0)).sum(axis=1)
+        spread = (centered ** 2).sum(axis=1)
+        return np.divide(covariance, spread, out=np.zeros(len(uids)), where=spread > 0)
@@ -0,0 +1,250 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import zlib
+import struct
+import numpy as np
+import bittensor as bt
+
+from typing import Iterator, List, Tuple
+
+from neurons.validator.src.core.state_file import STATE_FILE, StateFile, ValidatorState, hotkey_hash
+
+LEGACY_STATE_FILE = "state.npz"
+JOURNAL_FILE = "scores.journal"
+
+# magic, seq, step, block, alpha, count, crc32 of the rest of the header and the payload.
+_RECORD = struct.Struct("<4sQqqdII")
+_MAGIC = b"SJ01"
+
+
+def apply_rewards(scores: np.ndarray, uids: np.ndarray, rewards: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    The exponential moving average update of BaseValidatorNeuron.update_scores, shared with journal
+    replay. Updates `scores` in place and returns it: every score decays by (1 - alpha), then
+    alpha * reward is added at `uids`. Gives the same values, bit for bit, as
+    alpha * scattered_rewards + (1 - alpha) * scores without the full-size temporaries.
+    """
+    np.multiply(scores, 1 - alpha, out=scores)
+    scores[uids] += np.multiply(rewards.astype(scores.dtype, copy=False), alpha, dtype=scores.dtype)
+    return scores
+
+
+def apply_record(state: ValidatorState, uids: np.ndarray, rewards: np.ndarray, alpha: float, block: int):
+    """Applies one score update to the state and its per-uid metadata."""
+    apply_rewards(state.scores, uids, rewards, alpha)
+    state.last_block[uids] = block
+    state.last_reward[uids] = rewards
+
+
+def load_legacy_state(path: str) -> ValidatorState:
+    """Reads the state.npz archive written by earlier versions."""
+    state = np.load(path)
+    scores = np.asarray(state["scores"], dtype=np.float32)
+    legacy = ValidatorState.empty(len(scores), step=int(state["step"]))
+    legacy.scores = scores
+    hotkeys = state["hotkeys"][:len(scores)]
+    legacy.hotkey_hash[:len(hotkeys)] = hotkey_hash(hotkeys)
+    return legacy
+
+
+def read_records(path: str) -> Tuple[list, int]:
+    """
+    Reads the intact records of a journal segment.
+    Returns the (seq, step, block, alpha, uids, rewards) records and the size of the intact prefix.
+    """
+    with open(path, "rb") as f:
+        buffer = f.read()
+    records = []
+    offset = 0
+    while offset + _RECORD.size <= len(buffer):
+        magic, seq, step, block, alpha, count, crc = _RECORD.unpack_from(buffer, offset)
+        end = offset + _RECORD.size + 16 * count
+        if magic != _MAGIC or end > len(buffer):
+            break
+        payload = buffer[offset + _RECORD.size:end]
+        if zlib.crc32(buffer[offset:offset + _RECORD.size - 4] + payload) != crc:
+            break
+        uids = np.frombuffer(payload, dtype=np.int64, count=count)
+        rewards = np.frombuffer(payload, dtype=np.float64, offset=8 * count, count=count)
+        records.append((seq, step, block, alpha, uids, rewards))
+        offset = end
+    return records, offset
+
+
+class ScoreJournal:
+    """
+    Write-ahead journal of score updates with periodic compacted snapshots.
+
+    Every update_scores call appends a checksummed record (uids, rewards, alpha, step, block) to
+    `scores.journal`. Every `compact_steps` steps, or once the journal exceeds `compact_bytes`, the
+    journal is rotated: the current segment is closed as `scores.journal.<last seq>` and a snapshot
+    of the state, tagged with that sequence number, is saved to the `state.bin` state file.
+    Once the snapshot is saved, possibly on a background thread, the closed segments it covers are
+    deleted. Loading reads the snapshot and replays the newer records of every segment, so replay
+    is bounded by the compaction thresholds. A torn record at the end of a segment, from a crash
+    mid-append, is cut off.
+
+    Records are flushed to the OS on every append, which survives a crash of the process. They are
+    fsynced when their segment is rotated, or on every append with `fsync` set, which also survives
+    a crash of the host at the cost of a disk sync per update.
+    """
+
+    def __init__(self, directory: str, compact_steps: int = 100, compact_bytes: int = 4 * 1024 * 1024, fsync: bool = False):
+        self.directory = directory
+        self.state_file = StateFile(os.path.join(directory, STATE_FILE))
+        self.legacy_path = os.path.join(directory, LEGACY_STATE_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.compact_steps = compact_steps
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.snapshot_step = 0
+        self._file = None
+
+    @classmethod
+    def from_config(cls, config: "bt.Config") -> "ScoreJournal":
+        return cls(
+            config.neuron.full_path,
+            compact_steps=config.neuron.journal_compact_steps,
+            compact_bytes=config.neuron.journal_compact_bytes,
+            fsync=config.neuron.journal_fsync,
+        )
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.journal_path, "ab")
+        return self._file
+
+    def append(self, step: int, block: int, uids: np.ndarray, rewards: np.ndarray, alpha: float):
+        """Appends the record of one update_scores call."""
+        uids = np.ascontiguousarray(uids, dtype=np.int64)
+        rewards = np.ascontiguousarray(rewards, dtype=np.float64)
+        self.seq += 1
+        payload = uids.tobytes() + rewards.tobytes()
+        head = _RECORD.pack(_MAGIC, self.seq, int(step), int(block), float(alpha), len(uids), 0)
+        crc = zlib.crc32(head[:-4] + payload)
+        f = self._open()
+        f.write(head[:-4] + struct.pack("<I", crc) + payload)
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def closed_segments(self) -> List[Tuple[int, str]]:
+        """Returns the (last seq, path) of every rotated segment, oldest first."""
+        prefix = JOURNAL_FILE + "."
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                segments.append((int(name[len(prefix):]), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def records(self) -> Iterator[Tuple[int, int, int, float, np.ndarray, np.ndarray]]:
+        """Yields (seq, step, block, alpha, uids, rewards) for every intact record, cutting off torn tails."""
+        paths = [path for _, path in self.closed_segments()]
+        if os.path.exists(self.journal_path):
+            paths.append(self.journal_path)
+        for path in paths:
+            records, valid_bytes = read_records(path)
+            if os.path.getsize(path) > valid_bytes:
+                bt.logging.warning(f"[journal] dropping {os.path.getsize(path) - valid_bytes} bytes of torn records from {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(valid_bytes)
+            yield from records
+
+    def load(self, hotkeys: List[str] | None = None) -> ValidatorState | None:
+        """
+        Recovers the last consistent state: the snapshot plus the journal records after it.
+        Records are only journaled with hotkeys implied by the snapshot, so without one the replayed
+        scores are attributed to `hotkeys`, those of the current metagraph. Returns None if nothing
+        was saved yet.
+        """
+        self.close()
+        state = self.state_file.load()
+        if state is None and os.path.exists(self.legacy_path):
+            bt.logging.info(f"[journal] migrating {self.legacy_path}")
+            state = load_legacy_state(self.legacy_path)
+        self.snapshot_seq = state.journal_seq if state is not None else 0
+        self.snapshot_step = state.step if state is not None else 0
+
+        replayed = 0
+        self.seq = self.snapshot_seq
+        for seq, record_step, block, alpha, uids, rewards in self.records():
+            self.seq = max(self.seq, seq)
+            if seq <= self.snapshot_seq:
+                continue
+            if state is None:
+                hotkeys = hotkeys or []
+                state = ValidatorState.empty(max(len(hotkeys), int(uids.max()) + 1 if len(uids) else 0))
+                state.hotkey_hash[:len(hotkeys)] = hotkey_hash(hotkeys)
+            if len(uids) and uids.max() >= state.n:
+                bt.logging.warning(f"[journal] record {seq} references uid {uids.max()} beyond {state.n} scores, skipping it")
+                continue
+            apply_record(state, uids, rewards, alpha, block)
+            state.step = max(state.step, record_step)
+            replayed += 1
+
+        bt.logging.info(f"[journal] loaded snapshot at step {self.snapshot_step} and replayed {replayed} records")
+        if state is not None:
+            state.journal_seq = self.seq
+        return state
+
+    def should_compact(self, step: int) -> bool:
+        journal_bytes = self._file.tell() if self._file is not None else 0
+        return (
+            step - self.snapshot_step >= self.compact_steps
+            or journal_bytes >= self.compact_bytes
+            or not os.path.exists(self.state_file.path)
+        )
+
+    def rotate(self, state: ValidatorState) -> ValidatorState:
+        """
+        Closes the current segment and tags `state` with the last record it covers.
+        The state is then saved with `write_snapshot`, on this thread or another one.
+        """
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            os.replace(self.journal_path, f"{self.journal_path}.{self.seq}")
+        state.journal_seq = self.seq
+        self.snapshot_step = state.step
+        return state
+
+    def write_snapshot(self, state: ValidatorState):
+        """Saves a state returned by `rotate`, then deletes the segments it covers."""
+        self.state_file.save(state)
+        self.snapshot_seq = state.journal_seq
+        for last_seq, path in self.closed_segments():
+            if last_seq <= state.journal_seq:
+                os.remove(path)
+
+    def compact(self, state: ValidatorState):
+        """Saves a snapshot including every record so far and drops the journal it covers."""
+        self.write_snapshot(self.rotate(state))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.state_file.close()
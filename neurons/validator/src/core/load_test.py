@@ -0,0 +1,164 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+"""
+Drives a Validator against an in-process simulated miner fleet and reports step throughput.
+
+The fleet stands in for the chain and the network: its metagraph, its dendrite and a subtensor
+that only reports the block. Each step evaluates the fleet with the validator's EvaluateMiners and
+saves the state like sync does, so update_scores, the journal and the state writer run for real.
+The cadence sleep between forwards and the chain calls of sync are left out.
+
+Usage:
+    python -m neurons.validator.src.core.load_test --fleet.miners 4096 --fleet.steps 5
+    python -m neurons.validator.src.core.load_test --fleet.miners 1024 --fleet.latency_median 0.5 --fleet.error_rate 0.05
+
+Any validator option can be passed as well. The sample size defaults to the whole fleet.
+"""
+
+import time
+import asyncio
+import argparse
+import tempfile
+
+from neurons.base.fleet import FleetConfig, SimulatedFleet
+from neurons.utils.config import add_args, add_validator_args
+from neurons.utils.metrics import StageMetrics
+from neurons.utils.network_view import NetworkView
+from neurons.validator.src.core.evaluate_miners import EvaluateMiners
+from neurons.validator.src.core.replay import config_from_args
+from neurons.validator.src.validator import Validator
+
+FLEET_KEY_ID = "fleet"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test the validator evaluation step against a simulated fleet.")
+    defaults = FleetConfig()
+    parser.add_argument("--fleet.miners", type=int, default=defaults.miners)
+    parser.add_argument("--fleet.steps", type=int, default=3)
+    parser.add_argument("--fleet.min_containers", type=int, default=defaults.containers[0])
+    parser.add_argument("--fleet.max_containers", type=int, default=defaults.containers[1])
+    parser.add_argument("--fleet.latency_median", type=float, default=defaults.latency_median)
+    parser.add_argument("--fleet.latency_sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--fleet.error_rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--fleet.bad_identity_rate", type=float, default=defaults.bad_identity_rate)
+    parser.add_argument("--fleet.bad_signature_rate", type=float, default=defaults.bad_signature_rate)
+    parser.add_argument("--fleet.seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--fleet.state_dir", type=str, default=None,
+        help="Directory of the validator state, a new temporary directory by default.",
+    )
+    add_args(None, parser)
+    add_validator_args(None, parser)
+    # The whole fleet is sampled unless --neuron.sample_size is given.
+    parser.set_defaults(**{"neuron.sample_size": None})
+    return parser
+
+
+class FleetSubtensor:
+    """The chain of a fleet: only the block is read, as weights are not set."""
+
+    def __init__(self, block: int = 0):
+        self.block = block
+
+    def get_current_block(self) -> int:
+        return self.block
+
+
+def fleet_validator(config, fleet: SimulatedFleet) -> Validator:
+    """
+    A Validator wired to the fleet. The fleet's metagraph and dendrite and a FleetSubtensor take
+    the place of the wallet, subtensor and metagraph BaseNeuron builds, the rest is set up the way
+    Validator does it. The state is kept in `fleet.state_dir`.
+    """
+    config.neuron.full_path = config.fleet.state_dir or tempfile.mkdtemp(prefix="load_test-")
+    validator = Validator.__new__(Validator)
+    validator.config = config
+    validator.metrics = StageMetrics(enabled=True)
+    validator.subtensor = FleetSubtensor()
+    validator.metagraph = fleet.metagraph()
+    validator.step = 0
+    validator.hotkeys = list(validator.metagraph.hotkeys)
+    validator.network_view = NetworkView(validator.metagraph)
+    validator.dendrite = fleet.dendrite()
+    validator.init_state()
+
+    validator._evaluate_miners = EvaluateMiners(validator)
+    validator._evaluate_miners._key_registry.add(FLEET_KEY_ID, fleet.public_key)
+    validator._evaluate_miners.load_state(config.neuron.full_path)
+    return validator
+
+
+async def run_steps(validator: Validator, steps: int):
+    """
+    Runs `steps` steps of the validator loop, each `neuron.num_concurrent_forwards` concurrent
+    evaluations followed by save_state, and returns their durations.
+    """
+    evaluator = validator._evaluate_miners
+    concurrency = max(1, validator.config.neuron.num_concurrent_forwards)
+    results = []
+    for step in range(steps):
+        validator.step = step
+        start = time.perf_counter()
+        with validator.metrics.stage("forward"):
+            await asyncio.gather(*[evaluator.evaluate() for _ in range(concurrency)])
+        with validator.metrics.stage("save_state"):
+            validator.save_state()
+        results.append(time.perf_counter() - start)
+    return results
+
+
+def main():
+    config = config_from_args(build_parser().parse_args())
+    if config.neuron.sample_size is None:
+        config.neuron.sample_size = config.fleet.miners
+
+    fleet = SimulatedFleet(FleetConfig(
+        miners=config.fleet.miners,
+        containers=(config.fleet.min_containers, config.fleet.max_containers),
+        latency_median=config.fleet.latency_median,
+        latency_sigma=config.fleet.latency_sigma,
+        error_rate=config.fleet.error_rate,
+        bad_identity_rate=config.fleet.bad_identity_rate,
+        bad_signature_rate=config.fleet.bad_signature_rate,
+        seed=config.fleet.seed,
+    ))
+    validator = fleet_validator(config, fleet)
+    evaluator = validator._evaluate_miners
+
+    durations = asyncio.run(run_steps(validator, config.fleet.steps))
+    validator.flush_state()
+    validator.state_writer.stop()
+
+    evaluated = min(config.fleet.miners, config.neuron.sample_size * max(1, config.neuron.num_concurrent_forwards))
+    print(f"{'step':>4} {'seconds':>9} {'miners/s':>10}")
+    for step, seconds in enumerate(durations):
+        print(f"{step:>4} {seconds:>9.2f} {evaluated / seconds:>10.0f}")
+    print(f"\n{evaluator._rules.step_summary()} (last step)")
+    print(f"{validator.journal.seq} score updates journaled, state in {config.neuron.full_path}")
+
+    print(f"\n{'stage':<20} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, p in validator.metrics.percentiles().items():
+        print(f"{name:<20} {p['count']:>7} {p['p50'] * 1000:>10.2f} {p['p95'] * 1000:>10.2f} {p['p99'] * 1000:>10.2f}")
+    evaluator._verifier.close()
+
+
+if __name__ == "__main__":
+    main()
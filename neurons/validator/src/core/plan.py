@@ -0,0 +1,71 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import numpy as np
+
+from typing import Any, Dict, List, Tuple
+
+
+class EvaluationPlan:
+    """
+    The UIDs of one evaluation round, split into disjoint partitions for concurrent forwards.
+
+    Every forward takes the next partition and queries only its UIDs, all under the nonce and the
+    network view of the plan. Once every partition has completed, or failed, `complete` returns
+    True for the forward that finished last, which then merges the responses of the whole plan.
+    Failed partitions, e.g. cancelled at the step deadline, are left out of the merge.
+    """
+
+    def __init__(self, uids: np.ndarray, partitions: int, nonce: str, view):
+        self.uids = np.asarray(uids, dtype=np.int64)
+        self.nonce = nonce
+        self.view = view
+        bounds = np.linspace(0, len(self.uids), max(1, partitions) + 1).astype(np.int64)
+        self.partitions = [slice(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+        self.responses: List[Dict[str, Any] | None] = [None] * len(self.uids)
+        self.completed = np.zeros(len(self.uids), dtype=bool)
+        self._taken = 0
+        self._remaining = len(self.partitions)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every partition was handed out."""
+        return self._taken >= len(self.partitions)
+
+    def take(self) -> slice:
+        """Hands out the next partition, as a slice of `uids`."""
+        partition = self.partitions[self._taken]
+        self._taken += 1
+        return partition
+
+    def complete(self, partition: slice, responses: List[Dict[str, Any] | None] | None) -> bool:
+        """
+        Reports the responses of a partition, None if it failed.
+        Returns True once every partition has reported.
+        """
+        if responses is not None:
+            self.responses[partition] = responses
+            self.completed[partition] = True
+        self._remaining -= 1
+        return self._remaining == 0
+
+    def result(self) -> Tuple[np.ndarray, List[Dict[str, Any] | None]]:
+        """The UIDs and responses of the completed partitions, in plan order."""
+        indices = np.flatnonzero(self.completed)
+        return self.uids[indices], [self.responses[i] for i in indices]
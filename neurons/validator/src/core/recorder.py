@@ -0,0 +1,103 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import os
+import gzip
+import json
+import numpy as np
+import bittensor as bt
+
+from typing import Any, Dict, Iterator, List
+
+RECORDING_FILE = "steps.jsonl.gz"
+
+
+class StepRecorder:
+    """
+    Writes every evaluation step to a gzip-compressed JSON lines log for offline replay.
+
+    A record holds the sampled UIDs with the axon identity the responses were validated against,
+    the nonce, the raw dendrite responses with their receive times in ms, and the resulting rewards.
+    Each step is appended as its own gzip member, so a log cut short by a crash stays readable up
+    to the last complete step.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._record: Dict[str, Any] | None = None
+
+    @classmethod
+    def from_config(cls, config: "bt.Config") -> "StepRecorder | None":
+        if not config.neuron.record_steps:
+            return None
+        return cls(os.path.join(config.neuron.full_path, RECORDING_FILE))
+
+    def begin(self, nonce: str, miner_uids: np.ndarray, view):
+        uids = [int(uid) for uid in miner_uids]
+        self._record = {
+            "nonce": nonce,
+            "miner_uids": uids,
+            "axons": [
+                {
+                    "ip": view.ips[uid],
+                    "port": int(view.ports[uid]),
+                    "hotkey": view.hotkeys[uid],
+                    "coldkey": view.coldkeys[uid],
+                    "active_ip_count": int(view.active_ip_count[uid]),
+                }
+                if uid < view.n else None
+                for uid in uids
+            ],
+            "responses": [None] * len(uids),
+            "received_ms": [0] * len(uids),
+        }
+
+    def observe(self, i: int, response: Dict[str, Any] | None, received_ms: int):
+        if self._record is not None:
+            self._record["responses"][i] = response
+            self._record["received_ms"][i] = received_ms
+
+    def end(self, step: int, block: int, rewards: np.ndarray):
+        if self._record is None:
+            return
+        record, self._record = self._record, None
+        record.update(step=step, block=block, rewards=np.asarray(rewards, dtype=np.float64).tolist())
+        try:
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            bt.logging.warning(f"[recorder] failed to record step {step}: {e}")
+
+
+def read_steps(path: str) -> Iterator[Dict[str, Any]]:
+    """Yields the step records of a log written by StepRecorder, up to the last complete step."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            bt.logging.warning(f"[recorder] {path} ends with an incomplete step")
+
+
+def write_steps(path: str, records: List[Dict[str, Any]]):
+    """Writes step records in the StepRecorder format, e.g. synthetic ones."""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
@@ -0,0 +1,281 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+"""
+Replays recorded or synthetic evaluation steps through the validation and scoring path of
+EvaluateMiners, without a chain or live miners.
+
+Usage:
+    python -m neurons.validator.src.core.replay ~/.bittensor/miners/<wallet>/<hotkey>/netuid<n>/validator/steps.jsonl.gz
+    python -m neurons.validator.src.core.replay --synthetic.miners 4096 --synthetic.containers 1000
+
+Any validator option can be passed as well, e.g. `--neuron.batch_responses` or `--neuron.verify_workers 8`.
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import numpy as np
+import bittensor as bt
+
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from neurons.utils.config import add_args, add_validator_args
+from neurons.utils.encrypt import encrypt, generate_key, generate_nonce
+from neurons.utils.metrics import StageMetrics
+from neurons.utils.network_view import NetworkView
+from neurons.validator.src.core.evaluate_miners import EvaluateMiners
+from neurons.validator.src.core.recorder import read_steps
+
+SYNTHETIC_KEY_ID = "replay"
+SYNTHETIC_GPU_MODELS = ["NVIDIA H100 80GB HBM3", "NVIDIA H200", "NVIDIA GeForce RTX 4090", "Unknown GPU"]
+
+
+class ReplayDendrite:
+    """Answers dendrite calls with the responses of a recorded step, matched by hotkey."""
+
+    def __init__(self):
+        self.now = 0
+        self._responses: Dict[str, Any] = {}
+
+    def load(self, record: Dict[str, Any]):
+        self._responses = {
+            axon["hotkey"]: (response, received_ms)
+            for axon, response, received_ms in zip(record["axons"], record["responses"], record["received_ms"])
+            if axon is not None
+        }
+
+    async def __call__(self, axons, synapse=None, deserialize=True, timeout=12.0, **kwargs):
+        results = []
+        for axon in axons:
+            response, received_ms = self._responses.get(axon.hotkey, (None, 0))
+            self.now = max(self.now, received_ms) if len(axons) > 1 else received_ms
+            results.append(
+                response if deserialize else
+                SimpleNamespace(deserialize=lambda r=response: r, dendrite=SimpleNamespace(process_time=None))
+            )
+        return results
+
+
+def view_from_record(record: Dict[str, Any]) -> NetworkView:
+    """Rebuilds the network view the responses of a step were validated against."""
+    n = max(record["miner_uids"], default=-1) + 1
+    axons = [
+        SimpleNamespace(ip="", port=0, hotkey=f"unrecorded-{uid}", coldkey="", is_serving=False)
+        for uid in range(n)
+    ]
+    for uid, axon in zip(record["miner_uids"], record["axons"]):
+        if axon is not None:
+            axons[uid] = SimpleNamespace(
+                ip=axon["ip"], port=axon["port"], hotkey=axon["hotkey"], coldkey=axon["coldkey"], is_serving=True
+            )
+    metagraph = SimpleNamespace(
+        axons=axons,
+        hotkeys=[axon.hotkey for axon in axons],
+        active=np.zeros(n, dtype=np.int64),
+        validator_permit=np.zeros(n, dtype=bool),
+        S=np.zeros(n, dtype=np.float32),
+    )
+    view = NetworkView(metagraph)
+    for uid, axon in zip(record["miner_uids"], record["axons"]):
+        if axon is not None:
+            view.active_ip_count[uid] = axon["active_ip_count"]
+    return view
+
+
+def synthesize_steps(
+    miners: int,
+    containers: int,
+    gpus: int = 8,
+    steps: int = 1,
+    private_key=None,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Builds step records of `miners` miners reporting `containers` containers each, signed with
+    `private_key`. Uptimes move between steps, the inventories do not.
+    """
+    rng = random.Random(seed)
+    records = []
+    for step in range(steps):
+        nonce = generate_nonce()
+        now_ms = int(time.time() * 1000)
+        axons, responses = [], []
+        for uid in range(miners):
+            axon = {
+                "ip": f"10.{uid >> 16 & 255}.{uid >> 8 & 255}.{uid & 255}",
+                "port": 8091,
+                "hotkey": f"replay-hotkey-{uid}",
+                "coldkey": f"replay-coldkey-{uid}",
+                "active_ip_count": 1,
+            }
+            miner_rng = random.Random(seed * 1_000_003 + uid)
+            data = {
+                "ip": axon["ip"],
+                "port": axon["port"],
+                "hotkey": axon["hotkey"],
+                "coldkey": axon["coldkey"],
+                "nonce": nonce,
+                "timestamp": now_ms,
+                "gpu": [
+                    {"id": i, "model": miner_rng.choice(SYNTHETIC_GPU_MODELS), "memory": 80.0}
+                    for i in range(miner_rng.randint(1, gpus))
+                ],
+                "containers": [
+                    {
+                        "id": f"container-{uid}-{i}",
+                        "status": 1 if miner_rng.random() < 0.8 else 0,
+                        "uptime": miner_rng.randint(0, 2_000_000) + step * 12,
+                        "gpu": {"index": i % gpus},
+                    }
+                    for i in range(containers)
+                ],
+            }
+            data["signature"] = encrypt(data, private_key)
+            axons.append(axon)
+            responses.append({"status": True, "data": data})
+
+        records.append({
+            "step": step,
+            "block": 0,
+            "nonce": nonce,
+            "miner_uids": list(range(miners)),
+            "axons": axons,
+            "responses": responses,
+            "received_ms": [now_ms + rng.randint(0, 2_000) for _ in range(miners)],
+            "rewards": None,
+        })
+    return records
+
+
+def replay_validator(config: SimpleNamespace, n: int) -> SimpleNamespace:
+    """The parts of the validator EvaluateMiners reads, backed by a ReplayDendrite."""
+    return SimpleNamespace(
+        config=config,
+        metagraph=SimpleNamespace(n=np.int64(n)),
+        network_view=None,
+        metrics=StageMetrics(enabled=True),
+        dendrite=ReplayDendrite(),
+        block=0,
+        step=0,
+        update_scores=lambda rewards, uids: None,
+    )
+
+
+async def replay_steps(evaluator: EvaluateMiners, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pushes each record through get_server_config and get_rewards, returns one result per step."""
+    validator = evaluator._validator
+    evaluator.now_ms = lambda: validator.dendrite.now
+
+    results = []
+    for record in records:
+        miner_uids = np.asarray(record["miner_uids"], dtype=np.int64)
+        validator.network_view = view_from_record(record)
+        validator.dendrite.load(record)
+
+        start = time.perf_counter()
+        with validator.metrics.stage("get_server_config"):
+            responses = await evaluator.get_server_config(miner_uids, nonce=record["nonce"])
+        with validator.metrics.stage("rewards"):
+            rewards = evaluator.get_rewards(responses)
+        elapsed = time.perf_counter() - start
+
+        recorded = record.get("rewards")
+        results.append({
+            "step": record.get("step"),
+            "miners": len(miner_uids),
+            "valid": sum(r is not None for r in responses),
+            "seconds": elapsed,
+            "max_reward_diff": (
+                float(np.max(np.abs(rewards - np.asarray(recorded)), initial=0.0))
+                if recorded is not None else None
+            ),
+        })
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Replay validator evaluation steps offline.")
+    parser.add_argument("log", nargs="?", help="Step log written with --neuron.record_steps.")
+    parser.add_argument("--synthetic.miners", type=int, default=256, help="Miners per synthetic step.")
+    parser.add_argument("--synthetic.containers", type=int, default=100, help="Containers per synthetic miner.")
+    parser.add_argument("--synthetic.gpus", type=int, default=8, help="Most GPUs per synthetic miner.")
+    parser.add_argument("--synthetic.steps", type=int, default=3, help="Number of synthetic steps.")
+    parser.add_argument("--replay.repeat", type=int, default=1, help="Number of passes over the steps.")
+    add_args(None, parser)
+    add_validator_args(None, parser)
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> SimpleNamespace:
+    """Nests the dotted options the way bt.config does."""
+    config = SimpleNamespace()
+    for key, value in vars(args).items():
+        node = config
+        *parents, leaf = key.split(".")
+        for parent in parents:
+            if not hasattr(node, parent):
+                setattr(node, parent, SimpleNamespace())
+            node = getattr(node, parent)
+        setattr(node, leaf, value)
+    config.neuron.record_steps = False
+    return config
+
+
+def main():
+    config = config_from_args(build_parser().parse_args())
+
+    public_key = None
+    if config.log:
+        records = list(read_steps(config.log))
+    else:
+        public_key, private_key = generate_key()
+        print(
+            f"Synthesizing {config.synthetic.steps} steps of {config.synthetic.miners} miners "
+            f"x {config.synthetic.containers} containers..."
+        )
+        records = synthesize_steps(
+            config.synthetic.miners,
+            config.synthetic.containers,
+            gpus=config.synthetic.gpus,
+            steps=config.synthetic.steps,
+            private_key=private_key,
+        )
+
+    n = max((max(r["miner_uids"], default=-1) for r in records), default=-1) + 1
+    evaluator = EvaluateMiners(replay_validator(config, n))
+    if public_key is not None:
+        evaluator._key_registry.add(SYNTHETIC_KEY_ID, public_key)
+
+    print(f"{'pass':>4} {'step':>6} {'miners':>7} {'valid':>7} {'ms':>10} {'max reward diff':>16}")
+    for i in range(config.replay.repeat):
+        for r in asyncio.run(replay_steps(evaluator, records)):
+            diff = "-" if r["max_reward_diff"] is None else f"{r['max_reward_diff']:.3g}"
+            print(f"{i:>4} {r['step']!s:>6} {r['miners']:>7} {r['valid']:>7} {r['seconds'] * 1000:>10.1f} {diff:>16}")
+
+    print(f"\n{'stage':<20} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, p in evaluator._validator.metrics.percentiles().items():
+        print(f"{name:<20} {p['count']:>7} {p['p50'] * 1000:>10.2f} {p['p95'] * 1000:>10.2f} {p['p99'] * 1000:>10.2f}")
+    evaluator._verifier.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import time
+import numpy as np
+import bittensor as bt
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+
+class AttestationContext:
+    """The inputs of the attestation rules for the response of one miner."""
+
+    __slots__ = ("uid", "res", "data", "view", "nonce", "now_ts")
+
+    def __init__(self, uid: int, res: Dict[str, Any] | None, view, nonce: str, now_ts: int):
+        self.uid = uid
+        self.res = res
+        self.data = res.get("data", {}) if isinstance(res, dict) else {}
+        self.view = view
+        self.nonce = nonce
+        self.now_ts = now_ts
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    A named attestation check, `check` returns True when the response passes.
+    Deferred rules are not run by RuleEngine.evaluate, their results are reported with `reject`
+    by the stage that runs them (e.g. the batched signature verification).
+    """
+    name: str
+    check: Callable[[AttestationContext], bool] | None = None
+    deferred: bool = False
+
+
+def _port_matches(c: AttestationContext) -> bool:
+    # The payload is untrusted, a list compared with a numpy integer would give an array.
+    port = c.data.get("port")
+    return isinstance(port, int) and port == c.view.ports[c.uid]
+
+
+def _is_fresh(c: AttestationContext) -> bool:
+    # A missing or non-numeric timestamp is stale, not an error.
+    timestamp = c.data.get("timestamp")
+    if not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+        return False
+    return c.now_ts - timestamp <= 10_000
+
+
+# Cheap checks first, the signature verification last. The timestamp is checked before the
+# signature, so that stale responses are not verified; a stale response with a bad signature is
+# counted as a `timestamp` rejection.
+ATTESTATION_RULES: List[Rule] = [
+    Rule("response", lambda c: isinstance(c.res, dict)),
+    Rule("status", lambda c: bool(c.res.get("status", False))),
+    Rule("payload", lambda c: isinstance(c.data, dict)),
+    Rule("metagraph", lambda c: c.uid < c.view.n),
+    Rule("ip_count", lambda c: c.view.active_ip_count[c.uid] <= 1),
+    Rule("ip", lambda c: c.data.get("ip") == c.view.ips[c.uid]),
+    Rule("port", _port_matches),
+    Rule("coldkey", lambda c: c.data.get("coldkey") == c.view.coldkeys[c.uid]),
+    Rule("hotkey", lambda c: c.data.get("hotkey") == c.view.hotkeys[c.uid]),
+    Rule("nonce", lambda c: c.data.get("nonce") == c.nonce),
+    Rule("signature_present", lambda c: bool(c.data.get("signature"))),
+    Rule("timestamp", _is_fresh),
+    Rule("signature", deferred=True),
+]
+
+
+class RuleEngine:
+    """
+    Runs the attestation rules in order and stops at the first rule a response fails. A rule that
+    raises on a malformed payload counts as a failure of that rule, not of the step.
+
+    Rejections are counted per rule (over the lifetime and for the current step) and per UID in a
+    (uids x rules) array. With `profile` set, the time spent in each rule is accumulated as well.
+    """
+
+    def __init__(self, rules: List[Rule] = ATTESTATION_RULES, n: int = 0, profile: bool = False):
+        self.rules = list(rules)
+        self.names = [rule.name for rule in self.rules]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self._inline = [(i, rule.check) for i, rule in enumerate(self.rules) if not rule.deferred]
+        self.profile = profile
+
+        r = len(self.rules)
+        self.evaluated = np.zeros(r, dtype=np.int64)
+        self.rejections = np.zeros(r, dtype=np.int64)
+        self.step_rejections = np.zeros(r, dtype=np.int64)
+        self.step_responses = 0
+        self.cost = np.zeros(r, dtype=np.float64)
+        self.uid_rejections = np.zeros((0, r), dtype=np.int32)
+        self.resize(n)
+
+    def resize(self, n: int):
+        size = len(self.uid_rejections)
+        if n > size:
+            self.uid_rejections = np.concatenate(
+                [self.uid_rejections, np.zeros((n - size, len(self.rules)), dtype=np.int32)]
+            )
+
+    def reset(self, uids: np.ndarray):
+        """Clears the rejection counters of the given UIDs, e.g. after their hotkey was replaced."""
+        self.uid_rejections[uids] = 0
+
+    def begin_step(self):
+        self.step_rejections[:] = 0
+        self.step_responses = 0
+
+    def evaluate(self, context: AttestationContext) -> bool:
+        """Runs the inline rules on the context, returns True when all of them pass."""
+        self.step_responses += 1
+        for i, check in self._inline:
+            self.evaluated[i] += 1
+            if self.profile:
+                start = time.perf_counter()
+                ok = self._check(check, context, i)
+                self.cost[i] += time.perf_counter() - start
+            else:
+                ok = self._check(check, context, i)
+            if not ok:
+                self._count(context.uid, i)
+                return False
+        return True
+
+    def _check(self, check: Callable[[AttestationContext], bool], context: AttestationContext, i: int) -> bool:
+        try:
+            return bool(check(context))
+        except Exception as e:
+            bt.logging.trace(f"[evaluate_miners][forward] uid {context.uid} rule {self.names[i]} raised: {e!r}")
+            return False
+
+    def reject(self, uid: int, name: str):
+        """Counts a rejection by a deferred rule."""
+        self._count(uid, self.index[name])
+
+    def record(self, name: str, count: int, seconds: float = 0.0):
+        """Accounts `count` evaluations of a deferred rule that took `seconds` in total."""
+        i = self.index[name]
+        self.evaluated[i] += count
+        self.cost[i] += seconds
+
+    def _count(self, uid: int, i: int):
+        self.rejections[i] += 1
+        self.step_rejections[i] += 1
+        self.resize(uid + 1)
+        self.uid_rejections[uid, i] += 1
+        bt.logging.trace(f"[evaluate_miners][forward] uid {uid} rejected by rule: {self.names[i]}")
+
+    def step_summary(self) -> str:
+        """One line with the rejections of the current step by rule, e.g. `rejected 3/8: ip_count=2 timestamp=1`."""
+        summary = f"rejected {int(self.step_rejections.sum())}/{self.step_responses}"
+        reasons = [f"{self.names[i]}={self.step_rejections[i]}" for i in np.flatnonzero(self.step_rejections)]
+        return f"{summary}: {' '.join(reasons)}" if reasons else summary
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Lifetime evaluations, rejections and mean cost in seconds of every rule."""
+        return {
+            name: {
+                "evaluated": int(self.evaluated[i]),
+                "rejected": int(self.rejections[i]),
+                "mean_cost": float(self.cost[i] / self.evaluated[i]) if self.evaluated[i] else 0.0,
+            }
+            for i, name in enumerate(self.names)
+        }
@@ -0,0 +1,114 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import random
+import asyncio
+import bittensor as bt
+
+from typing import Awaitable
+
+# Target block time of the chain in seconds.
+BLOCK_TIME = 12.0
+
+# Share of the cadence period a step may run for by default. A step started on a slot then ends
+# before the next slot, instead of missing it and idling for a whole cadence.
+DEADLINE_FRACTION = 0.9
+
+
+class StepScheduler:
+    """
+    Paces evaluation steps on block boundaries without blocking the event loop.
+
+    Every step is started at a block that is a multiple of `cadence_blocks`, plus an optional random
+    jitter so that validators do not all hit the miners at the same instant. Waiting is done with
+    `asyncio.sleep`, so concurrent forwards and other coroutines keep running while a step is idle.
+    A step that runs past `deadline` seconds is cancelled instead of delaying the next slot; the
+    deadline is kept shorter than the cadence period.
+    """
+
+    def __init__(
+        self,
+        cadence_blocks: int,
+        jitter: float = 0.0,
+        deadline: float = 0.0,
+        block_time: float = BLOCK_TIME,
+    ):
+        if cadence_blocks < 1:
+            raise ValueError(
+                f"cadence_blocks must be >= 1, got {cadence_blocks}"
+            )
+        self.cadence_blocks = cadence_blocks
+        self.jitter = max(0.0, jitter)
+        self.block_time = block_time
+        period = cadence_blocks * block_time
+        max_deadline = DEADLINE_FRACTION * period
+        if deadline > max_deadline:
+            bt.logging.warning(
+                f"[scheduler] step deadline of {deadline:.1f}s does not fit in the cadence of {period:.1f}s, "
+                f"using {max_deadline:.1f}s"
+            )
+        self.deadline = min(deadline, max_deadline) if deadline > 0 else max_deadline
+
+    @classmethod
+    def from_config(cls, config: "bt.Config") -> "StepScheduler":
+        return cls(
+            cadence_blocks=config.neuron.eval_cadence_blocks,
+            jitter=config.neuron.eval_jitter,
+            deadline=config.neuron.step_deadline,
+        )
+
+    def next_slot_time(self, block: int, now: float = None) -> float:
+        """
+        Returns the wall-clock time of the next block that is a multiple of the cadence.
+
+        Args:
+            block (int): The current block.
+            now (float): The current time, defaults to `time.monotonic()`.
+        Returns:
+            float: Monotonic time at which the next step should start.
+        """
+        if now is None:
+            now = time.monotonic()
+        next_slot = (block // self.cadence_blocks + 1) * self.cadence_blocks
+        delay = (next_slot - block) * self.block_time
+        if self.jitter > 0:
+            delay += random.uniform(0, self.jitter)
+        return now + delay
+
+    async def sleep_until(self, wake_at: float):
+        """Sleeps until the given monotonic time without blocking the event loop."""
+        delay = wake_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def run_step(self, step: Awaitable) -> bool:
+        """
+        Runs a single evaluation step under the per-step deadline.
+
+        Returns:
+            bool: True if the step finished, False if it was cancelled at the deadline.
+        """
+        try:
+            await asyncio.wait_for(step, timeout=self.deadline)
+            return True
+        except asyncio.TimeoutError:
+            bt.logging.warning(
+                f"[scheduler] step exceeded its deadline of {self.deadline:.1f}s and was cancelled"
+            )
+            return False
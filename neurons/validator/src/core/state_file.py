@@ -0,0 +1,286 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import io
+import os
+import mmap
+import json
+import zlib
+import struct
+import hashlib
+import argparse
+import numpy as np
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+STATE_FILE = "state.bin"
+FORMAT_VERSION = 1
+
+# magic, format version, uid capacity of a slot, index of the active slot.
+_FILE_HEADER = struct.Struct("<8sIII")
+_MAGIC = b"IOISTATE"
+_FILE_HEADER_SIZE = 64
+# step, last journal record included, number of uids, crc32 of the header fields and the arrays.
+_SLOT_HEADER = struct.Struct("<qQII")
+_SLOT_HEADER_SIZE = 32
+# Per-uid arrays of a slot, 8-byte columns first so every column stays aligned.
+_COLUMNS = (
+    ("hotkey_hash", np.uint64),
+    ("last_block", np.int64),
+    ("scores", np.float32),
+    ("last_reward", np.float32),
+)
+_ROW_SIZE = sum(np.dtype(dtype).itemsize for _, dtype in _COLUMNS)
+_CAPACITY_ALIGN = 256
+
+
+def hotkey_hash(hotkeys: List[str]) -> np.ndarray:
+    """64-bit hashes of hotkeys, the state file keeps these instead of variable-length strings."""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(str(h).encode(), digest_size=8).digest(), "little") for h in hotkeys],
+        dtype=np.uint64,
+    )
+
+
+def _slot_size(capacity: int) -> int:
+    return _SLOT_HEADER_SIZE + _ROW_SIZE * capacity
+
+
+def _slot_offset(slot: int, capacity: int) -> int:
+    return _FILE_HEADER_SIZE + slot * _slot_size(capacity)
+
+
+def _slot_columns(buffer, slot: int, capacity: int, n: int) -> dict:
+    offset = _slot_offset(slot, capacity) + _SLOT_HEADER_SIZE
+    columns = {}
+    for name, dtype in _COLUMNS:
+        columns[name] = np.frombuffer(buffer, dtype=dtype, count=n, offset=offset)
+        offset += np.dtype(dtype).itemsize * capacity
+    return columns
+
+
+def _checksum(step: int, journal_seq: int, n: int, columns: dict) -> int:
+    crc = zlib.crc32(_SLOT_HEADER.pack(step, journal_seq, n, 0)[:-4])
+    for name, _ in _COLUMNS:
+        crc = zlib.crc32(columns[name].tobytes(), crc)
+    return crc
+
+
+def _write_slot(buffer, slot: int, capacity: int, state: "ValidatorState"):
+    columns = _slot_columns(buffer, slot, capacity, state.n)
+    for name, _ in _COLUMNS:
+        columns[name][:] = getattr(state, name)
+    crc = _checksum(state.step, state.journal_seq, state.n, columns)
+    _SLOT_HEADER.pack_into(buffer, _slot_offset(slot, capacity), state.step, state.journal_seq, state.n, crc)
+
+
+@dataclass
+class ValidatorState:
+    """The persisted part of a validator: scores and per-uid metadata, indexed by uid."""
+
+    step: int
+    scores: np.ndarray
+    last_block: np.ndarray
+    last_reward: np.ndarray
+    hotkey_hash: np.ndarray
+    journal_seq: int = 0
+
+    @classmethod
+    def empty(cls, n: int, step: int = 0) -> "ValidatorState":
+        return cls(
+            step=step,
+            scores=np.zeros(n, dtype=np.float32),
+            last_block=np.zeros(n, dtype=np.int64),
+            last_reward=np.zeros(n, dtype=np.float32),
+            hotkey_hash=np.zeros(n, dtype=np.uint64),
+        )
+
+    @property
+    def n(self) -> int:
+        return len(self.scores)
+
+
+@dataclass
+class StateSnapshot:
+    """A validator state to write, with the arrays of the state files kept next to it, by path."""
+
+    state: ValidatorState
+    files: Dict[str, Dict[str, np.ndarray]]
+
+
+class StateFile:
+    """
+    Fixed-layout, memory-mapped validator state file.
+
+    After a 64 byte header (magic, format version, slot capacity, active slot) the file holds two
+    slots, each a small header (step, journal sequence, number of uids, crc32) followed by one
+    column per field. A save writes the inactive slot through the mapping, msyncs it and only then
+    flips the active slot, so a crash during a save leaves the previous slot intact and the
+    checksum catches the rest. When the metagraph outgrows the slots the file is rewritten with a
+    larger capacity, through a temp file and a rename. Loading copies the columns out of the file
+    instead of parsing an archive, and `read_state` lets other processes read the scores while the
+    validator runs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.capacity = 0
+        self._file = None
+        self._mmap = None
+
+    def _open(self) -> bool:
+        """Maps an existing state file, returns False if there is none with a usable layout."""
+        self.close()
+        if not os.path.exists(self.path):
+            return False
+        self._file = open(self.path, "r+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size >= _FILE_HEADER_SIZE:
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+            magic, version, capacity, _ = _FILE_HEADER.unpack_from(self._mmap, 0)
+            if magic == _MAGIC and version == FORMAT_VERSION and size == _slot_offset(2, capacity):
+                self.capacity = capacity
+                return True
+        self.close()
+        return False
+
+    def _create(self, state: ValidatorState):
+        """Writes a new file sized for `state`, with the state in slot 0."""
+        self.close()
+        capacity = -(-max(state.n, 1) // _CAPACITY_ALIGN) * _CAPACITY_ALIGN
+        buffer = bytearray(_slot_offset(2, capacity))
+        _FILE_HEADER.pack_into(buffer, 0, _MAGIC, FORMAT_VERSION, capacity, 0)
+        _write_slot(buffer, 0, capacity, state)
+        write_atomic(self.path, buffer)
+
+    def save(self, state: ValidatorState):
+        if self._mmap is None and not self._open() or state.n > self.capacity:
+            self._create(state)
+            self._open()
+            return
+
+        _, _, capacity, active = _FILE_HEADER.unpack_from(self._mmap, 0)
+        slot = 1 - active
+        _write_slot(self._mmap, slot, capacity, state)
+        self._mmap.flush()
+
+        _FILE_HEADER.pack_into(self._mmap, 0, _MAGIC, FORMAT_VERSION, capacity, slot)
+        self._mmap.flush(0, mmap.PAGESIZE)
+
+    def load(self) -> ValidatorState | None:
+        """Returns the state of the active slot, or of the other slot if the active one is damaged."""
+        if not os.path.exists(self.path):
+            return None
+        return read_state(self.path)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def fsync_directory(path: str):
+    """Persists a rename within `path`, where the platform supports it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: str, data: bytes):
+    """Writes a file atomically: to a temp file, fsync, then rename over `path`."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fsync_directory(os.path.dirname(path) or ".")
+
+
+def write_arrays(path: str, arrays: Dict[str, np.ndarray]):
+    """Writes named arrays to an .npz archive, atomically like write_atomic."""
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    write_atomic(path, buffer.getbuffer())
+
+
+def read_arrays(path: str) -> Dict[str, np.ndarray] | None:
+    """Reads an archive written by write_arrays, returns None if there is none. Raises if it is damaged."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def parse_state(buffer) -> ValidatorState | None:
+    """Parses the active slot of a state file, falling back to the other slot if it is damaged."""
+    if len(buffer) < _FILE_HEADER_SIZE:
+        return None
+    magic, version, capacity, active = _FILE_HEADER.unpack_from(buffer, 0)
+    if magic != _MAGIC or version != FORMAT_VERSION or len(buffer) < _slot_offset(2, capacity):
+        return None
+    for slot in (active, 1 - active):
+        step, journal_seq, n, crc = _SLOT_HEADER.unpack_from(buffer, _slot_offset(slot, capacity))
+        if n > capacity:
+            continue
+        columns = {name: column.copy() for name, column in _slot_columns(buffer, slot, capacity, n).items()}
+        if _checksum(step, journal_seq, n, columns) == crc:
+            return ValidatorState(step=step, journal_seq=journal_seq, **columns)
+    return None
+
+
+def read_state(path: str) -> ValidatorState | None:
+    """Reads a state file through a read-only mapping, safe while the validator is running."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return parse_state(buffer)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Print the scores of a validator state file.")
+    parser.add_argument("path", type=str, help="Path to state.bin in the validator directory.")
+    args = parser.parse_args(args)
+
+    state = read_state(args.path)
+    if state is None:
+        raise SystemExit(f"{args.path} is not a valid state file")
+    print(json.dumps({
+        "step": state.step,
+        "journal_seq": state.journal_seq,
+        "scores": state.scores.tolist(),
+        "last_block": state.last_block.tolist(),
+        "last_reward": state.last_reward.tolist(),
+    }))
+
+
+if __name__ == "__main__":
+    main()
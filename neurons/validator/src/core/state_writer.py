@@ -0,0 +1,102 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+
+import time
+import threading
+import bittensor as bt
+
+from typing import Any, Callable
+
+from neurons.utils.metrics import StageMetrics
+
+
+class StateWriter:
+    """
+    Writes validator state snapshots on a background thread.
+
+    `submit` hands over an immutable snapshot through a single slot: a snapshot that was not
+    written yet is replaced by the newer one, so a slow disk never queues up work or blocks the
+    forward loop. `flush` waits until the last submitted snapshot is written, `stop` flushes and
+    ends the thread. The latency of every write is recorded as the "state_write" stage.
+    """
+
+    def __init__(self, write: Callable[[Any], None], metrics: StageMetrics | None = None):
+        self._write = write
+        self._metrics = metrics
+        self._condition = threading.Condition()
+        self._pending = None
+        self._writing = False
+        self._stopped = False
+        self.written = 0
+        self.replaced = 0
+        self.failed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot: Any):
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("StateWriter is stopped")
+            if self._pending is not None:
+                self.replaced += 1
+            self._pending = snapshot
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._writing = True
+
+            start = time.perf_counter()
+            try:
+                self._write(snapshot)
+            except Exception as e:
+                self.failed += 1
+                bt.logging.error(f"[state_writer] failed to write state: {e}")
+            else:
+                self.written += 1
+            latency = time.perf_counter() - start
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            if self._metrics is not None:
+                self._metrics.record("state_write", latency)
+            bt.logging.debug(f"[state_writer] wrote state in {latency * 1000:.1f}ms")
+
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Waits until every submitted snapshot is written, returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def stop(self, timeout: float | None = None):
+        """Writes the last submitted snapshot and ends the thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
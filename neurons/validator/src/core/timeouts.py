@@ -0,0 +1,143 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import numpy as np
+import bittensor as bt
+
+from typing import Dict
+
+from neurons.validator.src.core.state_file import read_arrays, write_arrays
+
+
+def process_time_of(synapse: "bt.Synapse") -> float:
+    """Returns the process time the dendrite recorded for a synapse in seconds, or nan when there is none."""
+    try:
+        return float(synapse.dendrite.process_time)
+    except (AttributeError, TypeError, ValueError):
+        return float("nan")
+
+
+class MinerTimeouts:
+    """
+    Per-miner dendrite timeouts derived from the latency history of each miner.
+
+    The last `window` process times of every UID are kept in a ring buffer. The timeout of a UID is
+    the `percentile` of its history times `margin`, clipped to [floor, ceiling]. A UID without
+    history gets the ceiling. A miner that did not answer is recorded at the timeout it was given,
+    so a slow miner's timeout climbs back towards the ceiling instead of cutting it off for good.
+    """
+
+    def __init__(
+        self,
+        n: int = 0,
+        floor: float = 2.0,
+        ceiling: float = 10.0,
+        percentile: float = 95.0,
+        window: int = 20,
+        margin: float = 1.5,
+    ):
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.percentile = percentile
+        self.window = window
+        self.margin = margin
+        self.history = np.full((0, window), np.nan, dtype=np.float64)
+        self.position = np.zeros(0, dtype=np.int64)
+        self.resize(n)
+
+    @classmethod
+    def from_config(cls, config: "bt.Config", n: int = 0) -> "MinerTimeouts":
+        return cls(
+            n=n,
+            floor=config.neuron.timeout_floor,
+            ceiling=config.neuron.timeout,
+            percentile=config.neuron.timeout_percentile,
+            window=config.neuron.timeout_window,
+            margin=config.neuron.timeout_margin,
+        )
+
+    def resize(self, n: int):
+        """Grows the history to n UIDs."""
+        size = len(self.history)
+        if n <= size:
+            return
+        self.history = np.concatenate([self.history, np.full((n - size, self.window), np.nan)])
+        self.position = np.concatenate([self.position, np.zeros(n - size, dtype=np.int64)])
+
+    def reset(self, uids: np.ndarray):
+        """Forgets the latency history of the given UIDs, e.g. after their hotkey was replaced."""
+        self.history[uids] = np.nan
+        self.position[uids] = 0
+
+    def timeouts(self, uids: np.ndarray) -> np.ndarray:
+        """Returns the timeout in seconds for each of the given UIDs."""
+        uids = np.asarray(uids, dtype=np.int64)
+        result = np.full(len(uids), self.ceiling, dtype=np.float64)
+        if len(uids) == 0:
+            return result
+        self.resize(int(uids.max()) + 1)
+
+        history = self.history[uids]
+        seen = ~np.isnan(history).all(axis=1)
+        if seen.any():
+            latency = np.nanpercentile(history[seen], self.percentile, axis=1)
+            result[seen] = np.clip(latency * self.margin, self.floor, self.ceiling)
+        return result
+
+    def observe(self, uids: np.ndarray, process_times: np.ndarray, timeouts: np.ndarray):
+        """
+        Records the process times of the queried UIDs. Missing process times (nan) are recorded at
+        the timeout the UID was given.
+        """
+        uids = np.asarray(uids, dtype=np.int64)
+        if len(uids) == 0:
+            return
+        self.resize(int(uids.max()) + 1)
+
+        elapsed = np.asarray(process_times, dtype=np.float64)
+        elapsed = np.where(np.isnan(elapsed), timeouts, np.minimum(elapsed, self.ceiling))
+        self.history[uids, self.position[uids]] = elapsed
+        self.position[uids] = (self.position[uids] + 1) % self.window
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """A copy of the latency history, for save or for the state writer to save off the forward loop."""
+        return {"history": self.history.copy(), "position": self.position.copy()}
+
+    def save(self, path: str):
+        write_arrays(path, self.state())
+
+    def load(self, path: str):
+        """Restores the history written by save. A damaged or inconsistent file leaves the history as it is."""
+        try:
+            state = read_arrays(path)
+            if state is None:
+                return
+            history = state["history"].astype(np.float64)
+            position = state["position"].astype(np.int64)
+        except Exception as e:
+            bt.logging.warning(f"Ignoring unreadable miner timeouts {path}: {e}")
+            return
+        if history.ndim != 2 or history.shape[1] != self.window:
+            bt.logging.warning(f"Ignoring miner timeouts {path}, its history of shape {history.shape} is not for a window of {self.window}.")
+            return
+        if position.shape != history.shape[:1] or np.any((position < 0) | (position >= self.window)):
+            bt.logging.warning(f"Ignoring miner timeouts {path}, its ring buffer positions do not match the history.")
+            return
+        self.history = history
+        self.position = position
+        bt.logging.info(f"Loaded latency history for {len(self.history)} uids.")
@@ -0,0 +1,193 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import math
+import hashlib
+import numpy as np
+import bittensor as bt
+
+from typing import List, Dict, Any
+
+from neurons.utils.encrypt import canonical_bytes
+from neurons.validator.src.core.state_file import read_arrays, write_arrays
+
+
+def inventory_fingerprint(response: Dict[str, Any]) -> int:
+    """
+    Returns a 64-bit hash of the inventory of a valid response: its GPU list and the ids and
+    statuses of its containers. Uptimes are left out, they move on every step.
+    """
+    inventory = {
+        "gpu": response.get("gpu", []),
+        "containers": [
+            {"id": c.get("id"), "status": c.get("status")}
+            for c in response.get("containers", [])
+        ],
+    }
+    digest = hashlib.blake2b(canonical_bytes(inventory), digest_size=8).digest()
+    # 0 is reserved for "never seen".
+    return int.from_bytes(digest, "little") or 1
+
+
+class UidScheduler:
+    """
+    Chooses which miners to evaluate in each round, instead of a fresh random sample per step.
+
+    A sweep is the number of rounds needed to query every available UID once with `k` UIDs per
+    round. Each UID is due again `sweep / weight` rounds after it was last queried, and each round
+    takes the `k` UIDs that are due the earliest (ties broken at random). The weight of a miner
+    whose inventory changed since its last evaluation doubles, up to `max_weight`; the weight of a
+    stable miner decays towards `min_weight`. Because a UID only ever waits behind UIDs that were
+    due before it, every available UID is revisited within `sweep / min_weight + sweep` rounds.
+    """
+
+    def __init__(
+        self,
+        n: int = 0,
+        min_weight: float = 0.5,
+        max_weight: float = 4.0,
+        decay: float = 0.8,
+    ):
+        self.min_weight = min_weight
+        self.max_weight = max_weight
+        self.decay = decay
+        self.round = 0
+        self.next_due = np.zeros(0, dtype=np.float64)
+        self.last_round = np.zeros(0, dtype=np.int64)
+        self.weight = np.zeros(0, dtype=np.float32)
+        self.fingerprint = np.zeros(0, dtype=np.uint64)
+        self.hotkeys = np.zeros(0, dtype=object)
+        self._sweep = 1.0
+        self.resize(n)
+
+    def resize(self, n: int):
+        """Grows the per-UID arrays to n UIDs; new UIDs are due immediately."""
+        size = len(self.next_due)
+        if n <= size:
+            return
+        extra = n - size
+        self.next_due = np.concatenate([self.next_due, np.full(extra, self.round, dtype=np.float64)])
+        self.last_round = np.concatenate([self.last_round, np.full(extra, -1, dtype=np.int64)])
+        self.weight = np.concatenate([self.weight, np.ones(extra, dtype=np.float32)])
+        self.fingerprint = np.concatenate([self.fingerprint, np.zeros(extra, dtype=np.uint64)])
+        self.hotkeys = np.concatenate([self.hotkeys, np.full(extra, "", dtype=object)])
+
+    def reset(self, uids: np.ndarray):
+        """Forgets the history of the given UIDs, e.g. after their hotkey was replaced."""
+        self.next_due[uids] = self.round
+        self.last_round[uids] = -1
+        self.weight[uids] = 1.0
+        self.fingerprint[uids] = 0
+
+    def sync_hotkeys(self, hotkeys: List[str]) -> np.ndarray:
+        """Resizes to the metagraph and resets every UID whose hotkey changed, returns those UIDs."""
+        self.resize(len(hotkeys))
+        hotkeys = np.asarray(hotkeys, dtype=object)
+        replaced = np.flatnonzero(self.hotkeys[:len(hotkeys)] != hotkeys)
+        if len(replaced):
+            self.reset(replaced)
+            self.hotkeys[replaced] = hotkeys[replaced]
+        return replaced
+
+    def next_uids(self, available_uids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Returns the k available UIDs that are due the earliest and marks them as queried.
+
+        Args:
+            available_uids (np.ndarray): UIDs that may be queried this round.
+            k (int): Number of UIDs to return.
+        Returns:
+            uids (np.ndarray): The UIDs to query, most overdue first.
+        """
+        available_uids = np.asarray(available_uids, dtype=np.int64)
+        if len(available_uids) == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        self.resize(int(available_uids.max()) + 1)
+
+        k = min(k, len(available_uids))
+        self._sweep = float(math.ceil(len(available_uids) / k))
+
+        due = self.next_due[available_uids]
+        order = np.lexsort((np.random.random(len(available_uids)), due))
+        uids = available_uids[order[:k]]
+
+        self.last_round[uids] = self.round
+        self.next_due[uids] = self.round + self._sweep / self.weight[uids]
+        self.round += 1
+        return uids
+
+    def observe(self, uids: np.ndarray, responses: List[Dict[str, Any] | None]):
+        """
+        Adapts the revisit frequency of the queried UIDs to how often their inventory changes.
+        UIDs without a valid response keep their weight.
+        """
+        for uid, response in zip(uids, responses):
+            if response is None:
+                continue
+            fingerprint = np.uint64(inventory_fingerprint(response))
+            previous = self.fingerprint[uid]
+            if previous != 0 and previous != fingerprint:
+                self.weight[uid] = min(self.max_weight, self.weight[uid] * 2)
+            else:
+                self.weight[uid] = max(self.min_weight, self.weight[uid] * self.decay)
+            self.fingerprint[uid] = fingerprint
+            self.next_due[uid] = self.last_round[uid] + self._sweep / self.weight[uid]
+
+    def revisit_bound(self) -> int:
+        """Maximum number of rounds between two evaluations of an available UID."""
+        return int(math.ceil(self._sweep / self.min_weight + self._sweep))
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """A copy of the state, for save or for the state writer to save off the forward loop."""
+        return {
+            "round": np.int64(self.round),
+            "next_due": self.next_due.copy(),
+            "last_round": self.last_round.copy(),
+            "weight": self.weight.copy(),
+            "fingerprint": self.fingerprint.copy(),
+            "hotkeys": self.hotkeys.astype(str),
+        }
+
+    def save(self, path: str):
+        write_arrays(path, self.state())
+
+    def load(self, path: str):
+        """Restores the state written by save. A damaged or inconsistent file leaves the scheduler as it is."""
+        try:
+            state = read_arrays(path)
+            if state is None:
+                return
+            arrays = {
+                "next_due": state["next_due"].astype(np.float64),
+                "last_round": state["last_round"].astype(np.int64),
+                "weight": state["weight"].astype(np.float32),
+                "fingerprint": state["fingerprint"].astype(np.uint64),
+                "hotkeys": state["hotkeys"].astype(object),
+            }
+            round_ = int(state["round"])
+        except Exception as e:
+            bt.logging.warning(f"Ignoring unreadable uid scheduler state {path}: {e}")
+            return
+        if len({a.shape for a in arrays.values()}) != 1 or arrays["next_due"].ndim != 1:
+            bt.logging.warning(f"Ignoring uid scheduler state {path}, its arrays have different shapes.")
+            return
+
+        self.round = round_
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        bt.logging.info(f"Loaded uid scheduler state at round {self.round} for {len(self.next_due)} uids.")
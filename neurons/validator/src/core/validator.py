@@ -18,13 +18,14 @@
 
 
 import copy
+import logging
 import numpy as np
 import asyncio
 import argparse
 import threading
 import bittensor as bt
 
-from typing import List, Union
+from typing import Dict, List, Union
 from traceback import print_exception
 
 from neurons.base.neuron import BaseNeuron
@@ -34,6 +35,12 @@ from neurons.utils.weight_utils import (
 )  # TODO: Replace when bittensor switches to numpy
 from neurons.base.mock import MockDendrite
 from neurons.utils.config import add_validator_args
+from neurons.utils.network_view import NetworkView
+from neurons.utils.logging import is_enabled_for
+from neurons.validator.src.core.history import RewardHistory
+from neurons.validator.src.core.journal import ScoreJournal, apply_rewards
+from neurons.validator.src.core.state_file import StateSnapshot, ValidatorState, hotkey_hash, write_arrays
+from neurons.validator.src.core.state_writer import StateWriter
 
 
 class BaseValidatorNeuron(BaseNeuron):
@@ -54,16 +61,19 @@ class BaseValidatorNeuron(BaseNeuron):
         # Save a copy of the hotkeys to local memory.
         self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)
 
+        # Array-backed snapshot of the metagraph read by the per-step hot paths.
+        self.network_view = NetworkView(self.metagraph)
+
         # Dendrite lets us send messages to other nodes (axons) in the network.
         if self.config.mock:
-            self.dendrite = MockDendrite(wallet=self.wallet)
+            self.dendrite = MockDendrite.from_config(wallet=self.wallet, config=self.config)
         else:
             self.dendrite = bt.dendrite(wallet=self.wallet)
         bt.logging.info(f"Dendrite: {self.dendrite}")
 
         # Set up initial scoring weights for validation
         bt.logging.info("Building validation weights.")
-        self.scores = np.zeros(self.metagraph.n, dtype=np.float32)
+        self.init_state()
 
         # Init sync with the network. Updates the metagraph.
         self.sync()
@@ -83,6 +93,23 @@ class BaseValidatorNeuron(BaseNeuron):
         self.thread: Union[threading.Thread, None] = None
         self.lock = asyncio.Lock()
 
+    def init_state(self):
+        """Builds the scores and per-uid metadata for the metagraph, then loads the saved state."""
+        self.scores = np.zeros(self.metagraph.n, dtype=np.float32)
+        # Block of the last update of each uid and the reward it got.
+        self.last_block = np.zeros(self.metagraph.n, dtype=np.int64)
+        self.last_reward = np.zeros(self.metagraph.n, dtype=np.float32)
+        # Guards the scores and the per-uid metadata, updated in place by update_scores.
+        self.scores_lock = threading.Lock()
+        # The last rewards of each uid, for windowed statistics the moving average cannot give.
+        self.reward_history = RewardHistory(self.metagraph.n, window=self.config.neuron.reward_history_window)
+
+        # Score updates are journaled between snapshots, recover them before the first sync saves.
+        self.journal = ScoreJournal.from_config(self.config)
+        # Snapshots are written off the forward loop.
+        self.state_writer = StateWriter(self.write_snapshot, self.metrics)
+        self.load_state()
+
     def serve_axon(self):
         """Serve axon to enable external connections."""
 
@@ -146,19 +173,25 @@ class BaseValidatorNeuron(BaseNeuron):
                 bt.logging.info(f"step({self.step}) block({self.block})")
 
                 # Run multiple forwards concurrently.
-                self.loop.run_until_complete(self.concurrent_forward())
+                with self.metrics.stage("forward"):
+                    self.loop.run_until_complete(self.concurrent_forward())
 
                 # Check if we should exit.
                 if self.should_exit:
+                    # No step runs anymore, the last snapshot includes every update.
+                    self.flush_state()
                     break
 
                 # Sync metagraph and potentially set weights.
-                self.sync()
+                with self.metrics.stage("sync"):
+                    self.sync()
 
+                self.metrics.log_step(self.step)
                 self.step += 1
 
         # If someone intentionally stops the validator, it'll safely terminate operations.
         except KeyboardInterrupt:
+            self.flush_state()
             self.axon.stop()
             bt.logging.success("Validator killed by keyboard interrupt.")
             exit()
@@ -192,6 +225,9 @@ class BaseValidatorNeuron(BaseNeuron):
             self.should_exit = True
             self.thread.join(5)
             self.is_running = False
+            if self.thread.is_alive():
+                # The run thread flushes the state itself once its current step ends.
+                bt.logging.warning("Validator step still running, its state is flushed when it ends.")
             bt.logging.debug("Stopped")
 
     def __enter__(self):
@@ -216,6 +252,9 @@ class BaseValidatorNeuron(BaseNeuron):
             self.should_exit = True
             self.thread.join(5)
             self.is_running = False
+            if self.thread.is_alive():
+                # The run thread flushes the state itself once its current step ends.
+                bt.logging.warning("Validator step still running, its state is flushed when it ends.")
             bt.logging.debug("Stopped")
 
     def set_weights(self):
@@ -241,8 +280,11 @@ class BaseValidatorNeuron(BaseNeuron):
         # Compute raw_weights safely
         raw_weights = self.scores / norm
 
-        bt.logging.debug("raw_weights", raw_weights)
-        bt.logging.debug("raw_weight_uids", str(self.metagraph.uids.tolist()))
+        # Only format the per-uid arrays when they are logged.
+        debug = is_enabled_for(logging.DEBUG)
+        if debug:
+            bt.logging.debug("raw_weights", raw_weights)
+            bt.logging.debug("raw_weight_uids", str(self.metagraph.uids.tolist()))
         # Process the raw weights to final_weights via subtensor limitations.
         (
             processed_weight_uids,
@@ -251,21 +293,23 @@ class BaseValidatorNeuron(BaseNeuron):
             uids=self.metagraph.uids,
             weights=raw_weights,
             netuid=self.config.netuid,
-            subtensor=self.subtensor,
+            subtensor=self.hyperparameters,
             metagraph=self.metagraph,
         )
-        bt.logging.debug("processed_weights", processed_weights)
-        bt.logging.debug("processed_weight_uids", processed_weight_uids)
+        if debug:
+            bt.logging.debug("processed_weights", processed_weights)
+            bt.logging.debug("processed_weight_uids", processed_weight_uids)
 
-        # Convert to uint16 weights and uids.
+        # Convert to uint16 weights and uids, as arrays the subtensor accepts as they are.
         (
             uint_uids,
             uint_weights,
         ) = convert_weights_and_uids_for_emit(
             uids=processed_weight_uids, weights=processed_weights
         )
-        bt.logging.debug("uint_weights", uint_weights)
-        bt.logging.debug("uint_uids", uint_uids)
+        if debug:
+            bt.logging.debug("uint_weights", uint_weights)
+            bt.logging.debug("uint_uids", uint_uids)
 
         # Set the weights on chain via our subtensor connection.
         result, msg = self.subtensor.set_weights(
@@ -292,6 +336,15 @@ class BaseValidatorNeuron(BaseNeuron):
         # Sync the metagraph.
         self.metagraph.sync(subtensor=self.subtensor)
 
+        # Rebuild the network view, activity and stake may change without the axons changing.
+        self.network_view = NetworkView(self.metagraph)
+
+        # Cached hyperparameters expire once per tempo on their own. A hotkey that left the
+        # metagraph was deregistered, so the next registration check asks the chain.
+        bt.logging.debug(f"Hyperparameter cache: {self.hyperparameters.stats()}")
+        if self.wallet.hotkey.ss58_address not in self.network_view.uid_by_hotkey:
+            self.hyperparameters.invalidate()
+
         # Check if the metagraph axon info has changed.
         if previous_metagraph.axons == self.metagraph.axons:
             return
@@ -299,25 +352,43 @@ class BaseValidatorNeuron(BaseNeuron):
         bt.logging.info(
             "Metagraph updated, re-syncing hotkeys, dendrite pool and moving averages"
         )
-        # Zero out all hotkeys that have been replaced.
-        for uid, hotkey in enumerate(self.hotkeys):
-            if hotkey != self.metagraph.hotkeys[uid]:
-                self.scores[uid] = 0  # hotkey has been replaced
-
-        # Check to see if the metagraph has changed size.
-        # If so, we need to add new hotkeys and moving averages.
-        if len(self.hotkeys) < len(self.metagraph.hotkeys):
-            # Update the size of the moving average scores.
-            new_moving_average = np.zeros((self.metagraph.n))
-            min_len = min(len(self.hotkeys), len(self.scores))
-            new_moving_average[:min_len] = self.scores[:min_len]
-            self.scores = new_moving_average
-
-        # Update the hotkeys.
-        self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)
+        with self.scores_lock:
+            # Zero out all hotkeys that have been replaced.
+            n = min(len(self.hotkeys), self.network_view.n)
+            replaced = np.flatnonzero(
+                np.asarray(self.hotkeys[:n], dtype=object) != self.network_view.hotkeys[:n]
+            )
+            self.scores[replaced] = 0  # hotkey has been replaced
+            self.last_block[replaced] = 0
+            self.last_reward[replaced] = 0
+            self.reward_history.clear(replaced)
+
+            # Check to see if the metagraph has changed size.
+            # If so, we need to add new hotkeys and moving averages.
+            if len(self.hotkeys) < len(self.metagraph.hotkeys):
+                # Update the size of the moving average scores.
+                new_moving_average = np.zeros(self.metagraph.n, dtype=self.scores.dtype)
+                min_len = min(len(self.hotkeys), len(self.scores))
+                new_moving_average[:min_len] = self.scores[:min_len]
+                self.scores = new_moving_average
+                self.last_block = np.pad(self.last_block, (0, self.metagraph.n - len(self.last_block)))
+                self.last_reward = np.pad(self.last_reward, (0, self.metagraph.n - len(self.last_reward)))
+                self.reward_history.resize(self.metagraph.n)
+
+            # Update the hotkeys.
+            self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)
+
+        # Journal records only carry reward deltas, snapshot the reset and resized scores.
+        self.state_writer.submit(self.snapshot())
 
     def update_scores(self, rewards: np.ndarray, uids: List[int]):
-        """Performs exponential moving average on the scores based on the rewards received from the miners."""
+        """
+        Performs exponential moving average on the scores based on the rewards received from the miners.
+        The scores are updated in place and keep their dtype.
+        """
+
+        # Ensure rewards is a numpy array.
+        rewards = np.asarray(rewards)
 
         # Check if rewards contains NaN values.
         if np.isnan(rewards).any():
@@ -325,14 +396,8 @@ class BaseValidatorNeuron(BaseNeuron):
             # Replace any NaN values in rewards with 0.
             rewards = np.nan_to_num(rewards, nan=0)
 
-        # Ensure rewards is a numpy array.
-        rewards = np.asarray(rewards)
-
-        # Check if `uids` is already a numpy array and copy it to avoid the warning.
-        if isinstance(uids, np.ndarray):
-            uids_array = uids.copy()
-        else:
-            uids_array = np.array(uids)
+        # The uids are only read, no need to copy them.
+        uids_array = np.asarray(uids)
 
         # Handle edge case: If either rewards or uids_array is empty.
         if rewards.size == 0 or uids_array.size == 0:
@@ -349,38 +414,106 @@ class BaseValidatorNeuron(BaseNeuron):
                 f"cannot be broadcast to uids array of shape {uids_array.shape}"
             )
 
-        # Compute forward pass rewards, assumes uids are mutually exclusive.
-        # shape: [ metagraph.n ]
-        scattered_rewards: np.ndarray = np.zeros_like(self.scores)
-        scattered_rewards[uids_array] = rewards
-        bt.logging.debug(f"Scattered rewards: {rewards} uids: {uids}")
-
-        # Update scores with rewards produced by this step.
-        # shape: [ metagraph.n ]
         alpha: float = self.config.neuron.moving_average_alpha
-        self.scores: np.ndarray = (
-            alpha * scattered_rewards + (1 - alpha) * self.scores
-        )
+        block = self.block
+        bt.logging.debug(f"Scattered rewards: {rewards} uids: {uids}")
+        with self.scores_lock:
+            # Journal the update before applying it, replaying the journal applies it the same way.
+            self.journal.append(self.step, block, uids_array, rewards, alpha)
+
+            # Decay every score and add the rewards at the sampled uids, assumes uids are mutually
+            # exclusive.
+            # shape: [ metagraph.n ]
+            apply_rewards(self.scores, uids_array, rewards, alpha)
+            self.last_block[uids_array] = block
+            self.last_reward[uids_array] = rewards
+            self.reward_history.record(uids_array, rewards, block)
         bt.logging.debug(f"Updated moving avg scores: {self.scores}")
 
     def save_state(self):
-        """Saves the state of the validator to a file."""
+        """
+        Snapshots the state of the validator once the journal is due for compaction. In between,
+        score updates are only appended to the journal by update_scores. The snapshot is written
+        by the background state writer.
+        """
+        if not self.journal.should_compact(self.step):
+            return
         bt.logging.info("Saving validator state.")
+        self.state_writer.submit(self.snapshot())
 
-        # Save the state of the validator to file.
-        np.savez(
-            self.config.neuron.full_path + "/state.npz",
-            step=self.step,
-            scores=self.scores,
-            hotkeys=self.hotkeys,
+    def flush_state(self):
+        """Snapshots the state of the validator and waits until it is written, used on shutdown."""
+        self.state_writer.submit(self.snapshot())
+        self.state_writer.flush()
+        bt.logging.info(
+            f"Flushed validator state, last write took {self.state_writer.last_latency * 1000:.1f}ms "
+            f"(max {self.state_writer.max_latency * 1000:.1f}ms)."
+        )
+
+    def snapshot(self) -> StateSnapshot:
+        """The rotated state with copies of the state files, for the state writer."""
+        return StateSnapshot(self.rotate_state(), self.state_files())
+
+    def state_files(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Arrays saved in files next to the state file with every snapshot, by path. Called on the
+        forward loop, so the arrays must be copies the loop does not modify afterwards.
+        """
+        return {}
+
+    def write_snapshot(self, snapshot: StateSnapshot):
+        """Writes a snapshot and its state files, called on the state writer thread."""
+        for path, arrays in snapshot.files.items():
+            write_arrays(path, arrays)
+        self.journal.write_snapshot(snapshot.state)
+
+    def persisted_state(self) -> ValidatorState:
+        """A copy of the scores and per-uid metadata kept in the state file."""
+        with self.scores_lock:
+            return self._copy_state()
+
+    def rotate_state(self) -> ValidatorState:
+        """
+        A copy of the state, tagged with the journal records it includes. The copy and the journal
+        rotation happen under the scores lock, so no update_scores call can append a record in
+        between and have its segment deleted once the snapshot is written.
+        """
+        with self.scores_lock:
+            return self.journal.rotate(self._copy_state())
+
+    def _copy_state(self) -> ValidatorState:
+        return ValidatorState(
+            step=int(self.step),
+            scores=self.scores.copy(),
+            last_block=self.last_block.copy(),
+            last_reward=self.last_reward.copy(),
+            hotkey_hash=hotkey_hash(self.hotkeys),
         )
 
     def load_state(self):
-        """Loads the state of the validator from a file."""
+        """
+        Loads the state of the validator from the state file and the journal written after it.
+        Scores of uids whose hotkey changed since are reset.
+        """
         bt.logging.info("Loading validator state.")
 
-        # Load the state of the validator from file.
-        state = np.load(self.config.neuron.full_path + "/state.npz")
-        self.step = state["step"]
-        self.scores = state["scores"]
-        self.hotkeys = state["hotkeys"]
+        # The state file may not be read while a snapshot is being written.
+        self.state_writer.flush()
+        state = self.journal.load(self.hotkeys)
+        if state is None:
+            bt.logging.info("No saved validator state found.")
+            return
+
+        # Fit the saved state to the current metagraph.
+        n = len(self.hotkeys)
+        fitted = ValidatorState.empty(n, step=state.step)
+        k = min(n, state.n)
+        kept = np.flatnonzero(state.hotkey_hash[:k] == hotkey_hash(self.hotkeys[:k]))
+        for name in ("scores", "last_block", "last_reward"):
+            getattr(fitted, name)[kept] = getattr(state, name)[kept]
+
+        with self.scores_lock:
+            self.step = fitted.step
+            self.scores = fitted.scores
+            self.last_block = fitted.last_block
+            self.last_reward = fitted.last_reward
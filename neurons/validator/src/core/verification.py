@@ -0,0 +1,130 @@
+# The MIT License (MIT)
+# Copyright © 2023 Yuma Rao
+# Copyright © 2023 Internet Of Intelligence
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import asyncio
+import bittensor as bt
+
+from typing import List, Dict, Any
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from neurons.utils.encrypt import verify_any, PublicKeyRegistry
+
+
+def _verify_chunk(
+    attestations: List[Dict[str, Any]],
+    public_keys: Dict[str, ed25519.Ed25519PublicKey],
+) -> List[bool]:
+    """Canonicalizes and verifies a chunk of attestations against the active keys by key id."""
+    return [
+        verify_any(data, data.get("signature"), public_keys)
+        for data in attestations
+    ]
+
+
+def _verify_chunk_raw(attestations: List[Dict[str, Any]], raw_keys: Dict[str, bytes]) -> List[bool]:
+    """
+    Process pool entry point of _verify_chunk, keys cross the process boundary in their raw encoding.
+    Kept at module level so it can be pickled.
+    """
+    public_keys = {
+        key_id: ed25519.Ed25519PublicKey.from_public_bytes(key_bytes)
+        for key_id, key_bytes in raw_keys.items()
+    }
+    return _verify_chunk(attestations, public_keys)
+
+
+class AttestationVerifier:
+    """
+    Verifies batches of miner attestations on a worker pool.
+
+    A batch is split into contiguous chunks, one per worker, and the results are concatenated
+    back in order so that every result stays at the position of its attestation. With
+    `workers=0` the batch is verified inline on the calling thread.
+    """
+
+    def __init__(self, workers: int = 0, use_processes: bool = False):
+        self.workers = max(0, workers)
+        self.use_processes = use_processes
+        self.last_throughput: float = 0.0
+        self._executor: Executor | None = None
+        if self.workers > 0:
+            executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            self._executor = executor_cls(max_workers=self.workers)
+
+    @classmethod
+    def from_config(cls, config: "bt.Config") -> "AttestationVerifier":
+        return cls(
+            workers=config.neuron.verify_workers,
+            use_processes=config.neuron.verify_processes,
+        )
+
+    async def verify_batch(
+        self,
+        attestations: List[Dict[str, Any]],
+        key_registry: PublicKeyRegistry,
+    ) -> List[bool]:
+        """
+        Verifies the signature of every attestation in the batch.
+
+        Args:
+            attestations (List[Dict[str, Any]]): Attestation payloads, each carrying its `signature`.
+            key_registry (PublicKeyRegistry): Active keys of the attestation service.
+        Returns:
+            List[bool]: Verification result for each attestation, in input order.
+        """
+        if not attestations:
+            return []
+
+        start = time.perf_counter()
+
+        if self._executor is None:
+            results = _verify_chunk(attestations, key_registry.keys())
+        else:
+            if self.use_processes:
+                verify_chunk, keys = _verify_chunk_raw, key_registry.raw_keys()
+            else:
+                verify_chunk, keys = _verify_chunk, key_registry.keys()
+
+            size = -(-len(attestations) // self.workers)
+            loop = asyncio.get_running_loop()
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(
+                    self._executor,
+                    verify_chunk,
+                    attestations[offset:offset + size],
+                    keys,
+                )
+                for offset in range(0, len(attestations), size)
+            ))
+            results = [ok for chunk in chunks for ok in chunk]
+
+        elapsed = time.perf_counter() - start
+        self.last_throughput = len(attestations) / elapsed if elapsed > 0 else float("inf")
+        bt.logging.debug(
+            f"[verification] verified {len(attestations)} attestations in {elapsed * 1000:.1f}ms "
+            f"({self.last_throughput:.0f}/s, {sum(results)} valid)"
+        )
+        return results
+
+    def close(self):
+        """Shuts the worker pool down."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -45,10 +45,24 @@ class Validator(BaseValidatorNeuron):
     def __init__(self, config=None):
         super(Validator, self).__init__(config=config)
 
-        bt.logging.info("load_state()")
-        self.load_state()
-
         self._evaluate_miners = EvaluateMiners(self)
+        # The mock dendrite signs attestations with its own key.
+        if self.config.mock and getattr(self.dendrite, "public_key", None) is not None:
+            self._evaluate_miners._key_registry.add("mock", self.dendrite.public_key)
+
+        # The validator state was loaded by the base class, before the evaluation state existed.
+        self._evaluate_miners.load_state(self.config.neuron.full_path)
+
+    def state_files(self):
+        files = super().state_files()
+        if self._evaluate_miners is not None:
+            files.update(self._evaluate_miners.state_files(self.config.neuron.full_path))
+        return files
+
+    def load_state(self):
+        super().load_state()
+        if self._evaluate_miners is not None:
+            self._evaluate_miners.load_state(self.config.neuron.full_path)
 
     async def forward(self):
         """
@@ -0,0 +1,12 @@
+import argparse
+
+from neurons.utils.config import add_args, add_miner_args, add_validator_args
+
+
+def test_help_formats_for_every_neuron():
+    # argparse %-formats help strings, so a bare % in one of them breaks --help.
+    for add_neuron_args in (add_miner_args, add_validator_args):
+        parser = argparse.ArgumentParser()
+        add_args(None, parser)
+        add_neuron_args(None, parser)
+        assert "--neuron.name" in parser.format_help()
@@ -0,0 +1,127 @@
+import base64
+import pytest
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from neurons.utils.encrypt import (
+    struct_to_map,
+    map_to_sorted_query,
+    canonical_query,
+    canonical_bytes,
+    encrypt,
+    verify,
+    generate_key,
+    PublicKeyRegistry,
+)
+from cryptography.hazmat.primitives import serialization
+
+
+def make_payload(n_containers, n_gpus=8):
+    return {
+        "uid": 7,
+        "ip": "10.0.0.7",
+        "port": 8091,
+        "hotkey": "5F3sa2TJAWMqDhXG6jhV4N8ko9SxwGy8TpaNS1repo5EYjQX",
+        "coldkey": "5DAAnrj7VHTznn2AWBemMuyBwZWs6FNFjdyVXUeYum3PTXFy",
+        "nonce": "0n9T1ZWl3vLeCz4d7D2RKw==",
+        "timestamp": 1760000000000,
+        "gpu": [
+            {"id": i, "model": "NVIDIA H200", "memory": 141.0, "busy": i % 2 == 0}
+            for i in range(n_gpus)
+        ],
+        "containers": [
+            {"id": f"c-{i}", "status": i % 3, "uptime": 600000 + i, "gpus": [i % n_gpus]}
+            for i in range(n_containers)
+        ],
+        "signature": "ignored",
+    }
+
+
+def save_public_key(public_key, path):
+    path.write_bytes(
+        public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw,
+        )
+    )
+
+
+CORPUS = [
+    {},
+    {"b": 2, "a": 1},
+    {"flag": True, "off": False, "none": None, "pi": 3.14159, "neg": -1},
+    {"signature": "x", "nested": {"signature": "y", "v": 1}},
+    {"when": datetime(2025, 1, 2, 3, 4, 5)},
+    {"items": [1, True, None, "s", 2.5, datetime(2025, 1, 1)]},
+    {"items": [[1, 2], (3,), {"k": [4]}]},
+    {"items": ({"a": 1}, {"a": 2}), "set": {5}},
+    {"a.b": 1, "a": {"b": 2}},
+    {"a-b": 1, "a": {"x": 2}, "a.": 3},
+    {"": {"x": 1}, "y": [0]},
+    {"obj": SimpleNamespace(name="n", tags=["t0", "t1"], inner=SimpleNamespace(v=None))},
+    {"containers": [{"id": i} for i in range(12)]},
+    {1: "one", 2: "two"},
+    {1: "int", True: "bool"},
+    SimpleNamespace(a=1, b={"c": [1, {"d": False}]}),
+    make_payload(0),
+    make_payload(25, n_gpus=3),
+    make_payload(250),
+]
+
+
+@pytest.mark.parametrize("data", CORPUS)
+def test_canonical_query_matches_struct_to_map(data):
+    expected = map_to_sorted_query(struct_to_map(data))
+    assert canonical_query(data) == expected
+    assert canonical_bytes(data) == expected.encode("utf-8")
+
+
+def test_signature_compatibility():
+    public_key, private_key = generate_key()
+    data = make_payload(100)
+
+    signature = encrypt(data, private_key)
+    assert verify(data, signature, public_key)
+
+    # A signature over the legacy encoding must still verify.
+    legacy = private_key.sign(
+        map_to_sorted_query(struct_to_map(data)).encode("utf-8")
+    )
+    assert verify(data, base64.b64encode(legacy).decode("utf-8"), public_key)
+
+    data["containers"][0]["uptime"] += 1
+    assert not verify(data, signature, public_key)
+
+
+def test_public_key_registry_reload(tmp_path):
+    public_key, private_key = generate_key()
+    next_public_key, next_private_key = generate_key()
+
+    registry = PublicKeyRegistry(str(tmp_path), check_interval=0)
+    assert not registry.refresh()
+    assert registry.keys() == {}
+
+    save_public_key(public_key, tmp_path / "current.key")
+    assert registry.refresh()
+    assert list(registry.keys()) == ["current"]
+    # Unchanged files are not parsed again.
+    assert not registry.refresh()
+
+    data = {"value": 1}
+    assert registry.verify(data, encrypt(data, private_key))
+    assert not registry.verify(data, encrypt(data, next_private_key))
+
+    # Rotation: a new key becomes active without restarting.
+    save_public_key(next_public_key, tmp_path / "next.key")
+    assert registry.refresh()
+    assert sorted(registry.keys()) == ["current", "next"]
+    assert registry.verify(data, encrypt(data, next_private_key))
+
+    keyed = {"value": 1, "key_id": "next"}
+    assert registry.verify(keyed, encrypt(keyed, next_private_key))
+    assert not registry.verify(keyed, encrypt(keyed, private_key))
+
+    (tmp_path / "current.key").unlink()
+    assert registry.refresh()
+    assert list(registry.keys()) == ["next"]
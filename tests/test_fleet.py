@@ -0,0 +1,99 @@
+import asyncio
+
+import numpy as np
+
+from neurons.base.fleet import FleetConfig, SimulatedFleet
+from neurons.validator.src.core import load_test
+
+
+def make_validator(tmp_path, fleet, *args):
+    args = ["--fleet.state_dir", str(tmp_path), *args]
+    config = load_test.config_from_args(load_test.build_parser().parse_args(args))
+    config.neuron.sample_size = len(fleet.miners)
+    return load_test.fleet_validator(config, fleet)
+
+
+def close(validator):
+    validator.state_writer.stop()
+    validator._evaluate_miners._verifier.close()
+
+
+def test_fleet_faults_are_rejected(tmp_path):
+    fleet = SimulatedFleet(FleetConfig(
+        miners=64, latency_median=0.001, error_rate=0.0, bad_identity_rate=0.2, bad_signature_rate=0.2, seed=1
+    ))
+    bad_identity = sum(m.bad_identity for m in fleet.miners)
+    bad_signature = sum(m.bad_signature and not m.bad_identity for m in fleet.miners)
+    assert bad_identity and bad_signature
+
+    validator = make_validator(tmp_path, fleet)
+    asyncio.run(load_test.run_steps(validator, 1))
+
+    rules = validator._evaluate_miners._rules
+    assert rules.step_rejections[rules.index["port"]] == bad_identity
+    assert rules.step_rejections[rules.index["signature"]] == bad_signature
+    assert rules.step_rejections.sum() == bad_identity + bad_signature
+    assert np.count_nonzero(validator.scores) == 64 - bad_identity - bad_signature
+    close(validator)
+
+
+def test_slow_miners_time_out(tmp_path):
+    fleet = SimulatedFleet(FleetConfig(miners=8, latency_median=0.5, latency_sigma=0.0, error_rate=0.0))
+    validator = make_validator(tmp_path, fleet, "--neuron.timeout", "0.05", "--neuron.timeout_floor", "0.05")
+    asyncio.run(load_test.run_steps(validator, 1))
+
+    rules = validator._evaluate_miners._rules
+    assert rules.step_rejections[rules.index["response"]] == 8
+    assert not validator.scores.any()
+    close(validator)
+
+
+def test_concurrent_forwards_split_one_plan_and_merge_once(tmp_path):
+    fleet = SimulatedFleet(FleetConfig(miners=40, latency_median=0.001, error_rate=0.0, bad_identity_rate=0.1, seed=2))
+    validator = make_validator(tmp_path, fleet, "--neuron.num_concurrent_forwards", "4")
+    validator.config.neuron.sample_size = 10
+    evaluator = validator._evaluate_miners
+    updates = []
+    update_scores = validator.update_scores
+
+    def record_update(rewards, uids):
+        updates.append((rewards, uids))
+        update_scores(rewards, uids)
+
+    validator.update_scores = record_update
+
+    queried = []
+    query_miners = evaluator.query_miners
+
+    async def record_partition(miner_uids, *args, **kwargs):
+        queried.append(list(miner_uids))
+        return await query_miners(miner_uids, *args, **kwargs)
+
+    evaluator.query_miners = record_partition
+    asyncio.run(load_test.run_steps(validator, 1))
+
+    # Four disjoint partitions of one plan covering 4 x sample_size miners, merged into a single update.
+    assert [len(uids) for uids in queried] == [10, 10, 10, 10]
+    assert len({uid for uids in queried for uid in uids}) == 40
+    assert len(updates) == 1
+    rewards, uids = updates[0]
+    assert sorted(uids.tolist()) == sorted(uid for part in queried for uid in part)
+    assert rewards.sum() > 0
+    assert validator.journal.seq == 1
+
+    rules = evaluator._rules
+    assert rules.step_rejections[rules.index["port"]] == sum(m.bad_identity for m in fleet.miners)
+    close(validator)
+
+
+def test_state_of_a_run_is_restored(tmp_path):
+    fleet = SimulatedFleet(FleetConfig(miners=16, latency_median=0.001, error_rate=0.0, seed=3))
+    validator = make_validator(tmp_path, fleet)
+    asyncio.run(load_test.run_steps(validator, 2))
+    validator.flush_state()
+    close(validator)
+
+    restored = make_validator(tmp_path, fleet)
+    np.testing.assert_array_equal(restored.scores, validator.scores)
+    assert restored._evaluate_miners._uid_scheduler.round == validator._evaluate_miners._uid_scheduler.round
+    close(restored)
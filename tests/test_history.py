@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from neurons.validator.src.core.history import RewardHistory
+
+
+def reference(rewards, window):
+    """Per-uid lists of the last `window` rewards."""
+    return [r[-window:] for r in rewards]
+
+
+def test_aggregates_match_a_reference_over_many_wraps():
+    rng = np.random.default_rng(0)
+    n, window = 12, 5
+    history = RewardHistory(n, window=window)
+    seen = [[] for _ in range(n)]
+    blocks = [[] for _ in range(n)]
+    for block in range(100, 140):
+        uids = rng.choice(n, size=6, replace=False)
+        rewards = rng.random(6).astype(np.float32)
+        history.record(uids, rewards, block)
+        for uid, reward in zip(uids, rewards):
+            seen[uid].append(float(reward))
+            blocks[uid].append(block)
+
+    for uid, (r, b) in enumerate(zip(reference(seen, window), reference(blocks, window))):
+        assert history.count[uid] == len(r)
+        assert history.mean([uid])[0] == pytest.approx(np.mean(r), abs=1e-6)
+        assert history.variance([uid])[0] == pytest.approx(np.var(r), abs=1e-6)
+        assert history.last([uid])[0] == pytest.approx(r[-1])
+        if len(set(b)) > 1:
+            assert history.trend([uid])[0] == pytest.approx(np.polyfit(b, r, 1)[0], abs=1e-6)
+
+
+def test_trimmed_mean_drops_outliers():
+    history = RewardHistory(2, window=10)
+    for block, reward in enumerate([0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 100.0, -100.0]):
+        history.record([0], [reward], block)
+    history.record([1], [1.0], 0)
+    np.testing.assert_allclose(history.trimmed_mean(trim=0.1), [0.5, 1.0])
+
+
+def test_empty_rows_and_clear():
+    history = RewardHistory(3, window=4)
+    history.record([0, 1], [1.0, 2.0], 10)
+    history.record([0, 1], [3.0, 4.0], 11)
+    np.testing.assert_array_equal(history.mean(), [2.0, 3.0, 0.0])
+    np.testing.assert_array_equal(history.trend(), [2.0, 2.0, 0.0])
+
+    history.clear([1])
+    np.testing.assert_array_equal(history.count, [2, 0, 0])
+    np.testing.assert_array_equal(history.mean(), [2.0, 0.0, 0.0])
+    np.testing.assert_array_equal(history.last(), [3.0, 0.0, 0.0])
+
+
+def test_resize_keeps_existing_rows():
+    history = RewardHistory(2, window=4)
+    history.record([1], [1.0], 10)
+    history.resize(5)
+    history.record([4], [2.0], 11)
+    assert history.n == 5
+    np.testing.assert_array_equal(history.mean(), [0.0, 1.0, 0.0, 0.0, 2.0])
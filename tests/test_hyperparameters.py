@@ -0,0 +1,182 @@
+import numpy as np
+
+from types import SimpleNamespace
+
+from neurons.utils.hyperparameters import DEFAULT_TEMPO, HyperparameterCache
+from neurons.utils.weight_utils import process_weights_for_netuid
+
+
+class CountingSubtensor:
+    def __init__(self, tempo=10):
+        self._tempo = tempo
+        self.calls = []
+
+    def tempo(self, netuid):
+        self.calls.append(("tempo", netuid))
+        return self._tempo
+
+    def min_allowed_weights(self, netuid):
+        self.calls.append(("min_allowed_weights", netuid))
+        return 2
+
+    def max_weight_limit(self, netuid):
+        self.calls.append(("max_weight_limit", netuid))
+        return 0.5
+
+    def is_hotkey_registered(self, netuid, hotkey_ss58):
+        self.calls.append(("is_hotkey_registered", netuid))
+        return hotkey_ss58 == "registered"
+
+
+def make_cache(refresh_blocks=0, tempo=10):
+    clock = SimpleNamespace(block=100)
+    subtensor = CountingSubtensor(tempo=tempo)
+    cache = HyperparameterCache(subtensor, get_block=lambda: clock.block, refresh_blocks=refresh_blocks)
+    return cache, subtensor, clock
+
+
+def test_refreshes_once_per_tempo():
+    cache, subtensor, clock = make_cache(tempo=10)
+    for block in range(100, 110):
+        clock.block = block
+        assert cache.min_allowed_weights(netuid=1) == 2
+    assert subtensor.calls == [("min_allowed_weights", 1), ("tempo", 1)]
+    assert (cache.hits, cache.misses) == (9, 1)
+
+    clock.block = 110
+    cache.min_allowed_weights(netuid=1)
+    assert subtensor.calls[-1] == ("min_allowed_weights", 1)
+    assert cache.misses == 2
+
+
+def test_configured_refresh_blocks_skip_the_tempo():
+    cache, subtensor, clock = make_cache(refresh_blocks=3)
+    cache.max_weight_limit(netuid=1)
+    clock.block = 102
+    cache.max_weight_limit(netuid=1)
+    clock.block = 103
+    cache.max_weight_limit(netuid=1)
+    assert subtensor.calls == [("max_weight_limit", 1), ("max_weight_limit", 1)]
+
+
+def test_keys_include_netuid_and_arguments():
+    cache, subtensor, _ = make_cache()
+    assert cache.is_hotkey_registered(netuid=1, hotkey_ss58="registered")
+    assert not cache.is_hotkey_registered(netuid=1, hotkey_ss58="other")
+    assert cache.is_hotkey_registered(netuid=2, hotkey_ss58="registered")
+    assert cache.is_hotkey_registered(netuid=1, hotkey_ss58="registered")
+    assert len(cache) == 3
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidate_drops_values_and_tempo():
+    cache, subtensor, _ = make_cache()
+    cache.min_allowed_weights(netuid=1)
+    cache.min_allowed_weights(netuid=1)
+    cache.invalidate()
+    assert len(cache) == 0
+    cache.min_allowed_weights(netuid=1)
+    cache.min_allowed_weights(netuid=1)
+    assert subtensor.calls.count(("min_allowed_weights", 1)) == 2
+    assert subtensor.calls.count(("tempo", 1)) == 2
+
+
+def test_unreadable_tempo_falls_back_to_default():
+    cache, _, _ = make_cache(tempo=None)
+    assert cache.refresh_period(1) == DEFAULT_TEMPO
+
+
+def test_process_weights_for_netuid_through_the_cache():
+    cache, subtensor, _ = make_cache()
+    metagraph = SimpleNamespace(n=4)
+    uids = np.arange(4)
+    weights = np.array([0.0, 0.2, 0.3, 0.5], dtype=np.float32)
+
+    expected = process_weights_for_netuid(uids, weights, 1, subtensor, metagraph)
+    for _ in range(3):
+        result = process_weights_for_netuid(uids, weights, 1, cache, metagraph)
+        np.testing.assert_array_equal(result[0], expected[0])
+        np.testing.assert_array_equal(result[1], expected[1])
+    assert (cache.hits, cache.misses) == (4, 2)
+
+
+class SyncedMetagraph:
+    def __init__(self, hotkeys):
+        self.hotkeys = list(hotkeys)
+        self.n = np.int64(len(hotkeys))
+        self.uids = np.arange(len(hotkeys))
+        self.axons = [
+            SimpleNamespace(ip="10.0.0.1", port=8091 + uid, hotkey=hotkey, coldkey="ck", is_serving=True)
+            for uid, hotkey in enumerate(hotkeys)
+        ]
+        self.active = np.ones(len(hotkeys), dtype=np.int64)
+        self.validator_permit = np.zeros(len(hotkeys), dtype=bool)
+        self.S = np.zeros(len(hotkeys))
+        self.last_update = np.zeros(len(hotkeys), dtype=np.int64)
+
+    def sync(self, subtensor):
+        pass
+
+
+def make_validator(clock, subtensor, hotkeys):
+    from neurons.base.neuron import BaseNeuron
+    from neurons.utils.metrics import StageMetrics
+    from neurons.validator.src.core.validator import BaseValidatorNeuron
+
+    subtensor.set_weights = lambda **kwargs: (True, "")
+    neuron = SimpleNamespace(
+        config=SimpleNamespace(netuid=1, neuron=SimpleNamespace(epoch_length=100, disable_set_weights=False)),
+        wallet=SimpleNamespace(hotkey=SimpleNamespace(ss58_address="registered")),
+        metagraph=SyncedMetagraph(hotkeys),
+        subtensor=subtensor,
+        hyperparameters=HyperparameterCache(subtensor, get_block=lambda: clock.block),
+        metrics=StageMetrics(enabled=False),
+        scores=np.linspace(0, 1, len(hotkeys), dtype=np.float32),
+        neuron_type="ValidatorNeuron",
+        spec_version=1,
+        uid=0,
+        step=1,
+        save_state=lambda: None,
+    )
+    for name in ("check_registered", "should_sync_metagraph", "should_set_weights"):
+        setattr(neuron, name, getattr(BaseNeuron, name).__get__(neuron))
+    for name in ("resync_metagraph", "set_weights"):
+        setattr(neuron, name, getattr(BaseValidatorNeuron, name).__get__(neuron))
+    neuron.sync = BaseNeuron.sync.__get__(neuron)
+    return neuron
+
+
+def test_set_weights_hits_the_cache_across_resyncs():
+    clock = SimpleNamespace(block=1000)
+    subtensor = CountingSubtensor(tempo=360)
+    neuron = make_validator(clock, subtensor, ["registered", "hk1", "hk2", "hk3"])
+
+    for _ in range(3):
+        clock.block += 101
+        neuron.block = clock.block
+        neuron.sync()
+
+    # Each sync resyncs the metagraph and sets weights, only the first one reads the chain.
+    assert subtensor.calls.count(("min_allowed_weights", 1)) == 1
+    assert subtensor.calls.count(("max_weight_limit", 1)) == 1
+    assert subtensor.calls.count(("is_hotkey_registered", 1)) == 1
+    assert neuron.hyperparameters.hits == 6
+
+    # The next tempo reads them again.
+    clock.block += 360
+    neuron.block = clock.block
+    neuron.sync()
+    assert subtensor.calls.count(("min_allowed_weights", 1)) == 2
+
+
+def test_deregistered_hotkey_invalidates_the_cache():
+    clock = SimpleNamespace(block=1000)
+    subtensor = CountingSubtensor(tempo=360)
+    neuron = make_validator(clock, subtensor, ["registered", "hk1"])
+    neuron.block = clock.block
+    neuron.check_registered()
+
+    neuron.metagraph.hotkeys[0] = "replaced"
+    neuron.metagraph.axons[0].hotkey = "replaced"
+    neuron.resync_metagraph()
+    assert len(neuron.hyperparameters) == 0
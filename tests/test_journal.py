@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+
+from neurons.validator.src.core.journal import ScoreJournal, apply_record
+from neurons.validator.src.core.state_file import ValidatorState, hotkey_hash
+
+
+def run_updates(journal, state, steps, rng, start=0):
+    for step in range(start, start + steps):
+        uids = rng.choice(state.n, size=4, replace=False)
+        rewards = rng.random(4)
+        journal.append(step, 1000 + step, uids, rewards, 0.1)
+        apply_record(state, uids, rewards, 0.1, 1000 + step)
+        state.step = step
+    return state
+
+
+def new_state(n, hotkeys=None):
+    state = ValidatorState.empty(n)
+    state.hotkey_hash[:] = hotkey_hash(hotkeys or [f"hk{i}" for i in range(n)])
+    return state
+
+
+def assert_same_state(restored, state):
+    assert restored.step == state.step
+    for name in ("scores", "last_block", "last_reward", "hotkey_hash"):
+        assert getattr(restored, name).dtype == getattr(state, name).dtype
+        np.testing.assert_array_equal(getattr(restored, name), getattr(state, name))
+
+
+def test_replay_is_bit_identical(tmp_path):
+    rng = np.random.default_rng(0)
+    journal = ScoreJournal(str(tmp_path), compact_steps=5, fsync=False)
+    state = run_updates(journal, new_state(16), 7, rng)
+    journal.compact(state)
+    state = run_updates(journal, state, 3, rng, start=7)
+    journal.close()
+
+    assert_same_state(ScoreJournal(str(tmp_path), fsync=False).load(), state)
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    rng = np.random.default_rng(1)
+    journal = ScoreJournal(str(tmp_path), fsync=False)
+    journal.compact(new_state(8))
+    state = run_updates(journal, new_state(8), 3, rng)
+    journal.close()
+    intact = os.path.getsize(journal.journal_path)
+
+    # A crash in the middle of the fourth append.
+    run_updates(journal, new_state(8), 1, rng, start=3)
+    journal.close()
+    with open(journal.journal_path, "r+b") as f:
+        f.truncate(intact + 10)
+
+    restarted = ScoreJournal(str(tmp_path), fsync=False)
+    assert_same_state(restarted.load(), state)
+    assert os.path.getsize(journal.journal_path) == intact
+
+    # New records continue after the last intact one.
+    restarted.append(3, 1003, [0], [1.0], 0.1)
+    restarted.close()
+    apply_record(state, np.array([0]), np.array([1.0]), 0.1, 1003)
+    state.step = 3
+    assert_same_state(ScoreJournal(str(tmp_path), fsync=False).load(), state)
+
+
+def test_records_in_the_snapshot_are_not_replayed(tmp_path):
+    rng = np.random.default_rng(2)
+    journal = ScoreJournal(str(tmp_path), fsync=False)
+    journal.compact(new_state(8))
+    state = run_updates(journal, new_state(8), 3, rng)
+    journal.close()
+    # A crash between saving the snapshot and truncating the journal.
+    with open(journal.journal_path, "rb") as f:
+        records = f.read()
+    journal.compact(state)
+    with open(journal.journal_path, "wb") as f:
+        f.write(records)
+
+    assert_same_state(ScoreJournal(str(tmp_path), fsync=False).load(), state)
+
+
+def test_journal_without_snapshot_is_replayed_for_the_given_hotkeys(tmp_path):
+    rng = np.random.default_rng(4)
+    journal = ScoreJournal(str(tmp_path), fsync=False)
+    state = run_updates(journal, new_state(8), 3, rng)
+    journal.close()
+
+    restored = ScoreJournal(str(tmp_path), fsync=False).load([f"hk{i}" for i in range(8)])
+    assert_same_state(restored, state)
+
+
+def test_compaction_thresholds(tmp_path):
+    journal = ScoreJournal(str(tmp_path), compact_steps=10, compact_bytes=1024, fsync=False)
+    assert journal.load() is None
+    assert journal.should_compact(0)
+    journal.compact(new_state(4))
+    assert not journal.should_compact(9)
+    assert journal.should_compact(10)
+
+    run_updates(journal, new_state(4), 10, np.random.default_rng(3))
+    assert journal.should_compact(1)
+    journal.compact(new_state(4))
+    assert not os.path.exists(journal.journal_path)
+    assert journal.closed_segments() == []
+
+
+def test_legacy_state_is_migrated(tmp_path):
+    hotkeys = [f"hk{i}" for i in range(4)]
+    np.savez(tmp_path / "state.npz", step=7, scores=np.arange(4, dtype=np.float32), hotkeys=hotkeys)
+
+    state = ScoreJournal(str(tmp_path), fsync=False).load()
+    assert state.step == 7
+    np.testing.assert_array_equal(state.scores, np.arange(4))
+    np.testing.assert_array_equal(state.hotkey_hash, hotkey_hash(hotkeys))
+
+
+def test_rotated_segments_are_replayed_until_their_snapshot_is_written(tmp_path):
+    rng = np.random.default_rng(4)
+    journal = ScoreJournal(str(tmp_path), fsync=False)
+    journal.compact(new_state(8))
+    state = run_updates(journal, new_state(8), 3, rng)
+    # The process dies after rotating, before the background write of the snapshot.
+    journal.rotate(ValidatorState.empty(8))
+    state = run_updates(journal, state, 2, rng, start=3)
+    journal.close()
+    assert len(journal.closed_segments()) == 1
+
+    restarted = ScoreJournal(str(tmp_path), fsync=False)
+    restored = restarted.load()
+    assert_same_state(restored, state)
+
+    restarted.write_snapshot(restarted.rotate(restored))
+    assert restarted.closed_segments() == []
+    assert_same_state(ScoreJournal(str(tmp_path), fsync=False).load(), state)
+
+
+def test_fsync_is_batched_with_rotation(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+    journal = ScoreJournal(str(tmp_path))
+    state = run_updates(journal, new_state(8), 20, np.random.default_rng(0))
+    assert synced == []
+
+    journal.rotate(state)
+    assert len(synced) == 1
+
+    journal = ScoreJournal(str(tmp_path), fsync=True)
+    run_updates(journal, new_state(8), 3, np.random.default_rng(0))
+    assert len(synced) == 4
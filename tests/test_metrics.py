@@ -0,0 +1,71 @@
+import re
+import sys
+import threading
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from neurons.utils import metrics as metrics_module
+from neurons.utils.metrics import StageHistogram, StageMetrics, BUCKET_BOUNDS
+
+
+def test_quantiles_within_one_bucket():
+    histogram = StageHistogram()
+    samples = np.random.default_rng(0).lognormal(mean=-3, sigma=1, size=10_000)
+    for x in samples:
+        histogram.record(float(x))
+
+    ratio = BUCKET_BOUNDS[1] / BUCKET_BOUNDS[0]
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(samples, q)
+        assert exact <= histogram.quantile(q) <= exact * ratio * 1.0001
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = StageMetrics(enabled=False)
+    with metrics.stage("forward"):
+        pass
+    metrics.record("sync", 1.0)
+    assert metrics.histograms == {}
+
+
+def test_stage_records_and_step_resets():
+    metrics = StageMetrics(enabled=True)
+    with metrics.stage("forward"):
+        pass
+    metrics.record("forward", 0.5)
+    assert metrics.percentiles()["forward"]["count"] == 2
+    assert metrics.percentiles()["forward"]["p99"] == 0.5
+
+    metrics.log_step(0)
+    assert metrics._step_totals == {}
+    assert metrics.histograms["forward"].count == 2
+
+
+def test_no_record_from_another_thread_is_lost(monkeypatch):
+    logged = []
+    monkeypatch.setattr(metrics_module.bt, "logging", SimpleNamespace(info=logged.append, debug=lambda message: None))
+    metrics = StageMetrics(enabled=True)
+
+    def write():
+        for _ in range(20000):
+            metrics.record("state_write", 1.0)
+
+    # Switch threads as often as possible, so records land between reading and resetting the totals.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    thread = threading.Thread(target=write)
+    try:
+        thread.start()
+        while thread.is_alive():
+            metrics.record("forward", 1.0)
+            metrics.log_step(0)
+        thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    metrics.log_step(0)
+
+    totals = [float(m) for line in logged for m in re.findall(r"state_write=([0-9.]+)ms", line)]
+    assert sum(totals) == 20000 * 1000.0
+    assert metrics.histograms["state_write"].count == 20000
@@ -0,0 +1,63 @@
+import random
+from collections import defaultdict
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from neurons.utils.network_view import NetworkView
+from neurons.utils.uids import check_uid_availability
+
+
+def random_metagraph(n, seed):
+    rng = random.Random(seed)
+    axons = [
+        SimpleNamespace(
+            ip=f"10.0.0.{rng.randrange(n // 2 + 1)}",
+            port=8000 + i,
+            hotkey=f"hotkey-{i}",
+            coldkey=f"coldkey-{rng.randrange(4)}",
+            is_serving=rng.random() < 0.8,
+        )
+        for i in range(n)
+    ]
+    return SimpleNamespace(
+        axons=axons,
+        n=np.int64(n),
+        hotkeys=[axon.hotkey for axon in axons],
+        active=np.array([rng.random() < 0.7 for _ in range(n)], dtype=np.int64),
+        validator_permit=np.array([rng.random() < 0.3 for _ in range(n)]),
+        S=np.array([rng.uniform(0, 10_000) for _ in range(n)], dtype=np.float32),
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_available_uids_match_check_uid_availability(seed):
+    metagraph = random_metagraph(64, seed)
+    expected = [uid for uid in range(64) if check_uid_availability(metagraph, uid, 4096)]
+    assert NetworkView(metagraph).available_uids(4096).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_active_ip_count_matches_loop(seed):
+    metagraph = random_metagraph(64, seed)
+    counts = defaultdict(int)
+    for uid, axon in enumerate(metagraph.axons):
+        if metagraph.active[uid] == 1:
+            counts[axon.ip] += 1
+
+    view = NetworkView(metagraph)
+    assert view.ip_counts == dict(counts)
+    assert view.active_ip_count.tolist() == [counts.get(axon.ip, 0) for axon in metagraph.axons]
+    assert all(view.uid_by_hotkey[axon.hotkey] == uid for uid, axon in enumerate(metagraph.axons))
+
+
+def test_version_changes_on_rebuild():
+    metagraph = random_metagraph(8, 0)
+    assert NetworkView(metagraph).version != NetworkView(metagraph).version
+
+
+def test_ports_compare_as_python_ints():
+    view = NetworkView(random_metagraph(4, 0))
+    assert all(type(port) is int for port in view.ports)
+    assert ([8001, 1] == view.ports[1]) is False
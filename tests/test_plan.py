@@ -0,0 +1,27 @@
+import numpy as np
+
+from neurons.validator.src.core.plan import EvaluationPlan
+
+
+def test_partitions_are_disjoint_and_cover_the_plan():
+    plan = EvaluationPlan(np.arange(10), partitions=3, nonce="n", view=None)
+    parts = [plan.take() for _ in range(3)]
+    assert plan.exhausted
+    covered = np.concatenate([plan.uids[p] for p in parts])
+    np.testing.assert_array_equal(covered, np.arange(10))
+
+
+def test_failed_partitions_are_left_out_of_the_result():
+    plan = EvaluationPlan(np.array([5, 6, 7, 8]), partitions=2, nonce="n", view=None)
+    first, second = plan.take(), plan.take()
+    assert not plan.complete(second, None)
+    assert plan.complete(first, [{"gpu": []}, None])
+    uids, responses = plan.result()
+    np.testing.assert_array_equal(uids, [5, 6])
+    assert responses == [{"gpu": []}, None]
+
+
+def test_more_partitions_than_uids():
+    plan = EvaluationPlan(np.array([1]), partitions=3, nonce="n", view=None)
+    sizes = [len(plan.uids[plan.take()]) for _ in range(3)]
+    assert sorted(sizes) == [0, 0, 1]
@@ -0,0 +1,53 @@
+import asyncio
+
+import numpy as np
+
+from neurons.utils.encrypt import generate_key
+from neurons.validator.src.core import replay
+from neurons.validator.src.core.evaluate_miners import EvaluateMiners
+from neurons.validator.src.core.recorder import read_steps, write_steps
+
+
+def make_evaluator(n, public_key, *args):
+    config = replay.config_from_args(replay.build_parser().parse_args(list(args)))
+    evaluator = EvaluateMiners(replay.replay_validator(config, n))
+    evaluator._key_registry.add(replay.SYNTHETIC_KEY_ID, public_key)
+    return evaluator
+
+
+def test_synthetic_steps_roundtrip_and_replay(tmp_path):
+    public_key, private_key = generate_key()
+    records = replay.synthesize_steps(16, 20, steps=2, private_key=private_key)
+    write_steps(tmp_path / "steps.jsonl.gz", records)
+    records = list(read_steps(tmp_path / "steps.jsonl.gz"))
+
+    results = []
+    for args in ([], ["--neuron.batch_responses"]):
+        evaluator = make_evaluator(16, public_key, *args)
+        results.append(asyncio.run(replay.replay_steps(evaluator, records)))
+        evaluator._verifier.close()
+
+    for streamed, batched in zip(*results):
+        assert streamed["valid"] == batched["valid"] == 16
+
+
+def test_replay_reproduces_recorded_rewards():
+    public_key, private_key = generate_key()
+    records = replay.synthesize_steps(8, 5, steps=1, private_key=private_key)
+    evaluator = make_evaluator(8, public_key)
+
+    first = asyncio.run(replay.replay_steps(evaluator, records))
+    assert first[0]["max_reward_diff"] is None
+
+    evaluator._validator.network_view = replay.view_from_record(records[0])
+    evaluator._validator.dendrite.load(records[0])
+    responses = asyncio.run(evaluator.get_server_config(np.arange(8), nonce=records[0]["nonce"]))
+    records[0]["rewards"] = evaluator.get_rewards(responses).tolist()
+    assert asyncio.run(replay.replay_steps(evaluator, records))[0]["max_reward_diff"] == 0.0
+
+    # A changed signature is rejected, which moves the rewards away from the recorded ones.
+    records[0]["responses"][3]["data"]["signature"] = records[0]["responses"][4]["data"]["signature"]
+    result = asyncio.run(replay.replay_steps(evaluator, records))[0]
+    assert result["valid"] == 7
+    assert result["max_reward_diff"] > 0
+    evaluator._verifier.close()
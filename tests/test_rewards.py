@@ -0,0 +1,108 @@
+import sys
+import random
+
+import numpy as np
+import pytest
+
+import neurons.validator.src.config.const as conf
+from neurons.validator.src.core.evaluate_miners import EvaluateMiners
+
+
+# From Python 3.12 the builtin sum of floats is compensated, the reference then differs in the last bits.
+EXACT_SUMS = sys.version_info < (3, 12)
+
+
+def assert_same_rewards(rewards, expected):
+    assert rewards.dtype == expected.dtype
+    if EXACT_SUMS:
+        np.testing.assert_array_equal(rewards, expected)
+    else:
+        np.testing.assert_allclose(rewards, expected, rtol=1e-12, atol=0)
+
+
+def reference_rewards(responses):
+    """The original per-miner loop of EvaluateMiners.get_rewards."""
+    total_gpus = sum(len(r["gpu"]) for r in responses if r is not None)
+    total_uptime = sum(
+        sum(c["uptime"] for c in r["containers"] if c["status"] == 1)
+        for r in responses
+        if r is not None
+    )
+
+    total_long_run = 0
+    for r in responses:
+        if r is None:
+            continue
+        uptimes = [c["uptime"] for c in r["containers"] if c["status"] == 1]
+        if uptimes and sum(uptimes) / len(uptimes) > conf.POD_RUN_TIME_AVG_DAY:
+            total_long_run += 1
+
+    scores = []
+    for r in responses:
+        if r is None:
+            scores.append(0.0)
+            continue
+        score_a = len(r["gpu"]) / total_gpus if total_gpus > 0 else 0
+        score_b = sum(c["uptime"] for c in r["containers"] if c["status"] == 1)
+        score_b = score_b / total_uptime if total_uptime > 0 else 0
+        score_c = 0.0
+        valid_uptimes = [c["uptime"] for c in r["containers"] if c["status"] == 1]
+        if valid_uptimes:
+            avg = sum(valid_uptimes) / len(valid_uptimes)
+            if avg > conf.POD_RUN_TIME_AVG_DAY and total_long_run > 0:
+                score_c = 1 / total_long_run
+        gpu_weight = sum(conf.GPU_MODEL_RATES.get(g.get("model"), 0) for g in r["gpu"])
+        scores.append(
+            (
+                conf.GPU_CORES_SCORE * score_a
+                + conf.POD_RUN_TIME_SCORE * score_b
+                + conf.POD_RUN_TIME_AVG_SCORE * score_c
+            )
+            * (1 + gpu_weight)
+        )
+
+    scores = np.array(scores)
+    total_sum = np.sum(scores)
+    if total_sum > 0:
+        scores = scores / total_sum
+    return scores
+
+
+def random_responses(rng, n, float_uptimes):
+    models = list(conf.GPU_MODEL_RATES) + ["Unknown GPU"]
+    responses = []
+    for _ in range(n):
+        if rng.random() < 0.2:
+            responses.append(None)
+            continue
+        responses.append({
+            "gpu": [{"model": rng.choice(models)} for _ in range(rng.randint(0, 8))],
+            "containers": [
+                {
+                    "status": rng.choice([0, 1, 1, 2]),
+                    "uptime": rng.random() * 2e6 if float_uptimes else rng.randint(0, 2_000_000),
+                }
+                for _ in range(rng.randint(0, 30))
+            ],
+            "ip": "127.0.0.1",
+        })
+    return responses
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("float_uptimes", [False, True])
+def test_get_rewards_matches_reference(seed, float_uptimes):
+    rng = random.Random(seed)
+    responses = random_responses(rng, rng.randint(0, 64), float_uptimes)
+    evaluator = EvaluateMiners.__new__(EvaluateMiners)
+
+    rewards = evaluator.get_rewards(responses)
+    expected = reference_rewards(responses)
+
+    assert_same_rewards(rewards, expected)
+
+
+def test_get_rewards_no_valid_responses():
+    evaluator = EvaluateMiners.__new__(EvaluateMiners)
+    np.testing.assert_array_equal(evaluator.get_rewards([None, None]), [0.0, 0.0])
+    assert evaluator.get_rewards([]).size == 0
@@ -0,0 +1,151 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from neurons.validator.src.core.rules import Rule, RuleEngine, AttestationContext
+
+NONCE = "nonce"
+NOW = 1_760_000_000_000
+
+
+def reference_validate(uid, res, view):
+    """The original if/return chain of EvaluateMiners.validate_response, without the signature check."""
+    if res == None:
+        return "response"
+    if not res.get("status", False):
+        return "status"
+    if not isinstance(res.get("data", {}), dict):
+        return "payload"
+    if uid >= view.n:
+        return "metagraph"
+    data = res.get("data", {})
+    if view.active_ip_count[uid] > 1:
+        return "ip_count"
+    if data.get("ip") != view.ips[uid]:
+        return "ip"
+    if data.get("port") != view.ports[uid]:
+        return "port"
+    if data.get("coldkey") != view.coldkeys[uid]:
+        return "coldkey"
+    if data.get("hotkey") != view.hotkeys[uid]:
+        return "hotkey"
+    if data.get("nonce") != NONCE:
+        return "nonce"
+    if not data.get("signature"):
+        return "signature_present"
+    if NOW - data.get("timestamp", 0) > 10_000:
+        return "timestamp"
+    return None
+
+
+def make_view(n):
+    return SimpleNamespace(
+        n=n,
+        ips=np.array([f"10.0.0.{i}" for i in range(n)], dtype=object),
+        ports=np.arange(8000, 8000 + n),
+        hotkeys=np.array([f"hk{i}" for i in range(n)], dtype=object),
+        coldkeys=np.array([f"ck{i}" for i in range(n)], dtype=object),
+        active_ip_count=np.array([2 if i % 7 == 0 else 1 for i in range(n)]),
+    )
+
+
+def random_response(rng, uid):
+    if rng.random() < 0.05:
+        return None
+    data = {
+        "ip": f"10.0.0.{uid}",
+        "port": 8000 + uid,
+        "coldkey": f"ck{uid}",
+        "hotkey": f"hk{uid}",
+        "nonce": NONCE,
+        "signature": "sig",
+        "timestamp": NOW - rng.randint(0, 9_000),
+    }
+    field = rng.choice(list(data) + [None] * 8)
+    if field == "timestamp":
+        data[field] = NOW - 20_000
+    elif field is not None:
+        data[field] = rng.choice(["", "other", None])
+    if rng.random() < 0.02:
+        data = ["not", "a", "dict"]
+    return {"status": rng.random() > 0.05, "data": data}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rules_match_reference(seed):
+    rng = random.Random(seed)
+    view = make_view(32)
+    engine = RuleEngine(n=32)
+    engine.begin_step()
+
+    expected = np.zeros(len(engine.rules), dtype=np.int64)
+    for _ in range(500):
+        uid = rng.randrange(34)
+        res = random_response(rng, uid)
+        reason = reference_validate(uid, res, view)
+        assert engine.evaluate(AttestationContext(uid, res, view, NONCE, NOW)) == (reason is None)
+        if reason is not None:
+            expected[engine.index[reason]] += 1
+
+    np.testing.assert_array_equal(engine.rejections, expected)
+    np.testing.assert_array_equal(engine.step_rejections, expected)
+    assert engine.uid_rejections.sum() == expected.sum()
+    assert engine.step_responses == 500
+
+
+def test_deferred_rule_and_summary():
+    engine = RuleEngine(n=4)
+    engine.begin_step()
+    engine.evaluate(AttestationContext(1, None, make_view(4), NONCE, NOW))
+    engine.reject(2, "signature")
+    engine.record("signature", 3, 0.003)
+
+    assert engine.uid_rejections[2, engine.index["signature"]] == 1
+    assert engine.stats()["signature"]["mean_cost"] == pytest.approx(0.001)
+    assert engine.step_summary() == "rejected 2/1: response=1 signature=1"
+
+    engine.reset([2])
+    engine.begin_step()
+    assert engine.uid_rejections[2].sum() == 0
+    assert engine.step_summary() == "rejected 0/0"
+
+
+@pytest.mark.parametrize("port", [[8001, 1], {"port": 8001}, "8001", 8001.5])
+def test_malformed_port_is_rejected(port):
+    view = make_view(4)
+    view.ports = np.arange(8000, 8004, dtype=np.int64)
+    engine = RuleEngine(n=4)
+    res = {"status": True, "data": {"ip": "10.0.0.1", "port": port}}
+
+    assert not engine.evaluate(AttestationContext(1, res, view, NONCE, NOW))
+    assert engine.rejections[engine.index["port"]] == 1
+
+
+def test_raising_rule_rejects_only_that_response():
+    def explode(context):
+        raise ValueError("malformed")
+
+    engine = RuleEngine([Rule("explode", explode), Rule("signature", deferred=True)], n=2)
+    engine.begin_step()
+    assert not engine.evaluate(AttestationContext(0, {}, make_view(2), NONCE, NOW))
+    assert engine.step_summary() == "rejected 1/1: explode=1"
+
+
+@pytest.mark.parametrize("timestamp", [None, "1760000000000", [NOW], {"ts": NOW}, True])
+def test_malformed_timestamp_is_rejected(timestamp):
+    view = make_view(4)
+    data = {
+        "ip": "10.0.0.1", "port": 8001, "coldkey": "ck1", "hotkey": "hk1",
+        "nonce": NONCE, "signature": "sig", "timestamp": timestamp,
+    }
+    engine = RuleEngine(n=4)
+
+    assert not engine.evaluate(AttestationContext(1, {"status": True, "data": data}, view, NONCE, NOW))
+    assert engine.rejections[engine.index["timestamp"]] == 1
+
+    del data["timestamp"]
+    assert not engine.evaluate(AttestationContext(1, {"status": True, "data": data}, view, NONCE, NOW))
+    data["timestamp"] = NOW - 1_000
+    assert engine.evaluate(AttestationContext(1, {"status": True, "data": data}, view, NONCE, NOW))
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from neurons.validator.src.core import scheduler as scheduler_module
+from neurons.validator.src.core.scheduler import BLOCK_TIME, StepScheduler
+
+
+@pytest.mark.parametrize("block, blocks_to_slot", [(100, 10), (101, 9), (105, 5), (109, 1)])
+def test_next_slot_time_is_aligned_to_the_cadence(block, blocks_to_slot):
+    scheduler = StepScheduler(cadence_blocks=10)
+    assert scheduler.next_slot_time(block, now=1000.0) == 1000.0 + blocks_to_slot * BLOCK_TIME
+
+
+def test_jitter_is_added_within_its_bound():
+    scheduler = StepScheduler(cadence_blocks=10, jitter=3.0)
+    delays = [scheduler.next_slot_time(105, now=0.0) - 5 * BLOCK_TIME for _ in range(200)]
+    assert 0.0 <= min(delays) and max(delays) <= 3.0
+    assert max(delays) > min(delays)
+
+
+def test_invalid_cadence():
+    with pytest.raises(ValueError):
+        StepScheduler(cadence_blocks=0)
+
+
+def test_sleep_until_a_past_deadline_returns_immediately(monkeypatch):
+    slept = []
+
+    async def record_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(scheduler_module.asyncio, "sleep", record_sleep)
+    scheduler = StepScheduler(cadence_blocks=10)
+    asyncio.run(scheduler.sleep_until(time.monotonic() - 5))
+    assert slept == []
+
+    asyncio.run(scheduler.sleep_until(time.monotonic() + 60))
+    assert len(slept) == 1 and 0 < slept[0] <= 60
+
+
+def test_run_step_cancels_an_overrunning_step():
+    cancelled = []
+
+    async def step(seconds):
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            cancelled.append(seconds)
+            raise
+
+    scheduler = StepScheduler(cadence_blocks=1, deadline=0.05)
+    start = time.monotonic()
+    assert asyncio.run(scheduler.run_step(step(5.0))) is False
+    assert time.monotonic() - start < 1.0
+    assert cancelled == [5.0]
+
+    assert asyncio.run(scheduler.run_step(step(0.0))) is True
+
+
+def test_deadline_is_shorter_than_the_cadence():
+    period = 10 * BLOCK_TIME
+    assert StepScheduler(cadence_blocks=10).deadline < period
+    assert StepScheduler(cadence_blocks=10, deadline=30.0).deadline == 30.0
+    assert StepScheduler(cadence_blocks=10, deadline=period).deadline < period
@@ -0,0 +1,61 @@
+import numpy as np
+
+from neurons.validator.src.core.state_file import StateFile, ValidatorState, hotkey_hash, read_state
+
+
+def make_state(n, step, seed=0):
+    rng = np.random.default_rng(seed)
+    state = ValidatorState.empty(n, step=step)
+    state.scores[:] = rng.random(n)
+    state.last_block[:] = rng.integers(0, 10_000, n)
+    state.last_reward[:] = rng.random(n)
+    state.hotkey_hash[:] = hotkey_hash([f"hk{i}" for i in range(n)])
+    state.journal_seq = step * 3
+    return state
+
+
+def assert_same_state(restored, state):
+    assert (restored.step, restored.journal_seq) == (state.step, state.journal_seq)
+    for name in ("scores", "last_block", "last_reward", "hotkey_hash"):
+        np.testing.assert_array_equal(getattr(restored, name), getattr(state, name))
+
+
+def test_save_and_read_while_mapped(tmp_path):
+    state_file = StateFile(str(tmp_path / "state.bin"))
+    for step in range(3):
+        state = make_state(10, step, seed=step)
+        state_file.save(state)
+        assert_same_state(read_state(state_file.path), state)
+    state_file.close()
+    assert_same_state(StateFile(state_file.path).load(), state)
+
+
+def test_growing_past_the_capacity_rewrites_the_file(tmp_path):
+    state_file = StateFile(str(tmp_path / "state.bin"))
+    state_file.save(make_state(10, 1))
+    capacity = state_file.capacity
+    state = make_state(capacity + 1, 2)
+    state_file.save(state)
+    assert state_file.capacity > capacity
+    assert_same_state(read_state(state_file.path), state)
+
+
+def test_damaged_active_slot_falls_back_to_the_previous_save(tmp_path):
+    state_file = StateFile(str(tmp_path / "state.bin"))
+    previous = make_state(10, 1, seed=1)
+    state_file.save(previous)
+    state_file.save(make_state(10, 2, seed=2))
+    state_file.close()
+
+    # Corrupt a score of the active slot, slot 1 after two saves.
+    with open(state_file.path, "r+b") as f:
+        f.seek(64 + (32 + 24 * 256) + 32 + 16 * 256)
+        f.write(b"\xff\xff\xff\xff")
+
+    assert_same_state(read_state(state_file.path), previous)
+
+
+def test_missing_or_foreign_file(tmp_path):
+    assert StateFile(str(tmp_path / "state.bin")).load() is None
+    (tmp_path / "state.bin").write_bytes(b"not a state file" * 8)
+    assert read_state(str(tmp_path / "state.bin")) is None
@@ -0,0 +1,53 @@
+import threading
+
+from neurons.utils.metrics import StageMetrics
+from neurons.validator.src.core.state_writer import StateWriter
+
+
+def test_latest_snapshot_wins_while_a_write_is_in_progress():
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    def write(snapshot):
+        started.set()
+        release.wait(5)
+        written.append(snapshot)
+
+    metrics = StageMetrics(enabled=True)
+    writer = StateWriter(write, metrics)
+    writer.submit(1)
+    assert started.wait(5)
+    for snapshot in (2, 3, 4):
+        writer.submit(snapshot)
+    release.set()
+
+    assert writer.flush(5)
+    assert written == [1, 4]
+    assert writer.replaced == 2
+    assert metrics.histograms["state_write"].count == 2
+    writer.stop(5)
+
+
+def test_stop_writes_the_last_snapshot():
+    written = []
+    writer = StateWriter(written.append)
+    writer.submit("last")
+    writer.stop(5)
+    assert written == ["last"]
+    assert writer.flush(0)
+
+
+def test_failed_write_is_counted_and_the_writer_keeps_going():
+    written = []
+
+    def write(snapshot):
+        if snapshot == "bad":
+            raise OSError("disk full")
+        written.append(snapshot)
+
+    writer = StateWriter(write)
+    writer.submit("bad")
+    assert writer.flush(5)
+    writer.submit("good")
+    writer.stop(5)
+    assert (writer.failed, written) == (1, ["good"])
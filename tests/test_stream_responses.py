@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from neurons.utils.encrypt import encrypt, generate_key
+from neurons.utils.metrics import StageMetrics
+from neurons.utils.network_view import NetworkView
+from neurons.validator.src.core.evaluate_miners import EvaluateMiners
+
+SLOW_DELAY = 0.3
+MINERS = 6
+
+
+class SlowAxonDendrite:
+    """Answers signed configs after the delay of the slowest queried axon, like a dendrite call waiting for all of them."""
+
+    def __init__(self, axons, private_key, delays):
+        self.axons = axons
+        self.private_key = private_key
+        self.delays = delays
+
+    async def __call__(self, axons, synapse=None, deserialize=True, timeout=12.0, **kwargs):
+        delay = max(self.delays.get(axon.hotkey, 0.0) for axon in axons)
+        await asyncio.sleep(delay)
+        synapses = []
+        for axon in axons:
+            s = synapse.copy()
+            s.output = self.respond(axon, s.input["body"]["nonce"])
+            s.dendrite.process_time = str(delay)
+            synapses.append(s.deserialize() if deserialize else s)
+        return synapses
+
+    def respond(self, axon, nonce):
+        data = {
+            "ip": axon.ip,
+            "port": axon.port,
+            "hotkey": axon.hotkey,
+            "coldkey": axon.coldkey,
+            "nonce": nonce,
+            "timestamp": int(time.time() * 1000),
+            "gpu": [{"model": "NVIDIA H200"}],
+            "containers": [{"id": "c0", "status": 1, "uptime": 10}],
+        }
+        data["signature"] = encrypt(data, self.private_key)
+        return {"status": True, "data": data}
+
+
+def make_evaluator(batch_responses=False):
+    public_key, private_key = generate_key()
+    axons = [
+        SimpleNamespace(ip=f"10.0.0.{uid}", port=8091, hotkey=f"hk{uid}", coldkey=f"ck{uid}", is_serving=True)
+        for uid in range(MINERS)
+    ]
+    metagraph = SimpleNamespace(
+        n=np.int64(MINERS), axons=axons, hotkeys=[axon.hotkey for axon in axons],
+        active=np.ones(MINERS, dtype=np.int64), validator_permit=np.zeros(MINERS, dtype=bool), S=np.zeros(MINERS),
+    )
+    validator = SimpleNamespace(
+        config=SimpleNamespace(neuron=SimpleNamespace(
+            eval_cadence_blocks=10, eval_jitter=0.0, step_deadline=0.0, batch_responses=batch_responses,
+            verify_workers=0, verify_processes=False, verify_batch_size=2,
+            timeout=12.0, timeout_floor=1.0, timeout_percentile=95.0, timeout_window=20, timeout_margin=1.5,
+            record_steps=False,
+        )),
+        metagraph=metagraph,
+        network_view=NetworkView(metagraph),
+        metrics=StageMetrics(enabled=False),
+        dendrite=SlowAxonDendrite(axons, private_key, {"hk0": SLOW_DELAY}),
+    )
+    evaluator = EvaluateMiners(validator)
+    evaluator._key_registry.add("test", public_key)
+    return evaluator
+
+
+def query(evaluator):
+    """Queries every miner once, returns the valid results and (index, now_ts, seconds since start) per validation."""
+    validations = []
+    validate_response = evaluator.validate_response
+    start = time.perf_counter()
+
+    def record(i, res, miner_uids, view, nonce, now_ts, offset=0):
+        validations.append((i, now_ts, time.perf_counter() - start))
+        return validate_response(i, res, miner_uids, view, nonce, now_ts, offset)
+
+    evaluator.validate_response = record
+    try:
+        results = asyncio.run(evaluator.get_server_config(np.arange(MINERS)))
+    finally:
+        evaluator._verifier.close()
+    return results, validations
+
+
+def test_each_response_is_validated_with_its_receive_time():
+    results, validations = query(make_evaluator())
+    assert all(r is not None for r in results)
+
+    now_ts = {i: ts for i, ts, _ in validations}
+    assert sorted(now_ts) == list(range(MINERS))
+    fast = [now_ts[i] for i in range(1, MINERS)]
+    assert now_ts[0] - max(fast) >= SLOW_DELAY * 1000 * 0.8
+
+
+def test_slow_axon_does_not_delay_the_fast_ones():
+    _, validations = query(make_evaluator())
+
+    # The fast responses are validated first, long before the slow one arrives.
+    assert validations[-1][0] == 0
+    assert max(elapsed for i, _, elapsed in validations if i != 0) < SLOW_DELAY / 2
+    assert validations[-1][2] >= SLOW_DELAY
+
+
+def test_batch_responses_validates_all_at_once():
+    results, validations = query(make_evaluator(batch_responses=True))
+    assert all(r is not None for r in results)
+
+    # One call waits for the slowest axon, then every response is validated with the same time.
+    assert [i for i, _, _ in validations] == list(range(MINERS))
+    assert len({ts for _, ts, _ in validations}) == 1
+    assert min(elapsed for _, _, elapsed in validations) >= SLOW_DELAY
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from neurons.validator.src.core.timeouts import MinerTimeouts, process_time_of
+
+
+def test_unseen_uids_get_the_ceiling():
+    timeouts = MinerTimeouts(n=2, floor=1.0, ceiling=10.0)
+    np.testing.assert_array_equal(timeouts.timeouts([0, 1, 5]), [10.0, 10.0, 10.0])
+
+
+def test_timeouts_follow_latency_within_bounds():
+    timeouts = MinerTimeouts(n=3, floor=1.0, ceiling=10.0, percentile=50.0, window=4, margin=2.0)
+    for _ in range(4):
+        uids = np.array([0, 1, 2])
+        timeouts.observe(uids, [0.1, 2.0, 30.0], timeouts.timeouts(uids))
+    np.testing.assert_array_equal(timeouts.timeouts([0, 1, 2]), [1.0, 4.0, 10.0])
+
+
+def test_missing_process_time_counts_as_the_given_timeout():
+    timeouts = MinerTimeouts(n=1, floor=1.0, ceiling=10.0, percentile=100.0, window=2, margin=1.0)
+    timeouts.observe([0], [0.5], [10.0])
+    timeouts.observe([0], [0.5], [10.0])
+    assert timeouts.timeouts([0])[0] == 1.0
+    timeouts.observe([0], [np.nan], [1.0])
+    timeouts.observe([0], [np.nan], [1.0])
+    assert timeouts.timeouts([0])[0] == 1.0
+    timeouts.reset([0])
+    assert timeouts.timeouts([0])[0] == 10.0
+
+
+def test_save_and_load(tmp_path):
+    timeouts = MinerTimeouts(n=2, floor=1.0, ceiling=10.0)
+    timeouts.observe([0, 1], [3.0, 4.0], [10.0, 10.0])
+    timeouts.save(tmp_path / "miner_timeouts.npz")
+
+    restored = MinerTimeouts(floor=1.0, ceiling=10.0)
+    restored.load(tmp_path / "miner_timeouts.npz")
+    np.testing.assert_array_equal(restored.timeouts([0, 1]), timeouts.timeouts([0, 1]))
+
+
+def test_damaged_or_mismatched_state_keeps_an_empty_history(tmp_path):
+    path = tmp_path / "miner_timeouts.npz"
+    path.write_bytes(b"PK\x03\x04 truncated")
+    timeouts = MinerTimeouts(n=2, window=4)
+    timeouts.load(path)
+    assert timeouts.history.shape == (2, 4)
+
+    saved = MinerTimeouts(n=3, window=8)
+    saved.save(path)
+    timeouts.load(path)
+    assert timeouts.history.shape == (2, 4)
+
+    state = MinerTimeouts(n=3, window=4).state()
+    np.savez(path, history=state["history"], position=np.array([0, 4, 0]))
+    timeouts.load(path)
+    assert timeouts.history.shape == (2, 4)
+
+
+def test_window_and_margin_come_from_the_config():
+    config = SimpleNamespace(neuron=SimpleNamespace(
+        timeout=10.0, timeout_floor=1.0, timeout_percentile=50.0, timeout_window=4, timeout_margin=2.0,
+    ))
+    timeouts = MinerTimeouts.from_config(config, n=1)
+    assert timeouts.history.shape == (1, 4)
+    timeouts.observe([0], [2.0], [10.0])
+    assert timeouts.timeouts([0])[0] == 4.0
+
+
+def test_process_time_of():
+    assert process_time_of(SimpleNamespace(dendrite=SimpleNamespace(process_time="0.25"))) == 0.25
+    assert np.isnan(process_time_of(SimpleNamespace(dendrite=SimpleNamespace(process_time=None))))
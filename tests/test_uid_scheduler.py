@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from neurons.validator.src.core.uid_scheduler import UidScheduler
+
+
+def response(version=0):
+    return {"gpu": [{"model": "NVIDIA H200"}], "containers": [{"id": f"c{version}", "status": 1, "uptime": 1}]}
+
+
+def run_rounds(scheduler, available, k, rounds, respond):
+    """Runs `rounds` rounds, returns the rounds in which each uid was queried."""
+    queried = {int(uid): [] for uid in available}
+    for _ in range(rounds):
+        round_ = scheduler.round
+        uids = scheduler.next_uids(available, k)
+        for uid in uids:
+            queried[int(uid)].append(round_)
+        scheduler.observe(uids, [respond(int(uid), round_) for uid in uids])
+    return queried
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_every_uid_is_revisited_within_the_bound(seed):
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    scheduler = UidScheduler(n=64)
+    available = np.arange(64)
+    changing = set(rng.choice(64, size=16, replace=False).tolist())
+
+    queried = run_rounds(
+        scheduler, available, 8, 200,
+        lambda uid, round_: response(round_ if uid in changing else 0),
+    )
+
+    bound = scheduler.revisit_bound()
+    for uid, rounds in queried.items():
+        assert rounds[0] < bound
+        assert np.diff(rounds).max() <= bound
+
+
+def test_changing_and_failing_uids_are_sampled_more_than_stable_ones():
+    np.random.seed(0)
+    scheduler = UidScheduler(n=30)
+
+    def respond(uid, round_):
+        if uid < 10:
+            return response(round_)  # inventory changes on every evaluation
+        if uid < 20:
+            return None  # fails to answer
+        return response()
+
+    queried = run_rounds(scheduler, np.arange(30), 5, 300, respond)
+    counts = np.array([len(queried[uid]) for uid in range(30)])
+
+    assert counts[:10].min() > counts[10:20].max()
+    assert counts[10:20].min() > counts[20:].max()
+    assert scheduler.weight[:10].min() == scheduler.max_weight
+    assert np.all(scheduler.weight[10:20] == 1.0)
+    assert scheduler.weight[20:].max() == scheduler.min_weight
+
+
+def test_state_survives_a_save_load_round_trip(tmp_path):
+    np.random.seed(0)
+    scheduler = UidScheduler(n=16)
+    scheduler.sync_hotkeys([f"hk{uid}" for uid in range(16)])
+    run_rounds(scheduler, np.arange(16), 4, 10, lambda uid, round_: response(round_ % 2 * uid))
+
+    path = str(tmp_path / "uid_scheduler.npz")
+    scheduler.save(path)
+    restored = UidScheduler()
+    restored.load(path)
+
+    assert restored.round == scheduler.round
+    for name in ("next_due", "last_round", "weight", "fingerprint"):
+        np.testing.assert_array_equal(getattr(restored, name), getattr(scheduler, name))
+    assert restored.hotkeys.tolist() == scheduler.hotkeys.tolist()
+    assert len(restored.sync_hotkeys([f"hk{uid}" for uid in range(16)])) == 0
+
+    np.random.seed(1)
+    expected = scheduler.next_uids(np.arange(16), 4)
+    np.random.seed(1)
+    np.testing.assert_array_equal(restored.next_uids(np.arange(16), 4), expected)
+
+
+def test_missing_state_file_keeps_a_fresh_scheduler(tmp_path):
+    scheduler = UidScheduler(n=4)
+    scheduler.load(str(tmp_path / "uid_scheduler.npz"))
+    assert scheduler.round == 0 and len(scheduler.next_due) == 4
+
+
+def test_resync_adds_resets_and_drops_uids():
+    np.random.seed(0)
+    scheduler = UidScheduler()
+    hotkeys = [f"hk{uid}" for uid in range(8)]
+    assert scheduler.sync_hotkeys(hotkeys).tolist() == list(range(8))
+    run_rounds(scheduler, np.arange(8), 8, 3, lambda uid, round_: response())
+    assert scheduler.weight.max() < 1.0
+
+    # uid 3 is taken over by a new hotkey and uids 8, 9 join.
+    hotkeys[3] = "new"
+    replaced = scheduler.sync_hotkeys(hotkeys + ["hk8", "hk9"])
+    assert replaced.tolist() == [3, 8, 9]
+    assert len(scheduler.next_due) == 10
+    assert scheduler.weight[3] == 1.0 and scheduler.last_round[3] == -1
+
+    # The reset and the new uids are due before every uid that was already evaluated.
+    assert sorted(scheduler.next_uids(np.arange(10), 3).tolist()) == [3, 8, 9]
+
+    # uids that are no longer available are never returned.
+    available = np.array([0, 1, 2, 5])
+    for _ in range(10):
+        assert set(scheduler.next_uids(available, 2).tolist()) <= set(available.tolist())
+
+
+def test_damaged_state_file_keeps_a_fresh_scheduler(tmp_path):
+    path = tmp_path / "uid_scheduler.npz"
+    path.write_bytes(b"PK\x03\x04 truncated")
+    scheduler = UidScheduler(n=4)
+    scheduler.load(str(path))
+    assert scheduler.round == 0 and len(scheduler.next_due) == 4
+
+
+def test_inconsistent_state_file_keeps_a_fresh_scheduler(tmp_path):
+    path = str(tmp_path / "uid_scheduler.npz")
+    saved = UidScheduler(n=8)
+    saved.round = 5
+    state = saved.state()
+    state["weight"] = state["weight"][:3]
+    np.savez(path, **state)
+
+    scheduler = UidScheduler(n=4)
+    scheduler.load(path)
+    assert scheduler.round == 0 and len(scheduler.next_due) == len(scheduler.weight) == 4
+
+    del state["weight"]
+    np.savez(path, **state)
+    scheduler.load(path)
+    assert scheduler.round == 0
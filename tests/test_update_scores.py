@@ -0,0 +1,132 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from neurons.validator.src.core.history import RewardHistory
+from neurons.validator.src.core.journal import ScoreJournal
+from neurons.validator.src.core.state_file import read_arrays
+from neurons.validator.src.core.validator import BaseValidatorNeuron
+
+
+def make_neuron(directory, n, dtype=np.float32, alpha=0.1):
+    return SimpleNamespace(
+        scores=np.zeros(n, dtype=dtype),
+        last_block=np.zeros(n, dtype=np.int64),
+        last_reward=np.zeros(n, dtype=np.float32),
+        reward_history=RewardHistory(n, window=4),
+        scores_lock=threading.Lock(),
+        journal=ScoreJournal(str(directory), fsync=False),
+        step=0,
+        block=100,
+        config=SimpleNamespace(neuron=SimpleNamespace(moving_average_alpha=alpha)),
+        hotkeys=[f"hk{uid}" for uid in range(n)],
+    )
+
+
+def reference_update(scores, rewards, uids, alpha):
+    """The original update: scatter into a full-size array and blend."""
+    scattered_rewards = np.zeros_like(scores)
+    scattered_rewards[uids] = rewards
+    return alpha * scattered_rewards + (1 - alpha) * scores
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("alpha", [0.1, 0.3])
+def test_in_place_update_is_bit_identical(tmp_path, dtype, alpha):
+    rng = np.random.default_rng(0)
+    neuron = make_neuron(tmp_path, 256, dtype=dtype, alpha=alpha)
+    expected = neuron.scores.copy()
+    scores = neuron.scores
+    for _ in range(50):
+        uids = rng.choice(256, size=32, replace=False)
+        rewards = rng.random(32)
+        BaseValidatorNeuron.update_scores(neuron, rewards, uids.tolist())
+        expected = reference_update(expected, rewards, uids, alpha)
+
+    assert neuron.scores is scores
+    assert neuron.scores.dtype == dtype
+    np.testing.assert_array_equal(neuron.scores, expected)
+
+
+def test_nan_rewards_count_as_zero(tmp_path):
+    neuron = make_neuron(tmp_path, 4)
+    neuron.scores[:] = 1.0
+    BaseValidatorNeuron.update_scores(neuron, [np.nan, 1.0], [0, 1])
+    np.testing.assert_allclose(neuron.scores, [0.9, 1.0, 0.9, 0.9])
+
+
+def test_shape_mismatch_raises(tmp_path):
+    with pytest.raises(ValueError):
+        BaseValidatorNeuron.update_scores(make_neuron(tmp_path, 4), [1.0, 2.0], [0])
+
+
+def test_snapshots_taken_during_updates_lose_no_record(tmp_path):
+    neuron = make_neuron(tmp_path, 64)
+    neuron._copy_state = lambda: BaseValidatorNeuron._copy_state(neuron)
+
+    errors = []
+
+    def updates():
+        rng = np.random.default_rng(1)
+        try:
+            for _ in range(300):
+                BaseValidatorNeuron.update_scores(neuron, rng.random(8), rng.choice(64, size=8, replace=False))
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=updates)
+    thread.start()
+    while thread.is_alive():
+        neuron.journal.write_snapshot(BaseValidatorNeuron.rotate_state(neuron))
+    thread.join()
+
+    assert errors == []
+    assert neuron.journal.seq == 300
+    restored = ScoreJournal(str(tmp_path), fsync=False).load()
+    np.testing.assert_array_equal(restored.scores, neuron.scores)
+
+
+def test_state_files_are_written_with_the_snapshot_only(tmp_path):
+    neuron = make_neuron(tmp_path, 4)
+    neuron._copy_state = lambda: BaseValidatorNeuron._copy_state(neuron)
+    neuron.rotate_state = lambda: BaseValidatorNeuron.rotate_state(neuron)
+    neuron.snapshot = lambda: BaseValidatorNeuron.snapshot(neuron)
+    path = str(tmp_path / "extra.npz")
+    neuron.state_files = lambda: {path: {"values": np.arange(4)}}
+    submitted = []
+    neuron.state_writer = SimpleNamespace(submit=submitted.append)
+
+    # The first save has no state file to compact into, the next ones wait for the compaction.
+    BaseValidatorNeuron.save_state(neuron)
+    assert len(submitted) == 1
+    assert not os.path.exists(path)
+
+    BaseValidatorNeuron.write_snapshot(neuron, submitted[0])
+    np.testing.assert_array_equal(read_arrays(path)["values"], np.arange(4))
+    assert ScoreJournal(str(tmp_path), fsync=False).load() is not None
+
+    os.remove(path)
+    neuron.step = 1
+    BaseValidatorNeuron.save_state(neuron)
+    assert len(submitted) == 1
+    assert not os.path.exists(path)
+
+
+def test_scores_are_recovered_from_the_journal_alone(tmp_path):
+    neuron = make_neuron(tmp_path, 8)
+    rng = np.random.default_rng(2)
+    for step in range(3):
+        neuron.step = step
+        BaseValidatorNeuron.update_scores(neuron, rng.random(4), rng.choice(8, size=4, replace=False))
+    neuron.journal.close()
+    assert not os.path.exists(neuron.journal.state_file.path)
+
+    restarted = make_neuron(tmp_path, 8)
+    restarted.state_writer = SimpleNamespace(flush=lambda: None)
+    BaseValidatorNeuron.load_state(restarted)
+    assert restarted.step == 2
+    np.testing.assert_array_equal(restarted.scores, neuron.scores)
+    np.testing.assert_array_equal(restarted.last_block, neuron.last_block)
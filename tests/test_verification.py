@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from neurons.utils.encrypt import encrypt, generate_key, PublicKeyRegistry
+from neurons.validator.src.core.verification import AttestationVerifier
+
+
+def make_registry(tmp_path, public_key):
+    registry = PublicKeyRegistry(str(tmp_path))
+    registry.add("test", public_key)
+    return registry
+
+
+def make_attestations(private_key, n):
+    attestations = []
+    for i in range(n):
+        data = {"ip": f"10.0.0.{i}", "port": 8000 + i, "nonce": "nonce", "timestamp": i}
+        data["signature"] = encrypt(data, private_key)
+        attestations.append(data)
+    return attestations
+
+
+@pytest.mark.parametrize("workers, use_processes", [(0, False), (4, False), (3, True)])
+def test_results_keep_input_order_across_chunks(tmp_path, workers, use_processes):
+    public_key, private_key = generate_key()
+    attestations = make_attestations(private_key, 23)
+    # One bad signature in several chunks: tampered payloads and an undecodable signature.
+    for i in (0, 7, 13):
+        attestations[i]["port"] += 1
+    attestations[22]["signature"] = "not base64!"
+    expected = [i not in (0, 7, 13, 22) for i in range(23)]
+
+    verifier = AttestationVerifier(workers=workers, use_processes=use_processes)
+    try:
+        results = asyncio.run(verifier.verify_batch(attestations, make_registry(tmp_path, public_key)))
+    finally:
+        verifier.close()
+
+    assert results == expected
+    assert verifier.last_throughput > 0
+
+
+def test_empty_batch(tmp_path):
+    public_key, _ = generate_key()
+    verifier = AttestationVerifier(workers=2)
+    assert asyncio.run(verifier.verify_batch([], make_registry(tmp_path, public_key))) == []
+    verifier.close()
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_close_shuts_the_pool_down(use_processes):
+    verifier = AttestationVerifier(workers=2, use_processes=use_processes)
+    executor = verifier._executor
+    verifier.close()
+
+    assert verifier._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+    verifier.close()
@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from neurons.utils.weight_utils import (
+    U16_MAX,
+    convert_weights_and_uids_for_emit,
+    normalize_max_weight,
+    process_weights_for_netuid,
+)
+
+
+def reference_normalize_max_weight(x, limit=0.1):
+    """The original normalize_max_weight, with its per-value Python loop."""
+    epsilon = 1e-7
+    weights = x.copy()
+    values = np.sort(weights)
+    if x.sum() == 0 or len(x) * limit <= 1:
+        return np.ones_like(x) / x.size
+    estimation = values / values.sum()
+    if estimation.max() <= limit:
+        return weights / weights.sum()
+    cumsum = np.cumsum(estimation, 0)
+    estimation_sum = np.array([(len(values) - i - 1) * estimation[i] for i in range(len(values))])
+    n_values = (estimation / (estimation_sum + cumsum + epsilon) < limit).sum()
+    cutoff_scale = (limit * cumsum[n_values - 1] - epsilon) / (1 - (limit * (len(estimation) - n_values)))
+    cutoff = cutoff_scale * values.sum()
+    weights[weights > cutoff] = cutoff
+    return weights / weights.sum()
+
+
+def reference_process_weights(uids, weights, subtensor, metagraph, exclude_quantile=0):
+    """The original process_weights_for_netuid, without logging."""
+    if not isinstance(weights, np.ndarray) or weights.dtype != np.float32:
+        weights = weights.astype(np.float32)
+    quantile = exclude_quantile / U16_MAX
+    min_allowed_weights = subtensor.min_allowed_weights(netuid=1)
+    max_weight_limit = subtensor.max_weight_limit(netuid=1)
+    non_zero_weight_idx = np.atleast_1d(np.argwhere(weights > 0).squeeze())
+    non_zero_weight_uids = uids[non_zero_weight_idx]
+    non_zero_weights = weights[non_zero_weight_idx]
+    if non_zero_weights.size == 0 or metagraph.n < min_allowed_weights:
+        final_weights = np.ones(metagraph.n) / metagraph.n
+        return np.arange(len(final_weights)), final_weights
+    elif non_zero_weights.size < min_allowed_weights:
+        weights = np.ones(metagraph.n) * 1e-5
+        weights[non_zero_weight_idx] += non_zero_weights
+        normalized_weights = reference_normalize_max_weight(weights, limit=max_weight_limit)
+        return np.arange(len(normalized_weights)), normalized_weights
+    max_exclude = max(0, len(non_zero_weights) - min_allowed_weights) / len(non_zero_weights)
+    exclude_quantile = min([quantile, max_exclude])
+    lowest_quantile = np.quantile(non_zero_weights, exclude_quantile)
+    non_zero_weight_uids = non_zero_weight_uids[lowest_quantile <= non_zero_weights]
+    non_zero_weights = non_zero_weights[lowest_quantile <= non_zero_weights]
+    return non_zero_weight_uids, reference_normalize_max_weight(non_zero_weights, limit=max_weight_limit)
+
+
+def random_weights(rng, n, dtype, skew):
+    weights = rng.random(n) ** skew
+    weights[rng.random(n) < 0.3] = 0
+    # A few dominant miners force the clipping path.
+    weights[rng.integers(0, n, 3)] *= 1000
+    return weights.astype(dtype)
+
+
+class StubSubtensor:
+    def __init__(self, min_allowed_weights, max_weight_limit):
+        self._min_allowed_weights = min_allowed_weights
+        self._max_weight_limit = max_weight_limit
+
+    def min_allowed_weights(self, netuid):
+        return self._min_allowed_weights
+
+    def max_weight_limit(self, netuid):
+        return self._max_weight_limit
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("limit", [0.05, 0.1, 0.5])
+def test_normalize_max_weight_matches_reference(seed, dtype, limit):
+    rng = np.random.default_rng(seed)
+    x = random_weights(rng, int(rng.integers(1, 512)), dtype, skew=int(rng.integers(1, 6)))
+    result = normalize_max_weight(x, limit=limit)
+    expected = reference_normalize_max_weight(x, limit=limit)
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+    if x.sum() > 0 and len(x) * limit > 1:
+        assert result.max() <= limit + 1e-6
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("min_allowed_weights", [1, 8, 300])
+@pytest.mark.parametrize("exclude_quantile", [0, U16_MAX // 10])
+def test_process_weights_for_netuid_matches_reference(seed, min_allowed_weights, exclude_quantile):
+    rng = np.random.default_rng(seed)
+    n = 256
+    weights = random_weights(rng, n, np.float32, skew=4)
+    if seed == 0:
+        weights[:] = 0
+    metagraph = SimpleNamespace(n=n, uids=np.arange(n))
+    subtensor = StubSubtensor(min_allowed_weights, 0.1)
+
+    uids, result = process_weights_for_netuid(
+        metagraph.uids, weights, netuid=1, subtensor=subtensor, metagraph=metagraph,
+        exclude_quantile=exclude_quantile,
+    )
+    expected_uids, expected = reference_process_weights(
+        metagraph.uids, weights, subtensor, metagraph, exclude_quantile=exclude_quantile
+    )
+    np.testing.assert_array_equal(uids, expected_uids)
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+def reference_convert_weights_and_uids_for_emit(uids, weights):
+    """The original per-element quantization loop, without checks and logging."""
+    if np.sum(weights) == 0:
+        return [], []
+    max_weight = float(np.max(weights))
+    weights = [float(value) / max_weight for value in weights]
+    weight_vals, weight_uids = [], []
+    for weight_i, uid_i in zip(weights, uids):
+        uint16_val = round(float(weight_i) * int(U16_MAX))
+        if uint16_val != 0:
+            weight_vals.append(uint16_val)
+            weight_uids.append(uid_i)
+    return weight_uids, weight_vals
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_convert_weights_and_uids_for_emit_matches_reference(seed, dtype):
+    rng = np.random.default_rng(seed)
+    n = 1024
+    uids = np.arange(n)
+    weights = random_weights(rng, n, dtype, skew=6)
+    # Values that land exactly on .5 after scaling, to pin the rounding mode.
+    weights[:4] = np.array([0.5, 1.5, 2.5, U16_MAX], dtype=dtype)
+
+    weight_uids, weight_vals = convert_weights_and_uids_for_emit(uids, weights)
+    expected_uids, expected_vals = reference_convert_weights_and_uids_for_emit(uids, weights)
+    assert weight_uids.tolist() == [int(uid) for uid in expected_uids]
+    assert weight_vals.tolist() == expected_vals
+
+
+def test_convert_weights_and_uids_for_emit_edge_cases():
+    weight_uids, weight_vals = convert_weights_and_uids_for_emit(np.arange(3), np.zeros(3))
+    assert (weight_uids.tolist(), weight_vals.tolist()) == ([], [])
+    with pytest.raises(ValueError):
+        convert_weights_and_uids_for_emit(np.arange(2), np.array([0.5, -0.1]))
+    with pytest.raises(ValueError):
+        convert_weights_and_uids_for_emit(np.arange(3), np.array([0.5, 0.1]))